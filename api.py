@@ -1,18 +1,94 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from contextlib import ExitStack, asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Union
 from decimal import Decimal
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import os
+import tempfile
 from finance_engine.modules.payroll import PayrollManager
 from finance_engine.modules.calculator import FinancialCalculator
 from finance_engine.modules.business import BusinessAnalytics
-from finance_engine.database.session import SessionLocal, init_db
-from finance_engine.database.models import SimulacaoFinanceira
-from generate_report import generate_full_report
+from finance_engine.modules.payroll_batch import BatchPayroll
+from finance_engine.modules.payroll_projection import PayrollProjection
+from finance_engine.modules.painel_empresa import PainelEmpresa
+from finance_engine.modules.cache_calculos import CalculosEmCache
+from finance_engine.modules.projection import projetar_anual
+from finance_engine.modules.montecarlo import SimuladorMonteCarlo, carregar_historico
+from finance_engine.modules import tarefas
+from finance_engine.core.cache import cache_calculos
+from finance_engine.core.execucao import ExecutorCalculos, LimiteExcedido, LimitesConcorrencia
+from finance_engine.core.respostas import MiddlewareCompressao, RespostaJSON
+from finance_engine.core import metrics
+from finance_engine.database.session import SessionLocal, engine, init_db, get_db
+from finance_engine.database.writer import EscritorSimulacoes, FilaCheia
+from finance_engine.database.queries import listar_simulacoes
+from finance_engine.database.resumos import versao_dados
+from finance_engine.database import carga
+from report_jobs import GerenciadorRelatorios, CONCLUIDO, ERRO
 
-app = FastAPI(title="Jubarte Finance API")
+# Simulações são gravadas em lote por uma thread (write-behind), fora do request
+escritor_simulacoes = EscritorSimulacoes(SessionLocal)
+# Relatórios pesados rodam num pool de processos, fora dos workers da API
+relatorios = GerenciadorRelatorios()
+# Simulações de Monte Carlo grandes são divididas em blocos num pool de processos
+simulador_mc = SimuladorMonteCarlo()
+# Cálculos pesados vão para um pool de processos e o I/O bloqueante para um pool de threads
+executor = ExecutorCalculos()
+# Requisições simultâneas por endpoint (JUBARTE_LIMITE_<NOME>); acima disso, 429
+limites = LimitesConcorrencia({
+    "folha": 256,
+    "negocios": 256,
+    "precificacao": 8,
+    "investimento": 64,
+    "amortizacao": 64,
+    "tir": 16,
+    "sensibilidade": 8,
+    "varredura": 4,
+    "folha_empresa": 8,
+    "projecao": 8,
+    "painel": 64,
+    "montecarlo": 2,
+    "historico": 32,
+    "carga": 2,
+    "exportacao": 4,
+    "relatorios": 4,
+})
+
+# A partir destes tamanhos o cálculo sai do processo da API (o envio ao pool custa ~1 ms)
+LIMIAR_LINHAS_PROCESSO = 240
+LIMIAR_PONTOS_PROCESSO = 10_000
+LIMIAR_COMBINACOES_PROCESSO = 2_000
+LIMIAR_FLUXOS_PROCESSO = 1_000
+LIMIAR_ITENS_PROCESSO = 20_000
+
+def _preparar_processo():
+    # Uma vez por worker, na subida e não no import: o esquema (desligável com
+    # JUBARTE_CRIAR_ESQUEMA=0 quando a migração roda à parte), as tabelas de
+    # impostos em inteiros e a primeira conexão do pool
+    if os.environ.get("JUBARTE_CRIAR_ESQUEMA", "1") != "0":
+        init_db()
+    BatchPayroll.preparar_tabelas()
+    with engine.connect():
+        pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await executor.em_thread(_preparar_processo)
+    escritor_simulacoes.iniciar()
+    yield
+    # Grava o que ainda estiver na fila antes de encerrar o worker
+    escritor_simulacoes.parar()
+    relatorios.encerrar(aguardar=False)
+    simulador_mc.encerrar(aguardar=False)
+    executor.encerrar(aguardar=False)
+
+# Endpoints com respostas grandes devolvem `RespostaJSON` diretamente, sem o
+# jsonable_encoder; os demais passam pelo encoder e são codificados por ela.
+app = FastAPI(title="Jubarte Finance API", lifespan=lifespan, default_response_class=RespostaJSON)
 
 # Configuração de CORS para permitir que o dashboard (port 8080) acesse o backend (port 8000)
 app.add_middleware(
@@ -23,8 +99,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inicializa o banco de dados
-init_db()
+# Compressão gzip/brotli das respostas de texto a partir de JUBARTE_COMPRESSAO_MINIMO bytes
+app.add_middleware(MiddlewareCompressao, minimo=int(os.environ.get("JUBARTE_COMPRESSAO_MINIMO", 1024)))
+
+# Métricas (latência por rota, funções de cálculo e SQL): ligadas com JUBARTE_METRICAS=1
+app.add_middleware(metrics.MiddlewareMetricas)
+if metrics.habilitado_pelo_ambiente():
+    metrics.habilitar(engines=(engine,))
+
+@app.exception_handler(LimiteExcedido)
+async def limite_excedido(request, exc: LimiteExcedido):
+    return RespostaJSON({"detail": str(exc)}, status_code=429, headers={"Retry-After": "1"})
+
+class _StreamComVaga(StreamingResponse):
+    """
+    Resposta em streaming que segura uma vaga de `limites` durante todo o envio.
+    A vaga é liberada quando o corpo termina e, de qualquer forma, ao fim do
+    envio da resposta: cliente que desconecta antes do corpo ou middleware que
+    falha antes do streaming não deixam a vaga presa.
+    """
+
+    def __init__(self, vaga: ExitStack, conteudo, **kwargs):
+        super().__init__(conteudo, **kwargs)
+        self.vaga = vaga
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # ExitStack.close é idempotente: a segunda chamada não faz nada
+            self.vaga.close()
+
+def _stream_com_vaga(nome: str, partes, **kwargs) -> StreamingResponse:
+    vaga = ExitStack()
+    vaga.enter_context(limites.ocupar(nome))
+
+    def enviar():
+        try:
+            yield from partes
+        finally:
+            vaga.close()
+
+    return _StreamComVaga(vaga, enviar(), **kwargs)
 
 # Modelos Pydantic para validação de entrada
 class PayrollInput(BaseModel):
@@ -37,100 +153,510 @@ class AmortizationInput(BaseModel):
     valor: float
     taxa_anual: float
     meses: int
+    sistema: str = "PRICE"
+
+async def _calcular(pesado: bool, funcao, *args):
+    # Trabalho curto roda no próprio event loop; o pesado vai para o pool de processos
+    if pesado:
+        return await executor.em_processo(funcao, *args)
+    return funcao(*args)
+
+def _com_commit(db, funcao, *args):
+    # Leituras do resumo da folha podem materializar a linha da empresa; o
+    # handler é dono da sessão e grava essa linha (versão estável dos dados)
+    resultado = funcao(db, *args)
+    db.commit()
+    return resultado
 
 # Endpoints
 @app.post("/calculate/payroll")
-def calculate_payroll(data: PayrollInput):
-    try:
-        resultado = PayrollManager.calcular_folha_detalhada(
-            data.salario_bruto, 
-            dependentes=data.dependentes,
-            beneficios=data.beneficios,
-            outros_descontos=data.outros_descontos
+async def calculate_payroll(data: PayrollInput):
+    with limites.ocupar("folha"):
+        try:
+            folha = CalculosEmCache.folha_detalhada(
+                data.salario_bruto, 
+                dependentes=data.dependentes,
+                beneficios=data.beneficios,
+                outros_descontos=data.outros_descontos
+            )
+            # Salva no banco de dados automaticamente (gravação em lote; só espera se a fila encher)
+            simulacao_id = await executor.em_thread(
+                escritor_simulacoes.enfileirar,
+                tipo="PAYROLL_2026",
+                parametros_entrada=data.model_dump(),
+                resultados=folha.to_dict(texto=True),
+                usuario_ref="DASHBOARD_USER"
+            )
+            
+            return RespostaJSON.pronta(folha.to_json(id=simulacao_id))
+        except FilaCheia as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/payroll/run/{empresa_id}")
+async def run_company_payroll(empresa_id: int, ano: Optional[int] = None, colunar: bool = False, db=Depends(get_db)):
+    # Folha mensal de todos os funcionários da empresa em um único passo vetorizado;
+    # `colunar=true` devolve um array por coluna em vez de um objeto por funcionário
+    with limites.ocupar("folha_empresa"):
+        try:
+            resultado = await executor.em_thread(BatchPayroll.processar_empresa, db, empresa_id, ano=ano, colunar=colunar)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if resultado is None:
+            raise HTTPException(status_code=404, detail="Empresa não encontrada.")
+        return RespostaJSON(resultado)
+
+class AjusteAnualInput(BaseModel):
+    ano: int
+    inpc: Optional[float] = None  # % aplicado na data-base
+    salario_minimo: Optional[float] = None  # piso a partir de janeiro
+
+class TabelasAnoInput(BaseModel):
+    inss: List[List[Union[str, float]]]  # (início, fim, alíquota)
+    irrf: List[List[Union[str, float]]]  # (limite, alíquota, parcela a deduzir); "inf" na última faixa
+    deducao_dependente: Union[str, float]
+
+class PayrollProjectionInput(BaseModel):
+    anos: int = 5
+    ano_inicial: Optional[int] = None
+    mes_inicial: int = 1
+    mes_reajuste: int = 1
+    serie: List[AjusteAnualInput] = []
+    tabelas: Dict[int, TabelasAnoInput] = {}
+    por_funcionario: List[str] = []
+
+@app.post("/payroll/projection/{empresa_id}")
+async def project_company_payroll(empresa_id: int, data: PayrollProjectionInput, db=Depends(get_db)):
+    # Custo mensal da folha ao longo de vários anos (reajustes pelo INPC, salário
+    # mínimo e tabelas INSS/IRRF por ano), em colunas; `por_funcionario` pede
+    # também matrizes meses x funcionários das colunas escolhidas
+    with limites.ocupar("projecao"):
+        try:
+            tabelas = {
+                ano: PayrollProjection.montar_tabelas(ano, t.inss, t.irrf, t.deducao_dependente)
+                for ano, t in data.tabelas.items()
+            }
+            resultado = await executor.em_thread(
+                PayrollProjection.projetar_empresa, db, empresa_id,
+                anos=data.anos,
+                por_funcionario=data.por_funcionario,
+                ano_inicial=data.ano_inicial,
+                mes_inicial=data.mes_inicial,
+                mes_reajuste=data.mes_reajuste,
+                reajustes={a.ano: a.inpc for a in data.serie if a.inpc is not None},
+                salarios_minimos={a.ano: a.salario_minimo for a in data.serie if a.salario_minimo is not None},
+                tabelas=tabelas,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if resultado is None:
+            raise HTTPException(status_code=404, detail="Empresa não encontrada.")
+        return RespostaJSON(PayrollProjection.em_reais(resultado))
+
+@app.get("/empresas/{empresa_id}/indicadores")
+async def company_indicators(
+    empresa_id: int,
+    receita_mensal: float = 0,
+    custos_variaveis: float = 0,
+    outras_despesas_fixas: float = 0,
+    margem_contribuicao: Optional[float] = None,
+    db=Depends(get_db),
+):
+    # Custo da folha (encargos do regime tributário), EBITDA e break-even da empresa,
+    # a partir do resumo da folha mantido a cada alteração de funcionário
+    with limites.ocupar("painel"):
+        try:
+            indicadores = await executor.em_thread(
+                _com_commit, db, PainelEmpresa.indicadores, empresa_id, receita_mensal,
+                custos_variaveis, outras_despesas_fixas, margem_contribuicao,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if indicadores is None:
+            raise HTTPException(status_code=404, detail="Empresa não encontrada.")
+        return RespostaJSON.pronta(indicadores.to_json())
+
+class PayrollSweepInput(BaseModel):
+    salario_inicial: float = 1000
+    salario_final: float = 30000
+    passo: float = 10
+    dependentes: List[int] = [0]
+    rats: List[float] = [0.02]
+    sistemas_s: List[float] = [0.058]
+    anos: List[Optional[int]] = [None]
+
+@app.post("/payroll/sweep")
+async def payroll_sweep(data: PayrollSweepInput):
+    # Grade "e se" inteira em um único cálculo vetorizado, devolvida em colunas
+    pontos = (
+        max(data.salario_final - data.salario_inicial, 0) / max(data.passo, 0.01)
+        * len(data.dependentes) * len(data.rats) * len(data.sistemas_s) * len(data.anos)
+    )
+    with limites.ocupar("varredura"):
+        try:
+            corpo = await _calcular(
+                pontos >= LIMIAR_PONTOS_PROCESSO, tarefas.varredura_folha,
+                data.salario_inicial, data.salario_final, data.passo,
+                data.dependentes, data.rats, data.sistemas_s, data.anos,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RespostaJSON(corpo)
+
+@app.post("/calculate/amortization")
+async def calculate_amortization(
+    data: AmortizationInput,
+    pagina: int = Query(1, ge=1),
+    tamanho: int = Query(12, ge=1, le=1000),
+    formato: str = Query("json", pattern="^(json|ndjson|colunas)$"),
+):
+    # A tabela é gerada sob demanda a partir do primeiro mês da página;
+    # no formato NDJSON as linhas seguem em streaming até o fim do prazo,
+    # e no formato "colunas" a página vem como um array por coluna.
+    geradores = {"SAC": FinancialCalculator.iter_sac, "PRICE": FinancialCalculator.iter_price}
+    sistema = data.sistema.upper()
+    if sistema not in geradores:
+        raise HTTPException(status_code=400, detail=f"Sistema de amortização desconhecido: {data.sistema}")
+    if data.meses <= 0:
+        raise HTTPException(status_code=400, detail="Prazo não pode ser zero.")
+
+    inicio = (pagina - 1) * tamanho + 1
+    if formato == "ndjson":
+        # Gerador síncrono: o Starlette o percorre no threadpool, fora do event loop
+        linhas = geradores[sistema](data.valor, data.taxa_anual, data.meses, inicio=inicio, tipado=True)
+        return _stream_com_vaga(
+            "amortizacao", (linha.to_json() + "\n" for linha in linhas),
+            media_type="application/x-ndjson",
         )
-        # Salva no banco de dados automaticamente
-        db = SessionLocal()
-        simulacao = SimulacaoFinanceira(
-            tipo="PAYROLL_2026",
-            parametros_entrada=data.model_dump(),
-            resultados={k: str(v) for k, v in resultado.items()},
-            usuario_ref="DASHBOARD_USER"
+
+    with limites.ocupar("amortizacao"):
+        linhas_pagina = max(0, min(tamanho, data.meses - inicio + 1))
+        corpo = await _calcular(
+            linhas_pagina >= LIMIAR_LINHAS_PROCESSO, tarefas.pagina_amortizacao,
+            sistema, data.valor, data.taxa_anual, data.meses, inicio, tamanho, formato,
         )
-        db.add(simulacao)
-        db.commit()
-        db.refresh(simulacao)
-        db.close()
-        
-        return {**resultado, "id": simulacao.id}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return RespostaJSON(corpo)
 
 @app.post("/calculate/business")
-def get_business_indicators(data: PayrollInput):
-    # Calcula custo empresa e break-even básico baseado no salário
-    custo = PayrollManager.custo_total_empresa(data.salario_bruto)
-    # Exemplo: Break-even fixo para demonstração
-    be = BusinessAnalytics.ponto_equilibrio(25000, 40)
-    
-    return {
-        "custo_empresa": custo,
-        "break_even": be,
-        "margem": 40
-    }
+async def get_business_indicators(data: PayrollInput):
+    with limites.ocupar("negocios"):
+        # Calcula custo empresa e break-even básico baseado no salário
+        custo = CalculosEmCache.custo_empresa(data.salario_bruto)
+        # Exemplo: Break-even fixo para demonstração
+        be = BusinessAnalytics.ponto_equilibrio(25000, 40)
+        
+        return RespostaJSON.pronta(f'{{"custo_empresa":{custo.to_json()},"break_even":{be},"margem":40}}')
+
+# Colunas de um catálogo (um item por SKU); percentuais podem ser um valor único
+class PricingBulkInput(BaseModel):
+    custos_unitarios: List[Optional[float]]
+    impostos_venda_perc: Union[float, List[Optional[float]]] = 0
+    despesas_venda_perc: Union[float, List[Optional[float]]] = 0
+    margens_lucro_perc: Union[float, List[Optional[float]]] = 0
+
+@app.post("/business/pricing/bulk")
+async def bulk_pricing(data: PricingBulkInput):
+    # Linhas inválidas (null, margens >= 100%) voltam em `erros`, sem abortar o lote
+    with limites.ocupar("precificacao"):
+        try:
+            corpo = await _calcular(
+                len(data.custos_unitarios) >= LIMIAR_ITENS_PROCESSO, tarefas.precificacao_lote,
+                data.custos_unitarios, data.impostos_venda_perc,
+                data.despesas_venda_perc, data.margens_lucro_perc,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RespostaJSON(corpo)
+
+# Grade de DRE: uma linha por filial
+class PnLBulkInput(BaseModel):
+    receitas_liquidas: List[Optional[float]]
+    custos_variaveis: Union[float, List[Optional[float]]] = 0
+    despesas_fixas: Union[float, List[Optional[float]]] = 0
+    margens_contribuicao_perc: Union[float, List[Optional[float]]]
+
+@app.post("/business/pnl/bulk")
+async def bulk_pnl(data: PnLBulkInput):
+    with limites.ocupar("precificacao"):
+        try:
+            corpo = await _calcular(
+                len(data.receitas_liquidas) >= LIMIAR_ITENS_PROCESSO, tarefas.dre_lote,
+                data.receitas_liquidas, data.custos_variaveis,
+                data.despesas_fixas, data.margens_contribuicao_perc,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RespostaJSON(corpo)
+
+class IRRInput(BaseModel):
+    fluxos: Optional[List[float]] = None
+    projetos: Optional[List[List[float]]] = None
+    estimativa: float = 0.1
+    refinar: bool = False
+
+@app.post("/calculate/irr")
+async def calculate_irr(data: IRRInput):
+    # TIR de um fluxo (`fluxos`) ou de vários projetos em lote (`projetos`)
+    if (data.fluxos is None) == (data.projetos is None):
+        raise HTTPException(status_code=400, detail="Informe `fluxos` ou `projetos`.")
+    total = len(data.fluxos) if data.fluxos is not None else sum(len(p) for p in data.projetos)
+    with limites.ocupar("tir"):
+        try:
+            corpo = await _calcular(
+                total >= LIMIAR_FLUXOS_PROCESSO, tarefas.tir,
+                data.fluxos, data.projetos, data.estimativa, data.refinar,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RespostaJSON(corpo)
 
 @app.post("/calculate/investment_10years")
-def calculate_investment_10years(data: PayrollInput):
-    try:
-        # Primeiro calculamos o salário líquido real para 2026
-        folha = PayrollManager.calcular_folha_detalhada(
-            data.salario_bruto, 
-            dependentes=data.dependentes
-        )
-        salario_liquido = float(folha['salario_liquido'])
-        
-        # Premissas corrigidas: 20% do LÍQUIDO, taxa de 0.8% a.m.
-        aporte_mensal = salario_liquido * 0.20
-        taxa_mensal = 0.008 
-        
-        evolucao_anual = []
-        patrimonio_total = 0
-        total_investido_acumulado = 0
-        
-        for ano in range(1, 11):
-            for mes in range(12):
-                total_investido_acumulado += aporte_mensal
-                patrimonio_total = (patrimonio_total + aporte_mensal) * (1 + taxa_mensal)
-            
-            juros_gerados_acumulados = patrimonio_total - total_investido_acumulado
-            evolucao_anual.append({
-                "ano": ano,
-                "patrimonio_total": round(patrimonio_total, 2),
-                "total_investido": round(total_investido_acumulado, 2),
-                "juros_gerados": round(juros_gerados_acumulados, 2)
-            })
-            
-        return evolucao_anual
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def calculate_investment_10years(
+    data: PayrollInput,
+    percentual_aporte: float = Query(20, ge=0, le=100),
+    taxa_mensal: float = Query(0.8, ge=0),
+    anos: int = Query(10, ge=1, le=100),
+):
+    with limites.ocupar("investimento"):
+        try:
+            # Primeiro calculamos o salário líquido real para 2026
+            folha = CalculosEmCache.folha_detalhada(
+                data.salario_bruto, 
+                dependentes=data.dependentes
+            )
+            # Premissas padrão: 20% do LÍQUIDO, taxa de 0.8% a.m., aporte no início do mês
+            aporte_mensal = folha.salario_liquido * Decimal(str(percentual_aporte)) / 100
+            return projetar_anual(aporte_mensal, taxa_mensal, anos, antecipado=True)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+class SensitivityInput(BaseModel):
+    salario_bruto: float
+    dependentes: int = 0
+    percentuais_aporte: List[float] = [5, 10, 15, 20, 25, 30]
+    taxas_mensais: List[float] = [0.4, 0.6, 0.8, 1.0, 1.2]
+    horizontes_anos: List[int] = [5, 10, 15, 20, 30]
+
+@app.post("/calculate/investment_sensitivity")
+async def calculate_investment_sensitivity(data: SensitivityInput):
+    # Mapa de calor: patrimônio final para cada (% aportado, taxa, horizonte)
+    combinacoes = len(data.percentuais_aporte) * len(data.taxas_mensais) * len(data.horizontes_anos)
+    if combinacoes > 100_000:
+        raise HTTPException(status_code=400, detail="Grade grande demais (máximo de 100.000 combinações).")
+    with limites.ocupar("sensibilidade"):
+        try:
+            folha = CalculosEmCache.folha_detalhada(data.salario_bruto, dependentes=data.dependentes)
+            corpo = await _calcular(
+                combinacoes >= LIMIAR_COMBINACOES_PROCESSO, tarefas.sensibilidade,
+                folha.salario_liquido, data.percentuais_aporte, data.taxas_mensais, data.horizontes_anos,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RespostaJSON(corpo)
+
+class MonteCarloInput(BaseModel):
+    caminhos: int = 10_000
+    meses: int = 120
+    aporte_mensal: float = 0
+    principal: float = 0
+    valor_financiado: float = 0
+    prazo_financiamento: Optional[int] = None
+    spread_anual: float = 0
+    modelo: str = "lognormal"
+    taxa_media: float = 0.8
+    volatilidade: float = 0.3
+    inflacao_media: float = 0.4
+    inflacao_vol: float = 0.2
+    correlacao: float = 0.5
+    intervalo: int = 12
+    semente: Optional[int] = None
+
+MAX_CAMINHOS_MC = int(os.environ.get("JUBARTE_MC_MAX_CAMINHOS", 1_000_000))
+
+@app.post("/simulate/montecarlo")
+async def simulate_montecarlo(data: MonteCarloInput):
+    # Bandas de percentis de patrimônio e saldo devedor sob taxas/inflação aleatórias
+    if not 0 < data.caminhos <= MAX_CAMINHOS_MC or not 0 < data.meses <= 600:
+        raise HTTPException(status_code=400, detail=f"Use até {MAX_CAMINHOS_MC} caminhos e 600 meses.")
+    parametros = data.model_dump(exclude={"modelo"})
+    if data.modelo == "bootstrap":
+        # Histórico mensal IPCA/Selic fornecido pelo operador (CSV local)
+        caminho = os.environ.get("JUBARTE_HISTORICO_CSV")
+        if not caminho:
+            raise HTTPException(status_code=400, detail="Histórico não configurado (JUBARTE_HISTORICO_CSV).")
+        parametros["historico"] = carregar_historico(caminho)
+    elif data.modelo != "lognormal":
+        raise HTTPException(status_code=400, detail=f"Modelo desconhecido: {data.modelo}")
+    with limites.ocupar("montecarlo"):
+        try:
+            # O simulador já divide o trabalho no seu pool de processos; aqui só esperamos sem bloquear o loop
+            return RespostaJSON(await executor.em_thread(simulador_mc.simular, **parametros))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/simulations")
-def list_simulations():
-    db = SessionLocal()
-    sims = db.query(SimulacaoFinanceira).order_by(SimulacaoFinanceira.data_criacao.desc()).limit(10).all()
-    db.close()
-    return sims
+async def list_simulations(db=Depends(get_db)):
+    with limites.ocupar("historico"):
+        resultado = await executor.em_thread(listar_simulacoes, db, limite=10, resumo=False)
+        return RespostaJSON(resultado["itens"])
+
+@app.get("/simulations/history")
+async def simulation_history(
+    limite: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    tipo: Optional[str] = None,
+    usuario: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    resumo: bool = True,
+    db=Depends(get_db),
+):
+    # Paginação por keyset: envie `proximo_cursor` da resposta para a próxima página
+    with limites.ocupar("historico"):
+        try:
+            return RespostaJSON(await executor.em_thread(
+                listar_simulacoes, db, limite=limite, cursor=cursor, tipo=tipo, usuario_ref=usuario,
+                desde=desde, ate=ate, resumo=resumo
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+# Cargas e exportações em massa. O arquivo vem no corpo da requisição (CSV ou
+# Parquet, sem multipart) e é guardado num arquivo temporário, em memória até 8 MB.
+_TIPOS_EXPORTACAO = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def _exportacao(partes, formato: str, nome: str) -> StreamingResponse:
+    if formato == "parquet" and not carga.parquet_disponivel():
+        raise HTTPException(status_code=400, detail="Exportar Parquet requer o pacote pyarrow.")
+    return _stream_com_vaga(
+        "exportacao", partes, media_type=_TIPOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato}"'},
+    )
+
+@app.post("/import/employees")
+async def import_employees(
+    request: Request,
+    formato: str = Query("csv", pattern="^(csv|parquet)$"),
+    substituir: bool = True,
+    db=Depends(get_db),
+):
+    # Empresas por upsert no CNPJ e funcionários em lote; com `substituir` o arquivo
+    # é o quadro completo de cada empresa (reimportar não duplica)
+    with limites.ocupar("carga"):
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as arquivo:
+            async for parte in request.stream():
+                arquivo.write(parte)
+            arquivo.seek(0)
+            try:
+                return RespostaJSON(await executor.em_thread(
+                    carga.importar_funcionarios, db, arquivo, formato=formato, substituir=substituir
+                ))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/export/employees")
+async def export_employees(
+    empresa_id: Optional[int] = None,
+    formato: str = Query("csv", pattern="^(csv|parquet)$"),
+):
+    # Mesmo formato da importação, em blocos por keyset (sessão própria do gerador)
+    return _exportacao(carga.exportar_funcionarios(SessionLocal, empresa_id, formato), formato, "funcionarios")
+
+@app.get("/export/simulations")
+async def export_simulations(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    tipo: Optional[str] = None,
+    usuario: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+):
+    # Histórico completo, percorrido em páginas por keyset enquanto é enviado
+    partes = carga.exportar_simulacoes(SessionLocal, formato, tipo=tipo, usuario_ref=usuario, desde=desde, ate=ate)
+    return _exportacao(partes, formato, "simulacoes")
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.registro.exportar_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return cache_calculos.estatisticas()
+
+@app.get("/execution/stats")
+async def execution_stats():
+    return {
+        "processos": executor.processos,
+        "threads": executor.threads,
+        "limites": limites.estatisticas(),
+    }
+
+def _gerar_relatorio(**parametros):
+    # openpyxl só é importado no primeiro relatório (e fora do event loop)
+    from generate_report import generate_full_report
+    return generate_full_report(**parametros)
 
 @app.post("/reports/generate")
-def get_report(data: PayrollInput):
-    try:
-        filename = generate_full_report(salary=data.salario_bruto)
-        return FileResponse(
-            path=filename, 
-            filename="Relatorio_Jubarte_Final.xlsx",
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_report(data: PayrollInput, empresa_id: Optional[int] = None, db=Depends(get_db)):
+    with limites.ocupar("relatorios"):
+        try:
+            filename = await executor.em_thread(_gerar_relatorio, salary=data.salario_bruto, db=db, empresa_id=empresa_id)
+            return FileResponse(
+                path=filename, 
+                filename="Relatorio_Jubarte_Final.xlsx",
+                media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                # Cada requisição tem seu arquivo temporário, removido após o envio
+                background=BackgroundTask(os.remove, filename)
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/reports/jobs", status_code=202)
+async def submit_report_job(
+    data: PayrollInput,
+    empresa_id: Optional[int] = None,
+    loan_value: float = 120000,
+    months: int = Query(12, ge=1, le=600),
+    db=Depends(get_db),
+):
+    # Retorna imediatamente um job_id; relatórios idênticos (e sobre os mesmos dados) são gerados uma única vez
+    parametros = {"salary": data.salario_bruto, "loan_value": loan_value, "months": months}
+    versao = None
+    if empresa_id is not None:
+        parametros["empresa_id"] = empresa_id
+        versao = await executor.em_thread(_com_commit, db, versao_dados, empresa_id)
+        if versao is None:
+            raise HTTPException(status_code=404, detail="Empresa não encontrada.")
+    return relatorios.submeter(parametros, versao_dados=versao).to_dict()
+
+@app.get("/reports/jobs/{job_id}")
+async def report_job_status(job_id: str):
+    job = relatorios.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de relatório não encontrado.")
+    return job.to_dict()
+
+@app.get("/reports/jobs/{job_id}/download")
+async def download_report_job(job_id: str):
+    job = relatorios.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de relatório não encontrado.")
+    if job.status == ERRO:
+        raise HTTPException(status_code=500, detail=job.to_dict()["erro"])
+    if job.status != CONCLUIDO:
+        raise HTTPException(status_code=409, detail=f"Relatório ainda não está pronto ({job.status}).")
+    # O arquivo só pode expirar depois que o envio terminar
+    relatorios.iniciar_download(job)
+    return FileResponse(
+        path=job.caminho,
+        filename="Relatorio_Jubarte_Final.xlsx",
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        background=BackgroundTask(relatorios.concluir_download, job),
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,307 @@
+"""
+Benchmarks do motor financeiro, com comparação contra uma baseline em JSON.
+
+Uso (a partir da raiz do projeto, sem acesso à rede):
+    python benchmarks/run_benchmarks.py                      # roda e compara com a baseline
+    python benchmarks/run_benchmarks.py --filtro tir         # só os casos que contêm "tir"
+    python benchmarks/run_benchmarks.py --salvar-baseline    # regrava a baseline
+    python benchmarks/run_benchmarks.py --limite 0.5         # tolera até 50% de piora
+
+Cada caso é medido em várias rodadas e comparado pela menor mediana entre as
+rodadas (o ruído da máquina só deixa o tempo maior, nunca menor). Sai com
+código 1 se algum caso ficar mais lento que baseline * (1 + limite) e a
+diferença passar do piso de ruído. Casos de poucos microssegundos têm limite
+próprio (ver `caso`); vale o maior entre ele e o --limite.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PADRAO = os.path.join(RAIZ, "benchmarks", "baseline.json")
+LIMITE_PADRAO = float(os.environ.get("JUBARTE_BENCH_LIMITE", 0.25))
+REPETICOES_PADRAO = 7
+RODADAS_PADRAO = 3
+# Diferença absoluta por chamada abaixo da qual nenhuma piora conta como regressão
+PISO_RUIDO_S = 1e-6
+# Limite dos casos de microssegundos, em que o agendador e o cache da CPU pesam mais
+LIMITE_MICRO = 0.5
+
+# Cada caso recebe nada e devolve a função a ser cronometrada (o preparo fica fora da medição)
+CASOS: Dict[str, Callable[[], Callable[[], object]]] = {}
+LIMITES: Dict[str, float] = {}
+
+
+def caso(nome: str, limite: Optional[float] = None):
+    def registrar(preparo):
+        CASOS[nome] = preparo
+        if limite is not None:
+            LIMITES[nome] = limite
+        return preparo
+    return registrar
+
+
+# --- Folha -----------------------------------------------------------------
+
+@caso("inss_unitario", limite=LIMITE_MICRO)
+def _inss_unitario():
+    from finance_engine.modules.payroll import PayrollManager
+    from finance_engine.core.math_utils import to_decimal
+    salario = to_decimal(6500)
+    return lambda: PayrollManager.calcular_inss(salario)
+
+
+@caso("irrf_unitario", limite=LIMITE_MICRO)
+def _irrf_unitario():
+    from finance_engine.modules.payroll import PayrollManager
+    from finance_engine.core.math_utils import to_decimal
+    base = to_decimal(6100)
+    return lambda: PayrollManager.calcular_irrf(base)
+
+
+@caso("folha_detalhada_unitaria", limite=LIMITE_MICRO)
+def _folha_unitaria():
+    from finance_engine.modules.payroll import PayrollManager
+    return lambda: PayrollManager.calcular_folha_detalhada(6500, dependentes=1)
+
+
+@caso("folha_lote_10k")
+def _folha_lote():
+    import numpy as np
+    from finance_engine.modules.payroll_batch import BatchPayroll
+    salarios = np.round(np.random.default_rng(1).uniform(1000, 30000, 10_000), 2)
+    return lambda: BatchPayroll.calcular_folha_lote(salarios)
+
+
+# --- Amortização e TIR -----------------------------------------------------
+
+def _amortizacao(sistema: str, meses: int):
+    def preparo():
+        from finance_engine.modules.calculator import FinancialCalculator
+        tabela = FinancialCalculator.tabela_sac if sistema == "sac" else FinancialCalculator.tabela_price
+        return lambda: tabela(250000, 11.5, meses)
+    return preparo
+
+
+for _meses in (12, 120, 420):
+    caso(f"tabela_sac_{_meses}")(_amortizacao("sac", _meses))
+    caso(f"tabela_price_{_meses}")(_amortizacao("price", _meses))
+
+
+def _tir(quantidade: int):
+    def preparo():
+        from finance_engine.modules.calculator import FinancialCalculator
+        fluxos = [-100_000.0] + [100_000.0 / quantidade * 1.3] * (quantidade - 1)
+        return lambda: FinancialCalculator.tir(fluxos)
+    return preparo
+
+
+for _quantidade in (10, 100, 1000):
+    caso(f"tir_{_quantidade}_fluxos")(_tir(_quantidade))
+
+
+# --- Relatório e API -------------------------------------------------------
+
+@caso("relatorio_excel_120_meses")
+def _relatorio():
+    from generate_report import generate_full_report
+
+    def gerar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_full_report(salary=8000, loan_value=120000, months=120, output=io.BytesIO())
+    return gerar
+
+
+_cliente = None
+
+
+def _cliente_api():
+    # Um único TestClient (e banco SQLite temporário) para todos os casos de API
+    global _cliente
+    if _cliente is None:
+        from fastapi.testclient import TestClient
+        import api
+        _cliente = TestClient(api.app)
+        _cliente.__enter__()
+    return _cliente
+
+
+@caso("api_payroll")
+def _api_payroll():
+    cliente = _cliente_api()
+    corpo = {"salario_bruto": 7300, "dependentes": 1}
+    return lambda: cliente.post("/calculate/payroll", json=corpo).raise_for_status()
+
+
+@caso("api_amortization_pagina")
+def _api_amortizacao():
+    cliente = _cliente_api()
+    corpo = {"valor": 300000, "taxa_anual": 10.5, "meses": 360, "sistema": "SAC"}
+    return lambda: cliente.post("/calculate/amortization?pagina=3&tamanho=60", json=corpo).raise_for_status()
+
+
+@caso("api_simulations_history")
+def _api_historico():
+    cliente = _cliente_api()
+    for salario in range(2000, 2200):
+        cliente.post("/calculate/payroll", json={"salario_bruto": salario})
+    import api
+    api.escritor_simulacoes.aguardar()
+    return lambda: cliente.get("/simulations/history?limite=50").raise_for_status()
+
+
+# --- Medição e comparação ---------------------------------------------------
+
+def medir(funcao: Callable, repeticoes=REPETICOES_PADRAO, rodadas=RODADAS_PADRAO, duracao_minima=0.05) -> Dict:
+    """
+    Calibra o número de chamadas por amostra (como timeit.autorange) e mede
+    `rodadas` rodadas de `repeticoes` amostras. `referencia_s` é a menor
+    mediana entre as rodadas, o valor usado na comparação com a baseline.
+    """
+    funcao()  # aquecimento (imports, caches de tabelas)
+    chamadas = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        if time.perf_counter() - inicio >= duracao_minima:
+            break
+        chamadas *= 2
+
+    amostras, medianas = [], []
+    for _ in range(rodadas):
+        rodada = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            for _ in range(chamadas):
+                funcao()
+            rodada.append((time.perf_counter() - inicio) / chamadas)
+        medianas.append(statistics.median(rodada))
+        amostras.extend(rodada)
+    return {
+        "referencia_s": min(medianas),
+        "mediana_s": statistics.median(amostras),
+        "minimo_s": min(amostras),
+        "maximo_s": max(amostras),
+        "chamadas_por_amostra": chamadas,
+        "amostras": len(amostras),
+        "rodadas": rodadas,
+    }
+
+
+def _tempo(resultado: Dict) -> float:
+    # Baselines antigas só têm a mediana
+    return resultado["referencia_s"] if "referencia_s" in resultado else resultado["mediana_s"]
+
+
+def comparar(atual: Dict, baseline: Dict, limite=LIMITE_PADRAO, piso=PISO_RUIDO_S) -> List[Dict]:
+    """
+    Casos cujo tempo de referência piorou mais que o limite (fração) em relação
+    à baseline e mais que `piso` segundos por chamada. O limite de cada caso é
+    o maior entre `limite` e o registrado em `caso(..., limite=)`.
+    """
+    regressoes = []
+    for nome, resultado in atual.items():
+        referencia = baseline.get(nome)
+        if referencia is None:
+            continue
+        anterior, agora = _tempo(referencia), _tempo(resultado)
+        razao = agora / anterior
+        limite_caso = max(limite, LIMITES.get(nome, limite))
+        if razao > 1 + limite_caso and agora - anterior > piso:
+            regressoes.append({"caso": nome, "razao": round(razao, 3), "limite": limite_caso,
+                               "baseline_s": anterior, "atual_s": agora})
+    return regressoes
+
+
+def ambiente() -> Dict:
+    import numpy
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def executar(filtro=None, repeticoes=REPETICOES_PADRAO, rodadas=RODADAS_PADRAO) -> Dict:
+    resultados = {}
+    for nome, preparo in CASOS.items():
+        if filtro and filtro not in nome:
+            continue
+        resultados[nome] = medir(preparo(), repeticoes=repeticoes, rodadas=rodadas)
+        print(f"{nome:<32} {resultados[nome]['referencia_s'] * 1e3:>12.4f} ms")
+    return resultados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do Jubarte Finance")
+    parser.add_argument("--filtro", help="roda só os casos cujo nome contém este texto")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--limite", type=float, default=LIMITE_PADRAO,
+                        help="piora tolerada, em fração da baseline (padrão: 0.25)")
+    parser.add_argument("--piso", type=float, default=PISO_RUIDO_S,
+                        help="diferença mínima por chamada, em segundos, para contar como regressão")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO, help="amostras por rodada")
+    parser.add_argument("--rodadas", type=int, default=RODADAS_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true")
+    parser.add_argument("--saida", help="grava os resultados desta execução neste JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, RAIZ)
+    # Banco SQLite descartável para os casos de API (nunca o banco do usuário)
+    diretorio = tempfile.mkdtemp(prefix="jubarte_bench_")
+    os.environ["JUBARTE_DATABASE_URL"] = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+    os.environ.setdefault("JUBARTE_CACHE_TAMANHO", "0")  # mede o cálculo, não o cache
+
+    try:
+        resultados = executar(args.filtro, args.repeticoes, args.rodadas)
+    finally:
+        if _cliente is not None:
+            _cliente.__exit__(None, None, None)
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    documento = {"ambiente": ambiente(), "resultados": resultados}
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(documento, arquivo, indent=2)
+
+    if args.salvar_baseline:
+        if os.path.exists(args.baseline) and args.filtro:
+            # Com filtro, atualiza só os casos medidos
+            with open(args.baseline, encoding="utf-8") as arquivo:
+                anterior = json.load(arquivo)
+            documento["resultados"] = {**anterior["resultados"], **resultados}
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(documento, arquivo, indent=2, sort_keys=True)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar (use --salvar-baseline).")
+        return 0
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        baseline = json.load(arquivo)
+
+    regressoes = comparar(resultados, baseline["resultados"], args.limite, args.piso)
+    for r in regressoes:
+        print(f"REGRESSÃO {r['caso']}: {r['razao']}x a baseline, limite {r['limite']:.0%} "
+              f"({r['baseline_s'] * 1e3:.4f} ms -> {r['atual_s'] * 1e3:.4f} ms)")
+    if regressoes:
+        return 1
+    print(f"Nenhuma regressão acima de {args.limite:.0%} (ou do limite próprio do caso).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+from decimal import Decimal
+import numpy as np
+from finance_engine.core.math_utils import to_decimal
+
+# Aritmética vetorizada em inteiros escalados (ex.: centavos).
+# Todo valor monetário é representado como int64 = valor * 10^casas, o que
+# permite reproduzir exatamente o ROUND_HALF_UP do módulo decimal.
+
+# Abaixo deste módulo, dois decimais distintos com até 4 casas nunca
+# colapsam no mesmo float, então a conversão vetorizada é exata.
+_LIMITE_FLOAT_EXATO = 1e9
+
+
+def para_inteiros_escalados(valores, casas=2) -> np.ndarray:
+    """
+    Converte uma sequência de valores para int64 escalado por 10^casas.
+    Floats são interpretados como `Decimal(str(valor))`, igual a `to_decimal`;
+    valores com mais casas que `casas` são arredondados em ROUND_HALF_UP.
+    """
+    escala = 10 ** casas
+    arr = np.asarray(valores)
+
+    if arr.dtype.kind in "iu":
+        return arr.astype(np.int64) * escala
+
+    if arr.dtype.kind == "f":
+        k = np.rint(arr * escala)
+        exatos = (np.abs(arr) < _LIMITE_FLOAT_EXATO) & (k / escala == arr)
+        if exatos.all():
+            return k.astype(np.int64)
+        # Caminho lento apenas para os elementos não representáveis
+        resultado = np.where(exatos, k, 0).astype(np.int64)
+        for idx in np.flatnonzero(~exatos):
+            resultado[idx] = _escalar_decimal(arr[idx], casas)
+        return resultado
+
+    return np.fromiter(
+        (_escalar_decimal(v, casas) for v in arr.ravel()),
+        dtype=np.int64, count=arr.size
+    ).reshape(arr.shape)
+
+
+def _escalar_decimal(valor, casas) -> int:
+    d = to_decimal(valor, Decimal(1).scaleb(-casas))
+    return int(d.scaleb(casas))
+
+
+def dividir_half_up(numerador: np.ndarray, denominador) -> np.ndarray:
+    """
+    Divisão inteira com arredondamento ROUND_HALF_UP (empate se afasta do zero),
+    equivalente a `to_decimal(n / d, ...)` para o quociente exato.
+    """
+    numerador = np.asarray(numerador, dtype=np.int64)
+    denominador = np.asarray(denominador, dtype=np.int64)
+    sinal = np.where((numerador < 0) != (denominador < 0), -1, 1)
+    n = np.abs(numerador)
+    d = np.abs(denominador)
+    return sinal * ((2 * n + d) // (2 * d))
+
+
+def arredondar_centavos(valores: np.ndarray) -> np.ndarray:
+    """ROUND_HALF_UP de valores em reais (float) para centavos inteiros."""
+    centavos = np.floor(np.abs(valores) * 100 + 0.5)
+    return (np.sign(valores) * centavos).astype(np.int64)
+
+
+def centavos_para_decimal(centavos) -> Decimal:
+    """Converte um inteiro em centavos para Decimal com duas casas."""
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+def coluna_para_decimais(centavos: np.ndarray) -> list:
+    """Converte uma coluna de centavos em lista de Decimal (para a API/ORM)."""
+    return [Decimal(c).scaleb(-2) for c in centavos.tolist()]
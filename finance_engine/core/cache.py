@@ -0,0 +1,141 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Hashable
+from finance_engine.core.math_utils import to_decimal
+from finance_engine.core import tax_tables
+
+# Cache de resultados para cálculos determinísticos (funções puras das entradas
+# e da versão das tabelas INSS/IRRF). LRU limitado em tamanho, com TTL.
+
+_AUSENTE = object()
+
+
+def normalizar(valor) -> Hashable:
+    """
+    Converte entradas em chaves estáveis: 5000, 5000.0 e '5000.00' viram a
+    mesma chave Decimal; listas, tuplas e dicionários são normalizados
+    recursivamente.
+    """
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, (int, float, Decimal)):
+        return to_decimal(valor).normalize()
+    if isinstance(valor, str):
+        try:
+            return to_decimal(valor).normalize()
+        except InvalidOperation:
+            return valor
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, normalizar(v)) for k, v in valor.items()))
+    return valor
+
+
+def _copiar(valor):
+    # Os resultados guardados são compartilhados; quem chama recebe uma cópia rasa
+    if isinstance(valor, dict):
+        return dict(valor)
+    if isinstance(valor, list):
+        return [_copiar(v) for v in valor]
+    return valor
+
+
+class CacheResultados:
+    """Cache LRU + TTL seguro para threads, com métricas de acerto/falha."""
+
+    def __init__(self, capacidade=4096, ttl=300.0):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.descartes = 0
+
+    def obter(self, chave, padrao=None):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                self.falhas += 1
+                return padrao
+            expira_em, valor = item
+            if expira_em < agora:
+                del self._itens[chave]
+                self.expirados += 1
+                self.falhas += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.descartes += 1
+
+    def obter_ou_calcular(self, chave, funcao: Callable):
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = funcao()
+            self.guardar(chave, valor)
+        return _copiar(valor)
+
+    def invalidar(self, namespace=None):
+        """Remove todas as entradas, ou apenas as de um namespace."""
+        with self._lock:
+            if namespace is None:
+                self._itens.clear()
+                return
+            for chave in [c for c in self._itens if c[0] == namespace]:
+                del self._itens[chave]
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "tamanho": len(self._itens),
+                "capacidade": self.capacidade,
+                "ttl_segundos": self.ttl,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "expirados": self.expirados,
+                "descartes": self.descartes,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            }
+
+
+cache_calculos = CacheResultados(
+    capacidade=int(os.environ.get("JUBARTE_CACHE_TAMANHO", 4096)),
+    ttl=float(os.environ.get("JUBARTE_CACHE_TTL", 300)),
+)
+
+# Alteração de tabelas invalida tudo (a versão na chave já impede leituras antigas)
+tax_tables.ao_alterar_tabelas(lambda: cache_calculos.invalidar())
+
+
+def memoizar(namespace: str, cache: CacheResultados = None):
+    """Decorator: guarda o resultado pela versão das tabelas + entradas normalizadas."""
+    def decorator(funcao):
+        assinatura = inspect.signature(funcao)
+
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            # Argumentos posicionais, nomeados e padrões geram a mesma chave
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            alvo = cache if cache is not None else cache_calculos
+            chave = (namespace, tax_tables.versao_tabelas(), normalizar(tuple(argumentos.arguments.values())))
+            return alvo.obter_ou_calcular(chave, lambda: funcao(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,53 @@
+from decimal import Context, Decimal, ROUND_HALF_UP
+from typing import Dict
+
+# Conversão rápida para Decimal, com a mesma semântica de `to_decimal`:
+#   - Decimal é devolvido como está (imutável; `Decimal(str(d))` é idêntico);
+#   - int vira Decimal diretamente, sem passar por texto;
+#   - float usa o repr (menor decimal que volta ao mesmo float), que é
+#     exatamente o `str(float)` usado antes;
+#   - bool e demais tipos continuam em `Decimal(str(valor))` (bool levanta
+#     InvalidOperation, como sempre levantou).
+# Os expoentes de quantize em texto ('0.01', '0.0001'...) são criados uma
+# única vez e o arredondamento usa um contexto local, sem `getcontext()`.
+
+# Mesma configuração do contexto global definido em math_utils (28 dígitos)
+CONTEXTO = Context(prec=28)
+
+ZERO = Decimal('0')
+CENTAVO = Decimal('0.01')
+
+_EXPOENTES: Dict[str, Decimal] = {'0.01': CENTAVO}
+
+
+def expoente(padrao) -> Decimal:
+    """Decimal do padrão de quantize; padrões em texto ficam em cache."""
+    if type(padrao) is str:
+        valor = _EXPOENTES.get(padrao)
+        if valor is None:
+            valor = _EXPOENTES[padrao] = Decimal(padrao)
+        return valor
+    # Decimal('1.0') == Decimal('1'), então padrões não textuais não entram no cache
+    return padrao if type(padrao) is Decimal else Decimal(padrao)
+
+
+def para_decimal(valor) -> Decimal:
+    """Converte para Decimal sem ida e volta por texto quando não é necessária."""
+    tipo = type(valor)
+    if tipo is Decimal:
+        return valor
+    if tipo is int:
+        return Decimal(valor)
+    if tipo is float:
+        return Decimal(repr(valor))
+    if tipo is str:
+        return Decimal(valor)
+    if valor is None:
+        return ZERO
+    return Decimal(str(valor))
+
+
+def quantizar(valor: Decimal, padrao=CENTAVO) -> Decimal:
+    """Arredonda um Decimal para o padrão (ROUND_HALF_UP), no contexto local."""
+    # Argumentos posicionais: no _decimal (C) os nomeados custam mais que o próprio quantize
+    return valor.quantize(expoente(padrao), ROUND_HALF_UP, CONTEXTO)
@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from finance_engine.core import metrics
+
+# Modelo de execução da API: os handlers são assíncronos e nunca fazem
+# trabalho pesado no event loop. Cálculos de CPU longos (TIR de muitos fluxos,
+# cronogramas longos, varreduras) vão para um pool de processos, fora do GIL;
+# I/O bloqueante (banco, arquivos) vai para um pool de threads próprio. Cada
+# endpoint tem um limite de requisições simultâneas: acima dele a resposta é
+# 429 imediatamente, em vez de uma fila sem limite.
+
+
+class LimiteExcedido(Exception):
+    """Endpoint com todas as vagas de execução ocupadas."""
+
+    def __init__(self, nome: str, maximo: int):
+        super().__init__(f"Limite de {maximo} requisições simultâneas atingido em '{nome}'.")
+        self.nome = nome
+        self.maximo = maximo
+
+
+class ExecutorCalculos:
+    """Pools de processos (CPU) e de threads (I/O) criados sob demanda."""
+
+    def __init__(self, processos=None, threads=None):
+        self.processos = processos or int(os.environ.get("JUBARTE_CPU_WORKERS", os.cpu_count() or 2))
+        self.threads = threads or int(os.environ.get("JUBARTE_IO_WORKERS", 16))
+        self._pool_processos: Optional[ProcessPoolExecutor] = None
+        self._pool_threads: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _processos(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool_processos is None:
+                # spawn: o processo da API tem threads (gravação em lote), então evitamos fork
+                self._pool_processos = ProcessPoolExecutor(
+                    max_workers=self.processos, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool_processos
+
+    def _threads(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool_threads is None:
+                self._pool_threads = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="jubarte-io")
+            return self._pool_threads
+
+    async def em_processo(self, funcao, *args, **kwargs):
+        """
+        Executa `funcao` (de módulo, serializável por referência) no pool de
+        processos. Se um worker morreu, recria o pool uma vez.
+        """
+        loop = asyncio.get_running_loop()
+        chamada = functools.partial(funcao, *args, **kwargs)
+        try:
+            return await loop.run_in_executor(self._processos(), chamada)
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool_processos = None
+            return await loop.run_in_executor(self._processos(), chamada)
+
+    async def em_thread(self, funcao, *args, **kwargs):
+        """Executa `funcao` (I/O bloqueante) no pool de threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._threads(), functools.partial(funcao, *args, **kwargs))
+
+    def aquecer(self):
+        """Sobe os workers de processo antecipadamente (o spawn leva centenas de ms)."""
+        pool = self._processos()
+        for future in [pool.submit(os.getpid) for _ in range(self.processos)]:
+            future.result()
+
+    def encerrar(self, aguardar=True):
+        with self._lock:
+            for pool in (self._pool_processos, self._pool_threads):
+                if pool is not None:
+                    pool.shutdown(wait=aguardar, cancel_futures=not aguardar)
+            self._pool_processos = self._pool_threads = None
+
+
+class LimitesConcorrencia:
+    """
+    Vagas de execução por endpoint. `ocupar` não espera: sem vaga, levanta
+    `LimiteExcedido` (a API responde 429). O máximo de cada nome pode ser
+    ajustado por variável de ambiente (JUBARTE_LIMITE_<NOME>).
+    """
+
+    def __init__(self, padroes: Dict[str, int], prefixo_ambiente="JUBARTE_LIMITE_"):
+        self.maximos = {
+            nome: int(os.environ.get(prefixo_ambiente + nome.upper(), maximo))
+            for nome, maximo in padroes.items()
+        }
+        self._em_uso = dict.fromkeys(self.maximos, 0)
+        self._rejeitadas = dict.fromkeys(self.maximos, 0)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def ocupar(self, nome: str):
+        with self._lock:
+            maximo = self.maximos[nome]
+            if self._em_uso[nome] >= maximo:
+                self._rejeitadas[nome] += 1
+                rejeitada = True
+            else:
+                self._em_uso[nome] += 1
+                rejeitada = False
+        if rejeitada:
+            if metrics.registro.habilitado:
+                metrics.registro.incrementar("jubarte_requisicoes_rejeitadas_total", endpoint=nome)
+            raise LimiteExcedido(nome, maximo)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._em_uso[nome] -= 1
+
+    def estatisticas(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                nome: {"maximo": maximo, "em_uso": self._em_uso[nome], "rejeitadas": self._rejeitadas[nome]}
+                for nome, maximo in self.maximos.items()
+            }
+
+
+metrics.registro.descrever(
+    "jubarte_requisicoes_rejeitadas_total", "Requisições recusadas (429) por limite de concorrência."
+)
@@ -1,4 +1,5 @@
 from decimal import Decimal, getcontext, ROUND_HALF_UP
+from finance_engine.core.conversao import CONTEXTO, expoente, para_decimal
 
 # Configuração de precisão financeira (Mínimo 4 casas decimais para intermediários)
 # Utilizamos ROUND_HALF_UP por ser o padrão contábil comum no Brasil
@@ -9,9 +10,9 @@ def to_decimal(value, quantize=None) -> Decimal:
     if value is None:
         return Decimal('0')
     
-    d = Decimal(str(value))
+    d = para_decimal(value)
     if quantize:
-        return d.quantize(Decimal(quantize), rounding=ROUND_HALF_UP)
+        return d.quantize(expoente(quantize), ROUND_HALF_UP, CONTEXTO)
     return d
 
 def validate_positive(value, name="Campo"):
@@ -0,0 +1,259 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Instrumentação opcional. Desligada, não custa nada: os métodos das classes
+# de cálculo só são substituídos por versões cronometradas em `habilitar()`,
+# e os eventos do SQLAlchemy só são registrados nesse momento. O middleware
+# HTTP faz uma única verificação de flag por requisição.
+
+# Limites dos buckets (segundos), do microssegundo ao segundo
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus."""
+
+    __slots__ = ("contagens", "soma", "total", "_lock")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BUCKETS) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, segundos: float):
+        indice = bisect_left(BUCKETS, segundos)
+        with self._lock:
+            self.contagens[indice] += 1
+            self.soma += segundos
+            self.total += 1
+
+
+class RegistroMetricas:
+    """Histogramas de latência e contadores, indexados por nome e rótulos."""
+
+    def __init__(self):
+        self.habilitado = False
+        self._histogramas: Dict[Tuple[str, Tuple], Histograma] = {}
+        self._contadores: Dict[Tuple[str, Tuple], int] = {}
+        self._ajuda: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def descrever(self, nome: str, ajuda: str):
+        self._ajuda[nome] = ajuda
+
+    def observar(self, nome: str, segundos: float, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        histograma = self._histogramas.get(chave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(chave, Histograma())
+        histograma.observar(segundos)
+
+    def incrementar(self, nome: str, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def histograma(self, nome: str, **rotulos) -> Histograma:
+        return self._histogramas.get((nome, tuple(sorted(rotulos.items()))))
+
+    def exportar_prometheus(self) -> str:
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            histogramas = sorted(self._histogramas.items())
+            contadores = sorted(self._contadores.items())
+
+        linhas: List[str] = []
+        anterior = None
+        for (nome, rotulos), histograma in histogramas:
+            if nome != anterior:
+                linhas += self._cabecalho(nome, "histogram")
+                anterior = nome
+            with histograma._lock:
+                contagens = list(histograma.contagens)
+                soma, total = histograma.soma, histograma.total
+            acumulado = 0
+            for limite, contagem in zip(BUCKETS + (float("inf"),), contagens):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', le),))} {acumulado}")
+            linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma!r}")
+            linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+
+        anterior = None
+        for (nome, rotulos), valor in contadores:
+            if nome != anterior:
+                linhas += self._cabecalho(nome, "counter")
+                anterior = nome
+            linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def _cabecalho(self, nome, tipo) -> List[str]:
+        cabecalho = [f"# TYPE {nome} {tipo}"]
+        if nome in self._ajuda:
+            cabecalho.insert(0, f"# HELP {nome} {self._ajuda[nome]}")
+        return cabecalho
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos: Tuple) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + "}"
+
+
+registro = RegistroMetricas()
+registro.descrever("jubarte_funcao_segundos", "Latência das funções de cálculo instrumentadas.")
+registro.descrever("jubarte_funcao_erros_total", "Exceções levantadas pelas funções instrumentadas.")
+registro.descrever("jubarte_db_consulta_segundos", "Latência das instruções SQL por operação.")
+registro.descrever("jubarte_http_requisicao_segundos", "Latência das requisições HTTP por rota.")
+
+
+@contextmanager
+def medir(nome: str, **rotulos):
+    """Cronometra um bloco de código (só registra com as métricas habilitadas)."""
+    if not registro.habilitado:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+
+def _cronometrar(funcao, rotulo: str):
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        except Exception:
+            registro.incrementar("jubarte_funcao_erros_total", funcao=rotulo)
+            raise
+        finally:
+            registro.observar("jubarte_funcao_segundos", time.perf_counter() - inicio, funcao=rotulo)
+    return wrapper
+
+
+# (classe, nome do atributo) -> descritor original
+_originais: Dict[Tuple[type, str], object] = {}
+_engines: List = []
+
+
+def instrumentar_classe(cls: type):
+    """Substitui os métodos públicos estáticos/de classe por versões cronometradas."""
+    for nome, atributo in list(vars(cls).items()):
+        if nome.startswith("_") or (cls, nome) in _originais:
+            continue
+        if isinstance(atributo, (staticmethod, classmethod)):
+            envolvido = _cronometrar(atributo.__func__, f"{cls.__name__}.{nome}")
+            _originais[(cls, nome)] = atributo
+            setattr(cls, nome, type(atributo)(envolvido))
+
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info["jubarte_inicio"] = time.perf_counter()
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.pop("jubarte_inicio", None)
+    if inicio is not None:
+        partes = statement.split(None, 1)
+        operacao = partes[0].upper() if partes else "?"
+        registro.observar("jubarte_db_consulta_segundos", time.perf_counter() - inicio, operacao=operacao)
+
+
+def instrumentar_engine(engine):
+    """Cronometra cada instrução SQL executada pelo engine."""
+    from sqlalchemy import event
+
+    if engine in _engines:
+        return
+    event.listen(engine, "before_cursor_execute", _antes_da_consulta)
+    event.listen(engine, "after_cursor_execute", _depois_da_consulta)
+    _engines.append(engine)
+
+
+def habilitar(classes=None, engines=()):
+    """
+    Liga a coleta. Por padrão instrumenta PayrollManager, FinancialCalculator,
+    BusinessAnalytics e BatchPayroll.
+    """
+    if classes is None:
+        from finance_engine.modules.business import BusinessAnalytics
+        from finance_engine.modules.calculator import FinancialCalculator
+        from finance_engine.modules.payroll import PayrollManager
+        from finance_engine.modules.payroll_batch import BatchPayroll
+        classes = (PayrollManager, FinancialCalculator, BusinessAnalytics, BatchPayroll)
+    for cls in classes:
+        instrumentar_classe(cls)
+    for engine in engines:
+        instrumentar_engine(engine)
+    registro.habilitado = True
+
+
+def desabilitar():
+    """Restaura os métodos originais e remove os eventos do banco."""
+    from sqlalchemy import event
+
+    registro.habilitado = False
+    for (cls, nome), original in list(_originais.items()):
+        setattr(cls, nome, original)
+        del _originais[(cls, nome)]
+    while _engines:
+        engine = _engines.pop()
+        event.remove(engine, "before_cursor_execute", _antes_da_consulta)
+        event.remove(engine, "after_cursor_execute", _depois_da_consulta)
+
+
+def habilitado_pelo_ambiente() -> bool:
+    return os.environ.get("JUBARTE_METRICAS", "").lower() in ("1", "true", "sim", "on")
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latência por método, rota (modelo do caminho) e status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registro.habilitado:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = [500]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = scope.get("route")
+            registro.observar(
+                "jubarte_http_requisicao_segundos",
+                time.perf_counter() - inicio,
+                metodo=scope["method"],
+                # O modelo da rota (ex.: /reports/jobs/{job_id}) evita um rótulo por id
+                rota=getattr(rota, "path", "desconhecida"),
+                status=status[0],
+            )
@@ -0,0 +1,216 @@
+import datetime
+import json
+import zlib
+from decimal import Decimal
+from functools import partial
+from typing import Optional
+
+import numpy as np
+from starlette.responses import Response
+
+from finance_engine.core.resultados import Resultado
+
+# Caminho rápido de respostas JSON da API. O FastAPI passa tudo o que o
+# endpoint devolve pelo `jsonable_encoder` (lento para milhares de Decimals);
+# endpoints que devolvem `RespostaJSON` pulam essa etapa e o conteúdo é
+# codificado de uma vez pelo orjson (opcional) ou pelo json da biblioteca padrão.
+# A compressão gzip/brotli fica no `MiddlewareCompressao`.
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+_OPCOES_ORJSON = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None else 0
+)
+
+
+def _padrao(valor):
+    """Tipos que nenhum dos backends conhece, com a mesma saída do jsonable_encoder."""
+    if type(valor) is Decimal:
+        # Como o decimal_encoder do FastAPI: inteiro sem casas, senão float
+        return int(valor) if valor.as_tuple().exponent >= 0 else float(valor)
+    if isinstance(valor, Resultado):
+        return valor.to_dict()
+    if isinstance(valor, np.ndarray):
+        if valor.dtype.kind == "f" and not np.isfinite(valor).all():
+            # NaN/infinito viram null, como no orjson
+            return np.where(np.isfinite(valor), valor, None).tolist()
+        return valor.tolist()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (datetime.datetime, datetime.date, datetime.time)):
+        return valor.isoformat()
+    if hasattr(valor, "model_dump"):
+        return valor.model_dump(mode="json")
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+def codificar(conteudo, backend: Optional[str] = None) -> bytes:
+    """
+    Codifica `conteudo` em JSON (bytes UTF-8, sem espaços). `backend` força
+    "orjson" ou "json"; por padrão usa o orjson quando instalado.
+    """
+    if backend is None:
+        backend = "orjson" if orjson is not None else "json"
+    if backend == "orjson":
+        return orjson.dumps(conteudo, default=_padrao, option=_OPCOES_ORJSON)
+    return json.dumps(
+        conteudo, default=_padrao, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RespostaJSON(Response):
+    """Resposta JSON codificada por `codificar`; `bytes` são tratados como JSON pronto."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return codificar(content)
+
+    @classmethod
+    def pronta(cls, corpo: str, **kwargs) -> "RespostaJSON":
+        """Resposta a partir de JSON já serializado (ex.: `Resultado.to_json`)."""
+        return cls(corpo.encode("utf-8"), **kwargs)
+
+
+# --- Compressão -------------------------------------------------------------
+
+# Só vale a pena comprimir texto; planilhas e arquivos zip já vêm comprimidos
+_TIPOS_COMPRIMIVEIS = ("application/json", "application/x-ndjson", "text/")
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """
+    Negocia a codificação pelo cabeçalho Accept-Encoding (com pesos q):
+    brotli (se instalado) ou gzip; None quando o cliente não aceita nenhuma.
+    """
+    pesos = {}
+    for item in accept_encoding.lower().split(","):
+        nome, _, parametros = item.strip().partition(";")
+        peso = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                peso = float(parametros.strip()[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nome.strip()] = peso
+    coringa = pesos.get("*", 0.0)
+    candidatas = (["br"] if brotli is not None else []) + ["gzip"]
+    melhor, melhor_peso = None, 0.0
+    for nome in candidatas:
+        peso = pesos.get(nome, coringa)
+        if peso > melhor_peso:
+            melhor, melhor_peso = nome, peso
+    return melhor
+
+
+class _Compressor:
+    """Interface única para gzip (zlib) e brotli, em modo incremental."""
+
+    def __init__(self, codificacao: str, nivel_gzip: int, nivel_brotli: int):
+        if codificacao == "br":
+            self._objeto = brotli.Compressor(quality=nivel_brotli)
+            self._processar, self._finalizar = self._objeto.process, self._objeto.finish
+            self._descarregar = self._objeto.flush
+        else:
+            self._objeto = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 31)  # 31: cabeçalho gzip
+            self._processar, self._finalizar = self._objeto.compress, self._objeto.flush
+            self._descarregar = partial(self._objeto.flush, zlib.Z_SYNC_FLUSH)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        return self._processar(dados)
+
+    def comprimir_bloco(self, dados: bytes) -> bytes:
+        """Comprime e descarrega: o cliente consegue descomprimir o bloco assim que o recebe."""
+        return self._processar(dados) + self._descarregar()
+
+    def finalizar(self) -> bytes:
+        return self._finalizar()
+
+
+class MiddlewareCompressao:
+    """
+    Middleware ASGI: comprime respostas de texto a partir de `minimo` bytes,
+    com brotli ou gzip conforme o Accept-Encoding. Respostas em streaming
+    (NDJSON) são comprimidas bloco a bloco, com flush a cada bloco para que
+    o cliente receba as linhas sem esperar o fim do stream.
+    """
+
+    def __init__(self, app, minimo=1024, nivel_gzip=6, nivel_brotli=4):
+        self.app = app
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cabecalhos = dict(scope.get("headers") or ())
+        codificacao = escolher_codificacao(cabecalhos.get(b"accept-encoding", b"").decode("latin-1"))
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compressor = None
+        repassar = False
+
+        async def enviar(mensagem):
+            nonlocal inicio, compressor, repassar
+            if mensagem["type"] == "http.response.start":
+                # Segura o início até saber o tamanho/forma do corpo
+                inicio = mensagem
+                return
+            if mensagem["type"] != "http.response.body" or repassar:
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            continua = mensagem.get("more_body", False)
+            if compressor is not None:
+                if continua:
+                    comprimido = compressor.comprimir_bloco(corpo)
+                else:
+                    comprimido = compressor.comprimir(corpo) + compressor.finalizar()
+                await send({"type": "http.response.body", "body": comprimido, "more_body": continua})
+                return
+
+            if not self._comprimivel(inicio, corpo, continua):
+                repassar = True
+                await send(inicio)
+                await send(mensagem)
+                return
+
+            compressor = _Compressor(codificacao, self.nivel_gzip, self.nivel_brotli)
+            cabecalhos = [(k, v) for k, v in inicio.get("headers") or () if k != b"content-length"]
+            cabecalhos += [(b"content-encoding", codificacao.encode()), (b"vary", b"Accept-Encoding")]
+            if continua:
+                comprimido = compressor.comprimir_bloco(corpo)
+            else:
+                comprimido = compressor.comprimir(corpo) + compressor.finalizar()
+                cabecalhos.append((b"content-length", str(len(comprimido)).encode()))
+            await send({**inicio, "headers": cabecalhos})
+            await send({"type": "http.response.body", "body": comprimido, "more_body": continua})
+
+        await self.app(scope, receive, enviar)
+
+    def _comprimivel(self, inicio, corpo: bytes, continua: bool) -> bool:
+        cabecalhos = dict(inicio.get("headers") or ())
+        if b"content-encoding" in cabecalhos:
+            return False
+        tipo = cabecalhos.get(b"content-type", b"").decode("latin-1")
+        if not tipo.startswith(_TIPOS_COMPRIMIVEIS):
+            return False
+        # Corpo único pequeno não compensa; streaming sempre é comprimido
+        return continua or len(corpo) >= self.minimo
@@ -0,0 +1,75 @@
+import json
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from operator import attrgetter
+from typing import Dict, Iterable
+
+# Tipos de resultado imutáveis e compactos (dataclass congelada com __slots__),
+# no lugar de um dicionário novo por linha/cálculo. Os adaptadores `to_dict` e
+# `to_json` mantêm o formato antigo: `to_dict` só monta o dicionário com os
+# mesmos objetos (sem converter valores) e `to_json` escreve os números direto
+# do texto do Decimal, sem passar por float nem pelo jsonable_encoder.
+
+
+def texto_json(valor) -> str:
+    """Literal JSON de um valor de resultado (Decimal e int saem como número exato)."""
+    tipo = type(valor)
+    if tipo is Decimal:
+        return str(valor) if valor.is_finite() else "null"
+    if tipo is int:
+        return str(valor)
+    return json.dumps(valor, default=str)
+
+
+def texto_centavos(centavos: int) -> str:
+    """Centavos inteiros como texto em reais ('1234.05'), igual a str(Decimal) com 2 casas."""
+    if centavos < 0:
+        return "-" + texto_centavos(-centavos)
+    return "%d.%02d" % divmod(centavos, 100)
+
+
+def anexar_json(corpo: str, extras: Dict) -> str:
+    """Acrescenta os pares de `extras` ao final de um objeto JSON já serializado."""
+    if not extras:
+        return corpo
+    anexos = ",".join(f"{json.dumps(chave)}:{texto_json(valor)}" for chave, valor in extras.items())
+    return f"{corpo[:-1]},{anexos}}}"
+
+
+class Resultado:
+    """Base dos tipos de resultado: adaptadores para dicionário e JSON."""
+
+    __slots__ = ()
+
+    # Preenchidos por `tipo_resultado` a partir dos campos da dataclass
+    _campos = ()
+    _valores = None
+    _modelo_json = "{}"
+
+    def to_dict(self, texto=False) -> Dict:
+        """Dicionário no formato antigo; `texto=True` converte os valores com str()."""
+        valores = self._valores(self)
+        if texto:
+            return dict(zip(self._campos, map(str, valores)))
+        return dict(zip(self._campos, valores))
+
+    def to_json(self, **extras) -> str:
+        """Objeto JSON com os campos (e `extras` anexados ao final)."""
+        return anexar_json(self._modelo_json % tuple(map(texto_json, self._valores(self))), extras)
+
+
+def tipo_resultado(cls):
+    """Decorator: dataclass congelada com __slots__ e adaptadores pré-compilados."""
+    cls = dataclass(frozen=True, slots=True)(cls)
+    campos = tuple(campo.name for campo in fields(cls))
+    cls._campos = campos
+    valores = attrgetter(*campos)
+    # Com um único campo o attrgetter devolve o valor puro, não uma tupla
+    cls._valores = staticmethod(valores if len(campos) > 1 else lambda objeto: (valores(objeto),))
+    cls._modelo_json = "{" + ",".join(f"{json.dumps(campo)}:%s" for campo in campos) + "}"
+    return cls
+
+
+def lista_json(resultados: Iterable[Resultado]) -> str:
+    """Array JSON de resultados, sem estruturas intermediárias."""
+    return "[" + ",".join(resultado.to_json() for resultado in resultados) + "]"
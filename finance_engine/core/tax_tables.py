@@ -0,0 +1,179 @@
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Callable, Dict, List, Sequence, Tuple
+from finance_engine.core.conversao import quantizar
+from finance_engine.core.math_utils import to_decimal
+
+# Tabelas progressivas compiladas: os limites, alíquotas e o imposto acumulado
+# de cada faixa são convertidos para Decimal uma única vez, e cada cálculo é
+# uma busca binária (O(log n)) seguida de uma única multiplicação.
+
+_ZERO = Decimal('0')
+_ZERO_CENTAVOS = Decimal('0.00')
+
+
+class _Imutavel:
+    __slots__ = ()
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f"{type(self).__name__} é imutável.")
+
+    def _definir(self, nome, valor):
+        object.__setattr__(self, nome, valor)
+
+
+class TabelaINSS(_Imutavel):
+    """Tabela progressiva do INSS (contribuição por faixas, com teto)."""
+
+    __slots__ = ("ano", "faixas", "teto", "_inicios", "_fins", "_aliquotas", "_acumulado")
+
+    def __init__(self, ano: int, faixas: Sequence[Tuple]):
+        """`faixas`: sequência de (início, fim, alíquota) em ordem crescente."""
+        faixas = tuple((to_decimal(i), to_decimal(f), to_decimal(a)) for i, f, a in faixas)
+        acumulado = []
+        total = _ZERO
+        for inicio, fim, aliquota in faixas:
+            acumulado.append(total)
+            total += (fim - inicio) * aliquota
+
+        self._definir("ano", ano)
+        self._definir("faixas", faixas)
+        self._definir("teto", faixas[-1][1])
+        self._definir("_inicios", tuple(f[0] for f in faixas))
+        self._definir("_fins", tuple(f[1] for f in faixas))
+        self._definir("_aliquotas", tuple(f[2] for f in faixas))
+        self._definir("_acumulado", tuple(acumulado))
+
+    def calcular(self, salario_bruto: Decimal) -> Decimal:
+        """INSS progressivo: imposto acumulado das faixas anteriores + faixa atual."""
+        valor = min(salario_bruto, self.teto)
+        idx = bisect_left(self._inicios, valor) - 1
+        if idx < 0:
+            return _ZERO_CENTAVOS
+
+        base = min(valor, self._fins[idx]) - self._inicios[idx]
+        return quantizar(self._acumulado[idx] + base * self._aliquotas[idx])
+
+    def __repr__(self):
+        return f"TabelaINSS(ano={self.ano}, teto={self.teto})"
+
+
+class TabelaIRRF(_Imutavel):
+    """Tabela progressiva do IRRF no formato alíquota + parcela a deduzir."""
+
+    __slots__ = ("ano", "faixas", "deducao_dependente", "_limites", "_aliquotas", "_deducoes")
+
+    def __init__(self, ano: int, faixas: Sequence[Tuple], deducao_dependente):
+        """`faixas`: sequência de (limite superior, alíquota, parcela a deduzir)."""
+        faixas = tuple((to_decimal(l), to_decimal(a), to_decimal(d)) for l, a, d in faixas)
+
+        self._definir("ano", ano)
+        self._definir("faixas", faixas)
+        self._definir("deducao_dependente", to_decimal(deducao_dependente))
+        self._definir("_limites", tuple(f[0] for f in faixas))
+        self._definir("_aliquotas", tuple(f[1] for f in faixas))
+        self._definir("_deducoes", tuple(f[2] for f in faixas))
+
+    def calcular(self, base_irrf: Decimal) -> Decimal:
+        """IRRF da primeira faixa cujo limite cobre a base."""
+        idx = bisect_left(self._limites, base_irrf)
+        if idx == len(self._limites):
+            return _ZERO
+        return quantizar((base_irrf * self._aliquotas[idx]) - self._deducoes[idx])
+
+    def __repr__(self):
+        return f"TabelaIRRF(ano={self.ano}, faixas={len(self.faixas)})"
+
+
+class TabelasCompetencia(_Imutavel):
+    """Conjunto de tabelas vigentes em um ano de competência."""
+
+    __slots__ = ("ano", "inss", "irrf")
+
+    def __init__(self, ano: int, inss: TabelaINSS, irrf: TabelaIRRF):
+        self._definir("ano", ano)
+        self._definir("inss", inss)
+        self._definir("irrf", irrf)
+
+    def __repr__(self):
+        return f"TabelasCompetencia(ano={self.ano})"
+
+
+# Nota: as faixas do INSS começam 1 centavo após o fim da anterior,
+# convenção herdada do cálculo original por faixas.
+_TABELAS: Dict[int, TabelasCompetencia] = {
+    # Portaria Interministerial MPS/MF 2025 e tabela IRRF vigente a partir de maio/2025
+    2025: TabelasCompetencia(
+        2025,
+        TabelaINSS(2025, [
+            ('0', '1518.00', '0.075'),
+            ('1518.01', '2793.88', '0.09'),
+            ('2793.89', '4190.83', '0.12'),
+            ('4190.84', '8157.41', '0.14'),
+        ]),
+        TabelaIRRF(2025, [
+            ('2428.80', '0', '0'),
+            ('2826.65', '0.075', '182.16'),
+            ('3751.05', '0.15', '394.16'),
+            ('4664.68', '0.225', '675.49'),
+            ('inf', '0.275', '908.73'),
+        ], deducao_dependente='189.59'),
+    ),
+    # Projeções para 2026
+    # Fonte: Reforma da Renda (Lei 15.270/2025) e reajustes INPC
+    2026: TabelasCompetencia(
+        2026,
+        TabelaINSS(2026, [
+            ('0', '1621.00', '0.075'),
+            ('1621.01', '2902.84', '0.09'),
+            ('2902.85', '4354.27', '0.12'),
+            ('4354.28', '8475.55', '0.14'),
+        ]),
+        # IRRF 2026: Isenção até R$ 5.000,00
+        # Nota: O governo utiliza redutores para bandas intermediárias (5k a 7.3k)
+        TabelaIRRF(2026, [
+            ('5000.00', '0', '0'),
+            ('7350.00', '0.15', '750.00'),  # Estimativa de redutor para transição
+            ('inf', '0.275', '896.00'),
+        ], deducao_dependente='189.59'),
+    ),
+}
+
+ANO_VIGENTE = 2026
+
+# Incrementada a cada alteração do registro; compõe as chaves de cache
+_versao = 1
+_ouvintes: List[Callable[[], None]] = []
+
+
+def anos_disponiveis() -> Tuple[int, ...]:
+    """Anos de competência com tabelas cadastradas."""
+    return tuple(sorted(_TABELAS))
+
+
+def obter_tabelas(ano: int = None) -> TabelasCompetencia:
+    """Retorna as tabelas compiladas de um ano de competência."""
+    ano = ANO_VIGENTE if ano is None else int(ano)
+    try:
+        return _TABELAS[ano]
+    except KeyError:
+        raise ValueError(f"Não há tabelas INSS/IRRF cadastradas para {ano}.") from None
+
+
+def versao_tabelas() -> int:
+    """Versão do registro de tabelas (muda a cada `registrar_tabelas`)."""
+    return _versao
+
+
+def ao_alterar_tabelas(callback: Callable[[], None]):
+    """Registra uma função chamada sempre que o conjunto de tabelas muda."""
+    _ouvintes.append(callback)
+
+
+def registrar_tabelas(tabelas: TabelasCompetencia):
+    """Cadastra (ou substitui) as tabelas de um ano e notifica os interessados."""
+    global _versao
+    _TABELAS[tabelas.ano] = tabelas
+    _versao += 1
+    for callback in list(_ouvintes):
+        callback()
@@ -0,0 +1,426 @@
+import csv
+import importlib.util
+import io
+import itertools
+import json
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from finance_engine.core.respostas import codificar
+from finance_engine.database.models import Empresa, Funcionario
+from finance_engine.database.queries import COLUNAS_COMPLETAS, listar_simulacoes
+from finance_engine.database.resumos import recalcular_resumo
+
+# Carga e exportação em massa. A importação lê CSV (ou Parquet) em blocos e
+# grava com o Core do SQLAlchemy: empresas por upsert no CNPJ (ON CONFLICT no
+# SQLite/PostgreSQL), funcionários por INSERT executemany (COPY no PostgreSQL
+# com psycopg2), sem instanciar um objeto do ORM por linha. Linhas inválidas
+# são listadas com o número da linha e não interrompem a carga. As
+# exportações são geradores de bytes, para respostas em streaming.
+
+COLUNAS_FUNCIONARIOS = ("cnpj", "razao_social", "regime_tributario", "nome", "cargo", "salario_base")
+# Numeric(14, 2): até 12 dígitos antes da vírgula
+_SALARIO_MAXIMO = Decimal("1e12")
+_MAX_ERROS_LISTADOS = 1000
+
+
+def normalizar_cnpj(valor) -> str:
+    """CNPJ no formato 00.000.000/0000-00, validando os dígitos verificadores."""
+    digitos = "".join(c for c in str(valor or "") if c.isdigit())
+    if len(digitos) != 14 or digitos == digitos[0] * 14:
+        raise ValueError(f"CNPJ inválido: {valor!r}.")
+    for tamanho in (12, 13):
+        pesos = list(range(tamanho - 7, 1, -1)) + list(range(9, 1, -1))
+        resto = sum(int(d) * p for d, p in zip(digitos, pesos)) % 11
+        if int(digitos[tamanho]) != (0 if resto < 2 else 11 - resto):
+            raise ValueError(f"CNPJ inválido: {valor!r}.")
+    return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+
+
+# Vírgula decimal só no formato brasileiro (1.234,56 ou 1234,56); com ponto
+# decimal, sem separador de milhar (1234.56). "3,500.00" e "3,500" são
+# ambíguos e viram erro da linha em vez de um salário adivinhado.
+_SALARIO_BRASILEIRO = re.compile(r"-?(\d{1,3}(\.\d{3})+|\d+),\d{1,2}")
+
+
+def _salario(valor) -> Optional[Decimal]:
+    if valor is None or str(valor).strip() == "":
+        return None
+    texto = str(valor).strip()
+    if "," in texto:
+        if not _SALARIO_BRASILEIRO.fullmatch(texto):
+            raise ValueError(f"Salário em formato ambíguo: {valor!r} (use 1.234,56 ou 1234.56).")
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        salario = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Salário inválido: {valor!r}.") from None
+    if not salario.is_finite() or salario < 0 or salario >= _SALARIO_MAXIMO:
+        raise ValueError(f"Salário fora da faixa: {valor!r}.")
+    if salario != salario.quantize(Decimal("0.01")):
+        raise ValueError(f"Salário com mais de duas casas decimais: {valor!r}.")
+    return salario.quantize(Decimal("0.01"))
+
+
+def _texto(valor) -> Optional[str]:
+    if valor is None:
+        return None
+    texto = str(valor).strip()
+    return texto or None
+
+
+# --- Leitura em blocos -------------------------------------------------------
+
+def _abrir_texto(fonte):
+    if isinstance(fonte, str):
+        return open(fonte, newline="", encoding="utf-8-sig")
+    if isinstance(fonte, io.TextIOBase):
+        return fonte
+    return io.TextIOWrapper(fonte, encoding="utf-8-sig", newline="")
+
+
+def ler_csv(fonte, tamanho_lote=5000) -> Iterator[List[Dict]]:
+    """Blocos de linhas (dicionários com cabeçalho em minúsculas) de um CSV `,` ou `;`."""
+    arquivo = _abrir_texto(fonte)
+    try:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+        except csv.Error:
+            dialeto = csv.excel
+        leitor = csv.reader(arquivo, dialect=dialeto)
+        cabecalho = [coluna.strip().lower() for coluna in next(leitor, [])]
+        while True:
+            bloco = [dict(zip(cabecalho, linha)) for linha in itertools.islice(leitor, tamanho_lote)]
+            if not bloco:
+                return
+            yield bloco
+    finally:
+        if isinstance(fonte, str):
+            arquivo.close()
+        elif arquivo is not fonte:
+            arquivo.detach()  # não fecha o arquivo binário de quem chamou
+
+
+def ler_parquet(fonte, tamanho_lote=5000) -> Iterator[List[Dict]]:
+    """Blocos de linhas de um arquivo Parquet (requer pyarrow)."""
+    _, pq = _pyarrow("Importar")
+    arquivo = pq.ParquetFile(fonte)
+    for lote in arquivo.iter_batches(batch_size=tamanho_lote):
+        yield [{str(k).lower(): v for k, v in linha.items()} for linha in lote.to_pylist()]
+
+
+def parquet_disponivel() -> bool:
+    """Se o pyarrow está instalado, sem importá-lo."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _pyarrow(operacao: str):
+    # Importado só no primeiro uso de Parquet: custa mais que o resto do módulo
+    # e a maioria dos processos nunca precisa dele
+    try:
+        import pyarrow
+        import pyarrow.parquet as pq
+    except ImportError:  # dependência opcional
+        raise ValueError(f"{operacao} Parquet requer o pacote pyarrow.") from None
+    return pyarrow, pq
+
+
+# --- Importação --------------------------------------------------------------
+
+def _upsert_empresas(conn, empresas: Dict[str, Dict]):
+    """Insere ou atualiza empresas pelo CNPJ (razão social e regime)."""
+    tabela = Empresa.__table__
+    linhas = list(empresas.values())
+    dialeto = conn.dialect.name
+    if dialeto in ("sqlite", "postgresql"):
+        if dialeto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+        comando = insert_dialeto(tabela)
+        conn.execute(comando.on_conflict_do_update(
+            index_elements=[tabela.c.cnpj],
+            set_={
+                "razao_social": comando.excluded.razao_social,
+                # Sem regime no arquivo, mantém o cadastrado
+                "regime_tributario": func.coalesce(comando.excluded.regime_tributario, tabela.c.regime_tributario),
+            },
+        ), linhas)
+        return
+
+    # Outros bancos: atualiza as existentes e insere as novas
+    existentes = set(conn.execute(select(tabela.c.cnpj).where(tabela.c.cnpj.in_(list(empresas)))).scalars())
+    if existentes:
+        conn.execute(
+            update(tabela).where(tabela.c.cnpj == bindparam("chave")).values(
+                razao_social=bindparam("razao_social"), regime_tributario=bindparam("regime_tributario")
+            ),
+            [{**empresas[cnpj], "chave": cnpj} for cnpj in existentes],
+        )
+    novas = [linha for cnpj, linha in empresas.items() if cnpj not in existentes]
+    if novas:
+        conn.execute(insert(tabela), novas)
+
+
+def _inserir_funcionarios(conn, linhas: List[Dict]):
+    """INSERT executemany; no PostgreSQL com psycopg2, COPY FROM STDIN."""
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (l["nome"], l["cargo"], l["salario_base"], l["empresa_id"]) for l in linhas
+        )
+        buffer.seek(0)
+        with conn.connection.dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                "COPY funcionarios (nome, cargo, salario_base, empresa_id) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        return
+    conn.execute(insert(Funcionario.__table__), linhas)
+
+
+def importar_funcionarios(db, fonte, formato="csv", tamanho_lote=5000, substituir=True) -> Dict:
+    """
+    Importa empresas e funcionários de um CSV/Parquet com as colunas de
+    `COLUNAS_FUNCIONARIOS`. A empresa é criada ou atualizada pelo CNPJ quando
+    a linha traz `razao_social`; linhas sem `nome` só cadastram a empresa.
+    Com `substituir=True` o arquivo é o quadro completo: os funcionários já
+    cadastrados das empresas com funcionários no arquivo são removidos antes, então
+    importar o mesmo arquivo de novo não duplica nada. Nesse modo a carga
+    inteira (remoção, inserções e resumo da folha) é uma única transação:
+    se o arquivo falhar no meio (ex.: byte UTF-8 inválido), nada muda e o
+    quadro anterior continua valendo. Com `substituir=False` cada bloco é
+    gravado em sua própria transação, e uma falha mantém os blocos já
+    gravados, com o resumo deles recalculado. Retorna o relatório da carga.
+    """
+    leitores = {"csv": ler_csv, "parquet": ler_parquet}
+    if formato not in leitores:
+        raise ValueError(f"Formato desconhecido: {formato}.")
+
+    ids_empresas: Dict[str, int] = {}
+    # Milhares de linhas repetem o mesmo CNPJ: valida cada texto uma vez
+    cnpjs: Dict[str, str] = {}
+    atualizadas = set()
+    substituidas = set()
+    erros: List[Dict] = []
+    total_erros = 0
+    relatorio = {"linhas": 0, "empresas": 0, "funcionarios": 0, "removidos": 0}
+
+    def registrar_erro(numero, mensagem):
+        nonlocal total_erros
+        total_erros += 1
+        if len(erros) < _MAX_ERROS_LISTADOS:
+            erros.append({"linha": numero, "erro": mensagem})
+
+    # A linha 1 é o cabeçalho no CSV; no Parquet a numeração começa em 1
+    numero = 1 if formato == "csv" else 0
+    # Empresas com blocos já confirmados no banco (resumo a refazer mesmo se a carga falhar)
+    confirmadas = set()
+    try:
+        for bloco in leitores[formato](fonte, tamanho_lote):
+            validas = []
+            empresas: Dict[str, Dict] = {}
+            for linha in bloco:
+                numero += 1
+                try:
+                    bruto = linha.get("cnpj")
+                    cnpj = cnpjs.get(bruto)
+                    if cnpj is None:
+                        cnpj = cnpjs[bruto] = normalizar_cnpj(bruto)
+                    razao = _texto(linha.get("razao_social"))
+                    nome = _texto(linha.get("nome"))
+                    salario = _salario(linha.get("salario_base")) if nome else None
+                except ValueError as e:
+                    registrar_erro(numero, str(e))
+                    continue
+                if razao and cnpj not in atualizadas:
+                    empresas[cnpj] = {
+                        "cnpj": cnpj, "razao_social": razao,
+                        "regime_tributario": _texto(linha.get("regime_tributario")),
+                    }
+                    atualizadas.add(cnpj)
+                if nome is None:
+                    if razao is None:
+                        registrar_erro(numero, "Linha sem nome de funcionário nem razão social.")
+                    continue
+                validas.append((numero, cnpj, {"nome": nome, "cargo": _texto(linha.get("cargo")), "salario_base": salario}))
+            relatorio["linhas"] += len(bloco)
+
+            conn = db.connection()
+            if empresas:
+                _upsert_empresas(conn, empresas)
+                relatorio["empresas"] += len(empresas)
+            faltantes = {cnpj for _, cnpj, _ in validas if cnpj not in ids_empresas} | set(empresas)
+            if faltantes:
+                consulta = select(Empresa.id, Empresa.cnpj).where(Empresa.cnpj.in_(list(faltantes)))
+                ids_empresas.update({cnpj: id_ for id_, cnpj in conn.execute(consulta)})
+
+            funcionarios = []
+            for numero_linha, cnpj, funcionario in validas:
+                empresa_id = ids_empresas.get(cnpj)
+                if empresa_id is None:
+                    registrar_erro(numero_linha, f"Empresa não cadastrada para o CNPJ {cnpj} (informe a razão social).")
+                    continue
+                funcionarios.append({**funcionario, "empresa_id": empresa_id})
+
+            novas = {f["empresa_id"] for f in funcionarios} - substituidas
+            if substituir and novas:
+                removidos = conn.execute(delete(Funcionario.__table__).where(Funcionario.empresa_id.in_(list(novas))))
+                relatorio["removidos"] += removidos.rowcount
+                substituidas |= novas
+            if funcionarios:
+                _inserir_funcionarios(conn, funcionarios)
+                relatorio["funcionarios"] += len(funcionarios)
+            if not substituir:
+                db.commit()
+                confirmadas.update(ids_empresas.values())
+        confirmadas.update(ids_empresas.values())
+    except BaseException:
+        # Na substituição, desfaz a carga inteira; na carga incremental, só o bloco corrente
+        db.rollback()
+        if substituir:
+            confirmadas.clear()
+        raise
+    finally:
+        # Inserts/deletes pelo Core não passam pelos eventos do resumo da folha.
+        # Na substituição, o resumo entra no mesmo commit da troca do quadro.
+        if confirmadas:
+            recalcular_resumo(db, empresa_ids=confirmadas)
+
+    erros.sort(key=lambda erro: erro["linha"])
+    return {**relatorio, "com_erro": total_erros, "erros": erros}
+
+
+# --- Exportação --------------------------------------------------------------
+
+def _csv_bytes(linhas: Iterable, cabecalho=None) -> bytes:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    if cabecalho:
+        escritor.writerow(cabecalho)
+    escritor.writerows(linhas)
+    return buffer.getvalue().encode("utf-8")
+
+
+class _Coletor(io.RawIOBase):
+    """Destino de escrita do Parquet: acumula os bytes até o gerador os entregar."""
+
+    def __init__(self):
+        self.partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def esvaziar(self) -> bytes:
+        dados, self.partes = b"".join(self.partes), []
+        return dados
+
+
+def _parquet(blocos: Iterator[List[tuple]], tipos: Dict[str, str]) -> Iterator[bytes]:
+    """Um row group por bloco, entregue assim que é escrito. `tipos`: coluna -> tipo do pyarrow."""
+    pyarrow, pq = _pyarrow("Exportar")
+    esquema = pyarrow.schema([
+        (nome, pyarrow.decimal128(14, 2) if tipo == "decimal" else getattr(pyarrow, tipo)())
+        for nome, tipo in tipos.items()
+    ])
+    coletor = _Coletor()
+    with pq.ParquetWriter(coletor, esquema) as escritor:
+        for bloco in blocos:
+            colunas = zip(*bloco)
+            escritor.write_table(pyarrow.table(
+                {nome: list(valores) for nome, valores in zip(tipos, colunas)}, schema=esquema
+            ))
+            yield coletor.esvaziar()
+    yield coletor.esvaziar()
+
+
+def _blocos_funcionarios(session_factory, empresa_id, tamanho_lote) -> Iterator[List[tuple]]:
+    # Paginação por id (keyset), em sessão própria: o gerador vive além da requisição
+    db = session_factory()
+    try:
+        ultimo_id = 0
+        while True:
+            consulta = (
+                select(Funcionario.id, Empresa.cnpj, Empresa.razao_social, Empresa.regime_tributario,
+                       Funcionario.nome, Funcionario.cargo, Funcionario.salario_base)
+                .outerjoin(Empresa, Funcionario.empresa_id == Empresa.id)
+                .where(Funcionario.id > ultimo_id)
+                .order_by(Funcionario.id)
+                .limit(tamanho_lote)
+            )
+            if empresa_id is not None:
+                consulta = consulta.where(Funcionario.empresa_id == empresa_id)
+            linhas = db.execute(consulta).all()
+            if not linhas:
+                return
+            ultimo_id = linhas[-1][0]
+            yield [tuple(linha[1:]) for linha in linhas]
+    finally:
+        db.close()
+
+
+def exportar_funcionarios(session_factory, empresa_id: Optional[int] = None, formato="csv",
+                          tamanho_lote=5000) -> Iterator[bytes]:
+    """Funcionários (com o CNPJ da empresa) em CSV ou Parquet, no formato da importação."""
+    blocos = _blocos_funcionarios(session_factory, empresa_id, tamanho_lote)
+    if formato == "parquet":
+        tipos = dict.fromkeys(COLUNAS_FUNCIONARIOS, "string")
+        yield from _parquet(blocos, {**tipos, "salario_base": "decimal"})
+        return
+    if formato != "csv":
+        raise ValueError(f"Formato desconhecido: {formato}.")
+    yield _csv_bytes((), COLUNAS_FUNCIONARIOS)
+    for bloco in blocos:
+        yield _csv_bytes(bloco)
+
+
+def exportar_simulacoes(session_factory, formato="ndjson", tamanho_lote=2000, **filtros) -> Iterator[bytes]:
+    """
+    Histórico completo de simulações (da mais recente para a mais antiga) em
+    NDJSON, CSV ou Parquet, percorrido em páginas por keyset. `filtros` são os
+    de `listar_simulacoes` (tipo, usuario_ref, desde, ate).
+    """
+    if formato not in ("ndjson", "csv", "parquet"):
+        raise ValueError(f"Formato desconhecido: {formato}.")
+
+    def paginas():
+        db = session_factory()
+        try:
+            cursor = None
+            while True:
+                pagina = listar_simulacoes(db, limite=tamanho_lote, cursor=cursor, resumo=False, **filtros)
+                if pagina["itens"]:
+                    yield pagina["itens"]
+                cursor = pagina["proximo_cursor"]
+                if cursor is None:
+                    return
+        finally:
+            db.close()
+
+    if formato == "ndjson":
+        for itens in paginas():
+            yield b"".join(codificar(item) + b"\n" for item in itens)
+        return
+
+    def linhas(itens):
+        # Entrada e resultados (JSON) viram texto; a data, ISO 8601
+        return [
+            (item["id"], item["tipo"], item["data_criacao"].isoformat() if item["data_criacao"] else None,
+             item["usuario_ref"], json.dumps(item["parametros_entrada"], ensure_ascii=False, default=str),
+             json.dumps(item["resultados"], ensure_ascii=False, default=str))
+            for item in itens
+        ]
+
+    if formato == "parquet":
+        tipos = {**dict.fromkeys(COLUNAS_COMPLETAS, "string"), "id": "int64"}
+        yield from _parquet((linhas(itens) for itens in paginas()), tipos)
+        return
+    yield _csv_bytes((), COLUNAS_COMPLETAS)
+    for itens in paginas():
+        yield _csv_bytes(linhas(itens))
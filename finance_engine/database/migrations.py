@@ -0,0 +1,84 @@
+import logging
+from datetime import datetime
+from typing import List
+from sqlalchemy import BigInteger, Integer, inspect, update
+from finance_engine.database.models import Base, SimulacaoFinanceira
+
+logger = logging.getLogger(__name__)
+
+# Simulações gravadas antes de `data_criacao` ser obrigatória podem estar sem
+# data, o que quebra o cursor (data_criacao, id) do histórico: recebem esta
+# data e ficam no fim do histórico
+DATA_DESCONHECIDA = datetime(1970, 1, 1)
+
+
+def _data_criacao_obrigatoria(engine, inspetor) -> int:
+    simulacoes = SimulacaoFinanceira.__table__
+    # Inspeção antes da transação: o inspetor devolve a conexão ao pool com rollback
+    coluna = next(c for c in inspetor.get_columns(simulacoes.name) if c["name"] == "data_criacao")
+    with engine.begin() as conn:
+        preenchidas = conn.execute(
+            update(simulacoes)
+            .where(simulacoes.c.data_criacao.is_(None))
+            .values(data_criacao=DATA_DESCONHECIDA)
+        ).rowcount
+        # O SQLite não altera colunas existentes; nele vale o preenchimento acima
+        if coluna["nullable"] and engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("ALTER TABLE simulacoes ALTER COLUMN data_criacao SET NOT NULL")
+    return preenchidas
+
+
+def _id_simulacoes_bigint(engine, inspetor) -> bool:
+    """
+    No PostgreSQL, `simulacoes.id` criado como INTEGER (SERIAL) não comporta os
+    ids de 53 bits do escritor em lote: a coluna e a sequência passam a BIGINT.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+    coluna = next(c for c in inspetor.get_columns("simulacoes") if c["name"] == "id")
+    if not isinstance(coluna["type"], Integer) or isinstance(coluna["type"], BigInteger):
+        return False
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE simulacoes ALTER COLUMN id TYPE BIGINT")
+        sequencia = conn.exec_driver_sql("SELECT pg_get_serial_sequence('simulacoes', 'id')").scalar()
+        if sequencia:
+            conn.exec_driver_sql(f"ALTER SEQUENCE {sequencia} AS BIGINT")
+    return True
+
+
+def migrar(engine) -> List[str]:
+    """
+    Leva um banco existente ao esquema atual: cria tabelas ausentes e os
+    índices que `create_all` não adiciona a tabelas já existentes.
+    Retorna os nomes dos índices criados.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    inspetor = inspect(engine)
+    criados = []
+    with engine.begin() as conn:
+        for tabela in Base.metadata.sorted_tables:
+            existentes = {ix["name"] for ix in inspetor.get_indexes(tabela.name)}
+            for indice in tabela.indexes:
+                if indice.name not in existentes:
+                    indice.create(bind=conn)
+                    criados.append(indice.name)
+
+    for nome in criados:
+        logger.info("Índice criado: %s", nome)
+
+    if _id_simulacoes_bigint(engine, inspetor):
+        logger.info("Coluna simulacoes.id convertida para BIGINT.")
+
+    preenchidas = _data_criacao_obrigatoria(engine, inspetor)
+    if preenchidas:
+        logger.info("Simulações sem data de criação preenchidas: %d", preenchidas)
+    return criados
+
+
+if __name__ == "__main__":
+    from finance_engine.database.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    criados = migrar(engine)
+    print(f"Migração concluída ({len(criados)} índice(s) criado(s)).")
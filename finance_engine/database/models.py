@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -21,16 +21,41 @@ class Funcionario(Base):
     nome = Column(String(255), nullable=False)
     cargo = Column(String(100))
     salario_base = Column(Numeric(precision=14, scale=2))
-    empresa_id = Column(Integer, ForeignKey('empresas.id'))
+    empresa_id = Column(Integer, ForeignKey('empresas.id'), index=True)
     
     empresa = relationship("Empresa", back_populates="funcionarios")
 
+class ResumoFolhaEmpresa(Base):
+    __tablename__ = 'resumos_folha_empresa'
+
+    # Agregado materializado de `funcionarios` por empresa, mantido a cada
+    # alteração de funcionário (ver database/resumos.py). Centavos inteiros:
+    # os incrementos são exatos em qualquer banco.
+    empresa_id = Column(Integer, ForeignKey('empresas.id'), primary_key=True)
+    total_funcionarios = Column(Integer, nullable=False, default=0)
+    soma_salarios_centavos = Column(BigInteger, nullable=False, default=0)
+    atualizado_em = Column(DateTime, default=datetime.utcnow)
+
+def _proximo_id_simulacao() -> int:
+    from finance_engine.database.writer import proximo_id  # o writer importa este módulo
+    return proximo_id()
+
 class SimulacaoFinanceira(Base):
     __tablename__ = 'simulacoes'
     
-    id = Column(Integer, primary_key=True)
+    # Ids de 53 bits gerados no cliente (ver database/writer.py), também nos
+    # inserts do ORM: o autoincremento (max + 1) cairia na faixa dos gerados.
+    # No SQLite fica INTEGER, o rowid (64 bits).
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, default=_proximo_id_simulacao)
     tipo = Column(String(50)) # AMORTIZACAO, INVESTIMENTO, PAYROLL
-    data_criacao = Column(DateTime, default=datetime.utcnow)
+    data_criacao = Column(DateTime, nullable=False, default=datetime.utcnow)
     parametros_entrada = Column(JSON)
     resultados = Column(JSON)
     usuario_ref = Column(String(100)) # ID do usuário que gerou
+
+    # Índices compostos para o histórico paginado por keyset (data_criacao, id)
+    __table_args__ = (
+        Index('ix_simulacoes_data_criacao_id', 'data_criacao', 'id'),
+        Index('ix_simulacoes_tipo_data_criacao_id', 'tipo', 'data_criacao', 'id'),
+        Index('ix_simulacoes_usuario_data_criacao_id', 'usuario_ref', 'data_criacao', 'id'),
+    )
@@ -0,0 +1,67 @@
+import base64
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import and_, or_, select
+from finance_engine.database.migrations import DATA_DESCONHECIDA
+from finance_engine.database.models import SimulacaoFinanceira
+
+# Colunas projetadas no modo resumo (sem os blobs JSON de entrada/resultado)
+COLUNAS_RESUMO = ("id", "tipo", "data_criacao", "usuario_ref")
+COLUNAS_COMPLETAS = COLUNAS_RESUMO + ("parametros_entrada", "resultados")
+
+
+def codificar_cursor(data_criacao: datetime, id_: int) -> str:
+    """Cursor opaco com a chave (data_criacao, id) do último item da página."""
+    if data_criacao is None:
+        # Linha antiga ainda sem data: mesma data que `migrar` preenche
+        data_criacao = DATA_DESCONHECIDA
+    bruto = f"{data_criacao.isoformat()}|{id_}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        data, id_ = bruto.rsplit("|", 1)
+        return datetime.fromisoformat(data), int(id_)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Cursor de paginação inválido.") from None
+
+
+def listar_simulacoes(db, limite=10, cursor: Optional[str] = None, tipo=None,
+                      usuario_ref=None, desde: Optional[datetime] = None,
+                      ate: Optional[datetime] = None, resumo=True) -> Dict:
+    """
+    Histórico de simulações, da mais recente para a mais antiga, paginado por
+    keyset: cada página continua a partir de (data_criacao, id) do cursor, então
+    o custo não cresce com a profundidade da página nem com o tamanho da tabela.
+    """
+    nomes = COLUNAS_RESUMO if resumo else COLUNAS_COMPLETAS
+    modelo = SimulacaoFinanceira
+    consulta = select(*(getattr(modelo, nome) for nome in nomes))
+
+    if tipo is not None:
+        consulta = consulta.where(modelo.tipo == tipo)
+    if usuario_ref is not None:
+        consulta = consulta.where(modelo.usuario_ref == usuario_ref)
+    if desde is not None:
+        consulta = consulta.where(modelo.data_criacao >= desde)
+    if ate is not None:
+        consulta = consulta.where(modelo.data_criacao < ate)
+    if cursor:
+        data_cursor, id_cursor = decodificar_cursor(cursor)
+        consulta = consulta.where(or_(
+            modelo.data_criacao < data_cursor,
+            and_(modelo.data_criacao == data_cursor, modelo.id < id_cursor),
+        ))
+
+    consulta = consulta.order_by(modelo.data_criacao.desc(), modelo.id.desc()).limit(limite + 1)
+    linhas = db.execute(consulta).all()
+
+    itens = [dict(zip(nomes, linha)) for linha in linhas[:limite]]
+    proximo = None
+    if len(linhas) > limite:
+        ultimo = itens[-1]
+        proximo = codificar_cursor(ultimo["data_criacao"], ultimo["id"])
+
+    return {"itens": itens, "proximo_cursor": proximo}
@@ -0,0 +1,221 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session, attributes, object_session
+from finance_engine.core.math_utils import to_decimal
+from finance_engine.database.models import Empresa, Funcionario, ResumoFolhaEmpresa
+
+# Resumo da folha por empresa (quantidade de funcionários e soma dos salários)
+# mantido de forma incremental: cada insert/update/delete de `Funcionario`
+# pela sessão do ORM soma a diferença na linha da empresa, no mesmo flush.
+# O painel lê uma linha em vez de agregar milhares a cada atualização.
+# Escritas que não passam pelo ORM (insert/update em massa do Core) não
+# disparam os eventos: depois delas, chame `recalcular_resumo`.
+
+_resumo = ResumoFolhaEmpresa.__table__
+
+
+def _centavos(salario) -> int:
+    return 0 if salario is None else int(to_decimal(salario, '0.01').scaleb(2))
+
+
+def consulta_agregada(empresa_ids: Optional[Iterable[int]] = None):
+    """SELECT empresa_id, COUNT(*), SUM(salário em centavos) agrupado por empresa."""
+    consulta = (
+        select(
+            Funcionario.empresa_id,
+            func.count().label("total_funcionarios"),
+            # round por linha: no SQLite o Numeric é REAL, e a soma de inteiros fica exata
+            func.coalesce(func.sum(func.round(Funcionario.salario_base * 100)), 0).label("soma_salarios_centavos"),
+        )
+        .where(Funcionario.empresa_id.is_not(None))
+        .group_by(Funcionario.empresa_id)
+    )
+    if empresa_ids is not None:
+        consulta = consulta.where(Funcionario.empresa_id.in_(list(empresa_ids)))
+    return consulta
+
+
+def _linhas_agregadas(conn, ids: Optional[list]) -> dict:
+    """Linhas do resumo calculadas pelo agregado, por empresa."""
+    agora = datetime.utcnow()
+    linhas = {
+        linha.empresa_id: {
+            "empresa_id": linha.empresa_id,
+            "total_funcionarios": linha.total_funcionarios,
+            "soma_salarios_centavos": int(linha.soma_salarios_centavos),
+            "atualizado_em": agora,
+        }
+        for linha in conn.execute(consulta_agregada(ids))
+    }
+    # Empresas pedidas explicitamente e sem funcionários ficam com resumo zerado
+    for empresa_id in ids or ():
+        linhas.setdefault(empresa_id, {
+            "empresa_id": empresa_id, "total_funcionarios": 0,
+            "soma_salarios_centavos": 0, "atualizado_em": agora,
+        })
+    return linhas
+
+
+def _materializar(conn, empresa_ids: Optional[Iterable[int]] = None) -> int:
+    """Regrava as linhas do resumo a partir do agregado completo; retorna quantas."""
+    ids = None if empresa_ids is None else list(empresa_ids)
+    linhas = _linhas_agregadas(conn, ids)
+    apagar = delete(_resumo)
+    if ids is not None:
+        apagar = apagar.where(_resumo.c.empresa_id.in_(ids))
+    conn.execute(apagar)
+    if linhas:
+        conn.execute(insert(_resumo), list(linhas.values()))
+    return len(linhas)
+
+
+def _criar_resumo(conn, empresa_id: int) -> bool:
+    """
+    Cria a linha da empresa a partir do agregado, se ainda não existir. Duas
+    sessões criando a mesma linha ao mesmo tempo não conflitam: a segunda não
+    insere nada (ON CONFLICT DO NOTHING) e recebe False.
+    """
+    linha = _linhas_agregadas(conn, [empresa_id])[empresa_id]
+    dialeto = conn.dialect.name
+    if dialeto in ("sqlite", "postgresql"):
+        if dialeto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+        comando = insert_dialeto(_resumo).on_conflict_do_nothing(index_elements=[_resumo.c.empresa_id])
+        return bool(conn.execute(comando, linha).rowcount)
+
+    # Outros bancos: insere se ainda não existir
+    existente = conn.execute(select(_resumo.c.empresa_id).where(_resumo.c.empresa_id == empresa_id)).first()
+    if existente is None:
+        conn.execute(insert(_resumo), linha)
+    return existente is None
+
+
+def recalcular_resumo(db, empresa_id: Optional[int] = None, empresa_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Reconstrói o resumo de uma empresa, de várias (`empresa_ids`) ou de todas
+    com uma única consulta agregada. Use após cargas em massa que não passam
+    pelos eventos do ORM.
+    """
+    if empresa_id is not None:
+        empresa_ids = [empresa_id]
+    total = _materializar(db.connection(), empresa_ids)
+    db.commit()
+    return total
+
+
+def obter_resumo(db, empresa_id: int):
+    """
+    Linha do resumo da empresa; materializada na primeira consulta se ainda
+    não existir. A linha criada fica na transação de `db`: quem chama decide
+    se faz o commit (sem ele, a próxima consulta a recalcula).
+    """
+    consulta = select(_resumo).where(_resumo.c.empresa_id == empresa_id)
+    linha = db.execute(consulta).first()
+    if linha is None:
+        _criar_resumo(db.connection(), empresa_id)
+        linha = db.execute(consulta).first()
+    return linha
+
+
+def versao_dados(db, empresa_id: int) -> Optional[str]:
+    """
+    Momento da última alteração nos funcionários da empresa, para invalidar
+    caches de quem lê os dados ao vivo (ex.: relatórios). None se a empresa não
+    existir. Como `obter_resumo`, não faz commit na sessão de quem chama.
+    """
+    if db.get(Empresa, empresa_id) is None:
+        return None
+    return obter_resumo(db, empresa_id).atualizado_em.isoformat()
+
+
+def _aplicar(conn, empresa_id: int, funcionarios: int, centavos: int):
+    """Soma a diferença no resumo da empresa; sem linha ainda, ela nasce do agregado completo."""
+    incremento = (
+        update(_resumo)
+        .where(_resumo.c.empresa_id == empresa_id)
+        .values(
+            total_funcionarios=_resumo.c.total_funcionarios + funcionarios,
+            soma_salarios_centavos=_resumo.c.soma_salarios_centavos + centavos,
+            atualizado_em=datetime.utcnow(),
+        )
+    )
+    if conn.execute(incremento).rowcount:
+        return
+    # Sem linha: o agregado já inclui este flush. Se outra sessão criou a linha
+    # nesse meio tempo, ela não inclui estas linhas, então soma a diferença nela
+    if not _criar_resumo(conn, empresa_id):
+        conn.execute(incremento)
+
+
+# As diferenças de cada flush são acumuladas por empresa e aplicadas uma vez
+# no after_flush, quando todas as linhas do flush (inserts em lote inclusive)
+# já estão no banco.
+_PENDENTE = "resumo_folha_pendente"
+
+
+def _acumular(alvo, empresa_id, funcionarios: int, centavos: int):
+    if empresa_id is None:
+        return
+    pendente = object_session(alvo).info.setdefault(_PENDENTE, {})
+    qtd, soma = pendente.get(empresa_id, (0, 0))
+    pendente[empresa_id] = (qtd + funcionarios, soma + centavos)
+
+
+def _anterior(alvo, nome):
+    historico = attributes.get_history(alvo, nome)
+    if historico.deleted:
+        return historico.deleted[0]
+    return historico.unchanged[0] if historico.unchanged else getattr(alvo, nome)
+
+
+def _sem_efeito(alvo, valor, anterior, iniciador):
+    pass
+
+
+# active_history: o valor antigo é carregado mesmo se o atributo estava expirado,
+# para que o evento de update saiba o que subtrair
+event.listen(Funcionario.salario_base, "set", _sem_efeito, active_history=True)
+event.listen(Funcionario.empresa_id, "set", _sem_efeito, active_history=True)
+
+
+@event.listens_for(Funcionario, "after_insert")
+def _ao_inserir(mapper, conn, alvo):
+    _acumular(alvo, alvo.empresa_id, 1, _centavos(alvo.salario_base))
+
+
+@event.listens_for(Funcionario, "after_update")
+def _ao_atualizar(mapper, conn, alvo):
+    empresa_antiga = _anterior(alvo, "empresa_id")
+    salario_antigo = _centavos(_anterior(alvo, "salario_base"))
+    salario_novo = _centavos(alvo.salario_base)
+    if empresa_antiga == alvo.empresa_id:
+        _acumular(alvo, alvo.empresa_id, 0, salario_novo - salario_antigo)
+        return
+    _acumular(alvo, empresa_antiga, -1, -salario_antigo)
+    _acumular(alvo, alvo.empresa_id, 1, salario_novo)
+
+
+@event.listens_for(Funcionario, "before_delete")
+def _ao_apagar(mapper, conn, alvo):
+    # Antes do DELETE os atributos ainda podem ser carregados do banco
+    _acumular(alvo, _anterior(alvo, "empresa_id"), -1, -_centavos(_anterior(alvo, "salario_base")))
+
+
+@event.listens_for(Session, "before_flush")
+def _iniciar_flush(sessao, contexto, instancias):
+    # Descarta diferenças de um flush anterior que falhou
+    sessao.info.pop(_PENDENTE, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _aplicar_pendentes(sessao, contexto):
+    pendente = sessao.info.pop(_PENDENTE, None)
+    if not pendente:
+        return
+    conn = sessao.connection()
+    for empresa_id, (funcionarios, centavos) in pendente.items():
+        # Mesmo sem diferença (ex.: troca de cargo) o `atualizado_em` avança: é a versão dos dados
+        _aplicar(conn, empresa_id, funcionarios, centavos)
@@ -1,16 +1,79 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from finance_engine.database.models import Base
+from sqlalchemy.pool import StaticPool
+from finance_engine.database.migrations import migrar
+from finance_engine.database import resumos  # noqa: F401 - eventos que mantêm o resumo da folha
 
-# Usaremos SQLite local para facilidade de teste do usuário
-DATABASE_URL = "sqlite:///./finance_platform.db"
+# Usaremos SQLite local por padrão para facilidade de teste do usuário;
+# em produção a URL (ex.: PostgreSQL) vem da variável de ambiente.
+DATABASE_URL = os.environ.get("JUBARTE_DATABASE_URL", "sqlite:///./finance_platform.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Drivers assíncronos usados pela variante async (dependências opcionais)
+_DRIVERS_ASYNC = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """WAL permite leitores concorrentes enquanto um escritor grava."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _opcoes_engine(url, pool_size=None, max_overflow=None) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        opcoes = {"connect_args": {"check_same_thread": False}}
+        if url.database in (None, "", ":memory:"):
+            # Banco em memória: todas as sessões precisam da mesma conexão
+            opcoes["poolclass"] = StaticPool
+        return opcoes
+
+    return {
+        "pool_size": pool_size or int(os.environ.get("JUBARTE_DB_POOL_SIZE", 5)),
+        "max_overflow": max_overflow if max_overflow is not None else int(os.environ.get("JUBARTE_DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.environ.get("JUBARTE_DB_POOL_RECYCLE", 1800)),
+    }
+
+
+def criar_engine(url=None, pool_size=None, max_overflow=None, echo=False):
+    """Cria o engine a partir da URL (padrão: JUBARTE_DATABASE_URL) com pool configurável."""
+    url = url or DATABASE_URL
+    engine = create_engine(url, echo=echo, **_opcoes_engine(url, pool_size, max_overflow))
+    if engine.dialect.name == "sqlite" and make_url(url).database not in (None, "", ":memory:"):
+        event.listen(engine, "connect", _configurar_sqlite)
+    return engine
+
+
+def criar_engine_async(url=None, pool_size=None, max_overflow=None, echo=False):
+    """Variante assíncrona (requer `aiosqlite` ou `asyncpg` instalado)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url or DATABASE_URL)
+    driver = _DRIVERS_ASYNC.get(url.get_backend_name())
+    if driver and "+" not in url.drivername:
+        url = url.set(drivername=driver)
+    engine = create_async_engine(url, echo=echo, **_opcoes_engine(url, pool_size, max_overflow))
+    if engine.dialect.name == "sqlite" and url.database not in (None, "", ":memory:"):
+        event.listen(engine.sync_engine, "connect", _configurar_sqlite)
+    return engine
+
+
+engine = criar_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Criado na primeira sessão async, para não exigir o driver de quem não usa
+_AsyncSessionLocal = None
+
+
 def init_db():
-    """Cria as tabelas no banco de dados se não existirem."""
-    Base.metadata.create_all(bind=engine)
+    """Cria as tabelas e índices no banco de dados se não existirem."""
+    migrar(engine)
+
 
 def get_db():
     """Providencia uma sessão do banco de dados."""
@@ -19,3 +82,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Providencia uma sessão assíncrona do banco de dados."""
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _AsyncSessionLocal = async_sessionmaker(criar_engine_async(), expire_on_commit=False)
+
+    async with _AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,335 @@
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from finance_engine.database.models import SimulacaoFinanceira
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem reserva automática do id de worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Marcador enfileirado por `parar()` para acordar a thread imediatamente
+_SENTINELA = object()
+
+
+def _arquivo_falhas_padrao(session_factory) -> str:
+    """Ao lado do arquivo do banco SQLite; nos demais bancos, no diretório temporário."""
+    nome = "simulacoes_falhas.jsonl"
+    bind = getattr(session_factory, "kw", {}).get("bind")
+    url = getattr(bind, "url", None)
+    if url is not None and url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        return os.path.join(os.path.dirname(os.path.abspath(url.database)), nome)
+    return os.path.join(tempfile.gettempdir(), nome)
+
+
+class FilaCheia(RuntimeError):
+    """A fila de gravação atingiu a capacidade máxima (backpressure)."""
+
+
+def _reservar_worker_id(total: int, diretorio=None):
+    """
+    Reserva o primeiro id livre entre os processos da máquina com um flock por
+    id; a trava dura enquanto o arquivo retornado estiver aberto (e some se o
+    processo morrer).
+    """
+    diretorio = diretorio or os.environ.get("JUBARTE_WORKER_LOCKS", tempfile.gettempdir())
+    for candidato in range(total):
+        arquivo = open(os.path.join(diretorio, f"jubarte_worker_{candidato}.lock"), "a")
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            continue
+        return candidato, arquivo
+    raise RuntimeError(
+        f"Todos os {total} ids de worker desta máquina estão em uso; defina JUBARTE_WORKER_ID."
+    )
+
+
+class GeradorIds:
+    """
+    Ids de 53 bits gerados no cliente (seguros para Number do JavaScript):
+    40 bits de milissegundos desde 2025-01-01 (até 2059), 6 bits de worker e 7
+    de sequência. Todo insert de `SimulacaoFinanceira` usa estes ids (padrão da
+    coluna, ver `proximo_id`), nunca o autoincremento do banco.
+
+    O id de worker precisa ser único entre todos os processos que gravam no
+    mesmo banco, e nada o verifica entre máquinas: dois processos com o mesmo
+    id geram ids repetidos, que só aparecem como violação de chave (e vão para
+    o arquivo de falhas). Com uma máquina, cada processo reserva sozinho um id
+    livre (64 no total); com várias, cada processo recebe o seu por
+    `worker_id`/JUBARTE_WORKER_ID e as faixas não podem se sobrepor.
+    """
+
+    EPOCA_MS = 1735689600000
+    BITS_WORKER = 6
+    BITS_SEQUENCIA = 7
+
+    def __init__(self, worker_id=None):
+        if worker_id is None and "JUBARTE_WORKER_ID" in os.environ:
+            worker_id = int(os.environ["JUBARTE_WORKER_ID"])
+        if worker_id is not None and not 0 <= worker_id < (1 << self.BITS_WORKER):
+            raise ValueError(f"Id de worker deve estar entre 0 e {(1 << self.BITS_WORKER) - 1}.")
+        self._fixo = worker_id
+        self._worker_id = worker_id
+        self._trava = None
+        self._pid = None
+        self._ultimo_ms = -1
+        self._sequencia = 0
+        self._lock = threading.Lock()
+
+    @property
+    def worker_id(self) -> int:
+        with self._lock:
+            return self._resolver_worker()
+
+    def _resolver_worker(self) -> int:
+        if self._fixo is not None:
+            return self._fixo
+        # Reservado de novo após um fork: o filho não pode herdar o id do pai
+        if self._pid != os.getpid():
+            if fcntl is None:
+                raise RuntimeError("Sem reserva automática de worker nesta plataforma; defina JUBARTE_WORKER_ID.")
+            self._worker_id, self._trava = _reservar_worker_id(1 << self.BITS_WORKER)
+            self._pid = os.getpid()
+        return self._worker_id
+
+    def proximo(self) -> int:
+        with self._lock:
+            worker_id = self._resolver_worker()
+            agora = int(time.time() * 1000) - self.EPOCA_MS
+            if agora < self._ultimo_ms:
+                # Relógio voltou: continua a partir do último instante emitido
+                agora = self._ultimo_ms
+            if agora == self._ultimo_ms:
+                self._sequencia = (self._sequencia + 1) % (1 << self.BITS_SEQUENCIA)
+                if self._sequencia == 0:
+                    # Sequência esgotada neste milissegundo: avança para o próximo
+                    agora += 1
+            else:
+                self._sequencia = 0
+            self._ultimo_ms = agora
+            return (
+                (agora << (self.BITS_WORKER + self.BITS_SEQUENCIA))
+                | (worker_id << self.BITS_SEQUENCIA)
+                | self._sequencia
+            )
+
+
+_gerador_padrao = None
+_gerador_padrao_lock = threading.Lock()
+
+
+def gerador_padrao() -> GeradorIds:
+    """Gerador do processo: um único id de worker por processo, mesmo com vários escritores."""
+    global _gerador_padrao
+    with _gerador_padrao_lock:
+        if _gerador_padrao is None:
+            _gerador_padrao = GeradorIds()
+        return _gerador_padrao
+
+
+def proximo_id() -> int:
+    """Próximo id de simulação do gerador do processo (padrão da coluna `simulacoes.id`)."""
+    return gerador_padrao().proximo()
+
+
+class EscritorSimulacoes:
+    """
+    Gravação assíncrona (write-behind) de simulações: os registros entram numa
+    fila limitada e uma thread os grava em lote (INSERT executemany) quando o
+    lote enche ou quando o intervalo máximo expira.
+
+    Os ids já foram entregues aos clientes, então nenhum registro é descartado:
+    um lote que falha é tentado de novo após cada espera de `esperas`; se
+    continuar falhando, os registros vão para o arquivo `arquivo_falhas`
+    (JSON por linha, JUBARTE_SIMULACOES_FALHAS; por padrão ao lado do banco
+    SQLite ou no diretório temporário), de onde `regravar_falhas` os devolve
+    ao banco.
+    """
+
+    def __init__(self, session_factory, tamanho_lote=500, intervalo=0.5,
+                 capacidade=10000, timeout_enfileirar=0.05, esperas=(0.1, 0.5, 2.0),
+                 arquivo_falhas=None):
+        self.session_factory = session_factory
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.timeout_enfileirar = timeout_enfileirar
+        self.esperas = tuple(esperas)
+        self.arquivo_falhas = (
+            arquivo_falhas
+            or os.environ.get("JUBARTE_SIMULACOES_FALHAS")
+            or _arquivo_falhas_padrao(session_factory)
+        )
+        self.falhas = 0
+        self.ids = gerador_padrao()
+        self._fila: "queue.Queue[Dict]" = queue.Queue(maxsize=capacidade)
+        self._parar = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        """Inicia a thread de gravação (idempotente)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="escritor-simulacoes", daemon=True)
+            self._thread.start()
+
+    def enfileirar(self, tipo, parametros_entrada, resultados, usuario_ref=None) -> int:
+        """Enfileira uma simulação e retorna seu id sem esperar o banco."""
+        self.iniciar()
+        registro = {
+            "id": self.ids.proximo(),
+            "tipo": tipo,
+            "data_criacao": datetime.utcnow(),
+            "parametros_entrada": parametros_entrada,
+            "resultados": resultados,
+            "usuario_ref": usuario_ref,
+        }
+        try:
+            self._fila.put(registro, timeout=self.timeout_enfileirar)
+        except queue.Full:
+            raise FilaCheia("Fila de gravação de simulações cheia.") from None
+        return registro["id"]
+
+    def aguardar(self):
+        """Bloqueia até que tudo o que foi enfileirado esteja gravado."""
+        self._fila.join()
+
+    def parar(self, timeout=10.0):
+        """Encerramento gracioso: grava o que restou na fila e finaliza a thread."""
+        self._parar.set()
+        try:
+            self._fila.put_nowait(_SENTINELA)
+        except queue.Full:
+            pass  # a thread está ocupada drenando a fila e verá o sinal
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _executar(self):
+        while True:
+            lote = self._coletar_lote()
+            if lote:
+                self._gravar(lote)
+            if self._parar.is_set() and self._fila.empty():
+                return
+
+    def _coletar_lote(self) -> List[Dict]:
+        """Espera o primeiro registro e junta os seguintes até encher o lote ou expirar o prazo."""
+        try:
+            registro = self._fila.get(timeout=self.intervalo)
+        except queue.Empty:
+            return []
+        if registro is _SENTINELA:
+            self._fila.task_done()
+            return []
+
+        lote = [registro]
+        prazo = time.monotonic() + self.intervalo
+        while len(lote) < self.tamanho_lote:
+            restante = 0 if self._parar.is_set() else prazo - time.monotonic()
+            try:
+                if restante <= 0:
+                    registro = self._fila.get_nowait()
+                else:
+                    registro = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            if registro is _SENTINELA:
+                self._fila.task_done()
+                break
+            lote.append(registro)
+        return lote
+
+    def _inserir(self, lote: List[Dict]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(SimulacaoFinanceira), lote)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _gravar(self, lote: List[Dict]):
+        try:
+            self._gravar_com_retentativas(lote)
+        finally:
+            for _ in lote:
+                self._fila.task_done()
+
+    def _gravar_com_retentativas(self, lote: List[Dict]):
+        for tentativa, espera in enumerate(self.esperas + (None,), start=1):
+            try:
+                self._inserir(lote)
+                return
+            except IntegrityError:
+                # Repetir o lote não resolve (ex.: id duplicado): só as linhas com problema ficam de fora
+                logger.exception(
+                    "Lote de %d simulações violou restrições; gravando linha a linha. Ids repetidos indicam "
+                    "outro processo com o mesmo id de worker (%d).", len(lote), self.ids.worker_id,
+                )
+                self._gravar_linha_a_linha(lote)
+                return
+            except Exception:
+                if espera is None:
+                    logger.exception("Falha ao gravar lote de %d simulações após %d tentativas.", len(lote), tentativa)
+                    self._guardar_falhas(lote)
+                    return
+                logger.warning("Falha ao gravar lote de %d simulações (tentativa %d); nova tentativa em %.1fs.",
+                               len(lote), tentativa, espera, exc_info=True)
+                time.sleep(espera)
+
+    def _gravar_linha_a_linha(self, lote: List[Dict]):
+        falhas = []
+        for registro in lote:
+            try:
+                self._inserir([registro])
+            except Exception:
+                falhas.append(registro)
+        if falhas:
+            self._guardar_falhas(falhas)
+
+    def _guardar_falhas(self, registros: List[Dict]):
+        with self._lock, open(self.arquivo_falhas, "a", encoding="utf-8") as arquivo:
+            for registro in registros:
+                arquivo.write(json.dumps(registro, default=str, ensure_ascii=False) + "\n")
+            self.falhas += len(registros)
+        logger.error("%d simulações guardadas em %s para regravação.", len(registros), self.arquivo_falhas)
+
+    def regravar_falhas(self) -> int:
+        """
+        Devolve ao banco as simulações guardadas no arquivo de falhas; as que
+        ainda falharem voltam para o arquivo. Retorna quantas foram gravadas.
+        """
+        with self._lock:
+            if not os.path.exists(self.arquivo_falhas):
+                return 0
+            pendentes = self.arquivo_falhas + ".regravando"
+            os.replace(self.arquivo_falhas, pendentes)
+        with open(pendentes, encoding="utf-8") as arquivo:
+            registros = [json.loads(linha) for linha in arquivo if linha.strip()]
+        for registro in registros:
+            registro["data_criacao"] = datetime.fromisoformat(registro["data_criacao"])
+
+        antes = self.falhas
+        try:
+            self._inserir(registros)
+        except Exception:
+            self._gravar_linha_a_linha(registros)
+        os.remove(pendentes)
+        return len(registros) - (self.falhas - antes)
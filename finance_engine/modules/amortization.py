@@ -0,0 +1,228 @@
+from decimal import Decimal
+from typing import Dict, List
+import numpy as np
+from finance_engine.core.array_utils import para_inteiros_escalados, dividir_half_up, arredondar_centavos
+from finance_engine.core.conversao import ZERO, para_decimal, quantizar
+from finance_engine.core.math_utils import validate_not_zero
+from finance_engine.core.resultados import Resultado, anexar_json, texto_centavos, tipo_resultado
+
+# Cronogramas de amortização colunares (um array por coluna, valores em centavos).
+# Em vez de percorrer o saldo mês a mês, cada coluna é obtida em forma fechada,
+# o que elimina o acúmulo de erro do PRICE e permite calcular 420 meses com
+# meia dúzia de operações NumPy.
+
+COLUNAS = ("mes", "prestacao", "amortizacao", "juros", "saldo_devedor")
+
+# Valor financiado em décimos de milésimo de real para manter SAC exato
+_CASAS_VALOR = 4
+_ESCALA_VALOR = 10 ** _CASAS_VALOR
+
+# Expoente 1/12 truncado, como sempre usado nas tabelas SAC/PRICE
+_UM_DOZE_AVOS = Decimal('0.0833333333')
+
+
+def taxa_mensal_equivalente(taxa_anual) -> Decimal:
+    """Taxa mensal equivalente: (1 + i)^(1/12) - 1, com i em percentual anual."""
+    i_anual = para_decimal(taxa_anual) / 100
+    return (1 + i_anual) ** _UM_DOZE_AVOS - 1
+
+
+@tipo_resultado
+class LinhaAmortizacao(Resultado):
+    """
+    Um mês do cronograma, com os valores em centavos como no formato colunar.
+    `to_dict`/`to_json` devolvem reais, no formato de `tabela_sac`/`tabela_price`.
+    """
+    mes: int
+    prestacao: int
+    amortizacao: int
+    juros: int
+    saldo_devedor: int
+
+    def to_dict(self, texto=False) -> Dict:
+        if texto:
+            return {"mes": str(self.mes), **{nome: texto_centavos(getattr(self, nome)) for nome in COLUNAS[1:]}}
+        return {
+            "mes": self.mes,
+            "prestacao": Decimal(self.prestacao).scaleb(-2),
+            "amortizacao": Decimal(self.amortizacao).scaleb(-2),
+            "juros": Decimal(self.juros).scaleb(-2),
+            "saldo_devedor": Decimal(self.saldo_devedor).scaleb(-2),
+        }
+
+    def to_json(self, **extras) -> str:
+        corpo = '{"mes":%d,"prestacao":%s,"amortizacao":%s,"juros":%s,"saldo_devedor":%s}' % (
+            self.mes, texto_centavos(self.prestacao), texto_centavos(self.amortizacao),
+            texto_centavos(self.juros), texto_centavos(self.saldo_devedor),
+        )
+        return anexar_json(corpo, extras)
+
+
+class CronogramaAmortizacao:
+    """Tabela de amortização em formato colunar (arrays int64 em centavos)."""
+
+    __slots__ = ("sistema",) + COLUNAS
+
+    def __init__(self, sistema: str, mes, prestacao, amortizacao, juros, saldo_devedor):
+        self.sistema = sistema
+        self.mes = mes
+        self.prestacao = prestacao
+        self.amortizacao = amortizacao
+        self.juros = juros
+        self.saldo_devedor = saldo_devedor
+
+    def __len__(self):
+        return len(self.mes)
+
+    def colunas(self) -> Dict[str, np.ndarray]:
+        """Colunas do cronograma indexadas pelo nome."""
+        return {nome: getattr(self, nome) for nome in COLUNAS}
+
+    def linhas(self) -> List[Dict]:
+        """Visão lista-de-dicionários, no mesmo formato de `tabela_sac`/`tabela_price`."""
+        colunas = [self.mes.tolist()] + [
+            getattr(self, nome).tolist() for nome in COLUNAS[1:]
+        ]
+        return [
+            {
+                "mes": mes,
+                "prestacao": Decimal(prestacao).scaleb(-2),
+                "amortizacao": Decimal(amortizacao).scaleb(-2),
+                "juros": Decimal(juros).scaleb(-2),
+                "saldo_devedor": Decimal(saldo).scaleb(-2),
+            }
+            for mes, prestacao, amortizacao, juros, saldo in zip(*colunas)
+        ]
+
+    def registros(self) -> List[LinhaAmortizacao]:
+        """Linhas como `LinhaAmortizacao` (centavos inteiros, sem um dicionário por mês)."""
+        return [LinhaAmortizacao(*linha) for linha in zip(*(getattr(self, nome).tolist() for nome in COLUNAS))]
+
+    def divergencias(self, tabela: List[Dict]) -> int:
+        """
+        Compara com uma tabela Decimal de referência e retorna a maior
+        diferença encontrada, em centavos.
+        """
+        if len(tabela) != len(self):
+            raise ValueError("A tabela de referência tem outro número de meses.")
+        maior = 0
+        for nome in COLUNAS[1:]:
+            referencia = para_inteiros_escalados([linha[nome] for linha in tabela])
+            maior = max(maior, int(np.abs(referencia - getattr(self, nome)).max(initial=0)))
+        return maior
+
+
+def _intervalo_meses(n: int, inicio: int, fim) -> np.ndarray:
+    validate_not_zero(n, "Prazo")
+    fim = n if fim is None else min(int(fim), n)
+    if inicio < 1:
+        raise ValueError("O mês inicial deve ser maior ou igual a 1.")
+    return np.arange(inicio, max(fim, inicio - 1) + 1, dtype=np.int64)
+
+
+def cronograma_sac(valor_financiado, taxa_anual, meses, inicio=1, fim=None) -> CronogramaAmortizacao:
+    """
+    SAC em forma fechada: amortização e saldo exatos, juros sobre o saldo anterior.
+    `inicio`/`fim` limitam o cálculo a um intervalo de meses (inclusivo).
+    """
+    n = int(meses)
+    mes = _intervalo_meses(n, inicio, fim)
+    i = float(taxa_mensal_equivalente(taxa_anual))
+    V = int(para_inteiros_escalados(valor_financiado, _CASAS_VALOR))
+
+    # Saldo após o mês k: V * (n - k) / n (exato em inteiros)
+    divisor = n * _ESCALA_VALOR // 100
+    saldo = dividir_half_up(V * (n - mes), divisor)
+    empates = np.flatnonzero((2 * V * (n - mes)) % (2 * divisor) == divisor)
+    if empates.size:
+        saldo[empates] = _saldos_sac_decimal(valor_financiado, n, mes[empates])
+    amortizacao = np.full(len(mes), dividir_half_up(V, divisor), dtype=np.int64)
+
+    saldo_anterior = V * (n - mes + 1) / (n * _ESCALA_VALOR)
+    juros = saldo_anterior * i
+    prestacao = V / (n * _ESCALA_VALOR) + juros
+
+    return CronogramaAmortizacao(
+        "SAC", mes, arredondar_centavos(prestacao), amortizacao,
+        arredondar_centavos(juros), np.maximum(saldo, 0)
+    )
+
+
+def _saldos_sac_decimal(valor_financiado, n: int, meses: np.ndarray) -> list:
+    """
+    Saldos exatamente sobre meio centavo: o desempate depende do resíduo de
+    28 dígitos acumulado por `tabela_sac`, então repetimos suas subtrações.
+    """
+    V = para_decimal(valor_financiado)
+    amortizacao = V / n
+    saldo = V
+    alvos = set(meses.tolist())
+    resultado = {}
+    for mes in range(1, int(meses.max()) + 1):
+        saldo -= amortizacao
+        if mes in alvos:
+            resultado[mes] = int(quantizar(max(ZERO, saldo)).scaleb(2))
+    return [resultado[mes] for mes in meses.tolist()]
+
+
+def cronograma_price(valor_financiado, taxa_anual, meses, inicio=1, fim=None) -> CronogramaAmortizacao:
+    """
+    PRICE em forma fechada: saldo_k = V * ((1+i)^n - (1+i)^k) / ((1+i)^n - 1).
+    `inicio`/`fim` limitam o cálculo a um intervalo de meses (inclusivo).
+    """
+    n = int(meses)
+    mes = _intervalo_meses(n, inicio, fim)
+    i = float(taxa_mensal_equivalente(taxa_anual))
+    V = float(para_decimal(valor_financiado))
+
+    # Saldos antes e depois de cada mês do intervalo
+    k = np.arange(inicio - 1, inicio + len(mes), dtype=np.float64)
+    if i == 0:
+        prestacao = V / n
+        saldos = V * (n - k) / n
+    else:
+        fator_n = np.exp(n * np.log1p(i))
+        fatores = np.exp(k * np.log1p(i))
+        prestacao = V * i * fator_n / (fator_n - 1)
+        saldos = V * (fator_n - fatores) / (fator_n - 1)
+
+    juros = saldos[:-1] * i
+    amortizacao = prestacao - juros
+
+    return CronogramaAmortizacao(
+        "PRICE", mes, np.full(len(mes), arredondar_centavos(np.array(prestacao)), dtype=np.int64),
+        arredondar_centavos(amortizacao), arredondar_centavos(juros),
+        arredondar_centavos(np.maximum(saldos[1:], 0))
+    )
+
+
+def precificar_lote(sistema: str, valores, taxas_anuais, meses) -> Dict[str, np.ndarray]:
+    """
+    Precifica milhares de cenários de financiamento de uma vez.
+    Retorna, em centavos, a primeira prestação, o total pago e o total de juros.
+    """
+    V = np.asarray(valores, dtype=np.float64)
+    taxa = np.asarray(taxas_anuais, dtype=np.float64) / 100
+    n = np.asarray(meses, dtype=np.float64)
+    V, taxa, n = np.broadcast_arrays(V, taxa, n)
+    if (n <= 0).any():
+        raise ValueError("Prazo não pode ser zero.")
+
+    i = np.power(1 + taxa, 0.0833333333) - 1
+
+    if sistema.upper() == "SAC":
+        prestacao = V / n + V * i
+        total_juros = i * V * (n + 1) / 2
+    elif sistema.upper() == "PRICE":
+        fator = np.exp(n * np.log1p(i))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            prestacao = np.where(i > 0, V * i * fator / (fator - 1), V / n)
+        total_juros = prestacao * n - V
+    else:
+        raise ValueError(f"Sistema de amortização desconhecido: {sistema}")
+
+    return {
+        "prestacao_inicial": arredondar_centavos(prestacao),
+        "total_pago": arredondar_centavos(V + total_juros),
+        "total_juros": arredondar_centavos(total_juros),
+    }
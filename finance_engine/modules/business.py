@@ -1,6 +1,17 @@
 from decimal import Decimal
 from typing import Dict
-from finance_engine.core.math_utils import to_decimal, validate_not_zero
+from finance_engine.core.conversao import para_decimal, quantizar
+from finance_engine.core.math_utils import validate_not_zero
+from finance_engine.core.resultados import Resultado, tipo_resultado
+
+
+@tipo_resultado
+class PrecoMarkup(Resultado):
+    """Resultado de `BusinessAnalytics.preco_markup`."""
+    preco_venda: Decimal
+    markup_fator: Decimal
+    lucro_nominal: Decimal
+
 
 class BusinessAnalytics:
     """Indicadores de Performance e Precificação Empresarial."""
@@ -8,12 +19,12 @@ class BusinessAnalytics:
     @staticmethod
     def calcular_ebitda(receita_liquida, custos_variaveis, despesas_fixas) -> Decimal:
         """Cálculo simplificado do EBITDA (LAJIDA)."""
-        receita = to_decimal(receita_liquida)
-        custos = to_decimal(custos_variaveis)
-        despesas = to_decimal(despesas_fixas)
+        receita = para_decimal(receita_liquida)
+        custos = para_decimal(custos_variaveis)
+        despesas = para_decimal(despesas_fixas)
         
         ebitda = receita - custos - despesas
-        return to_decimal(ebitda, '0.01')
+        return quantizar(ebitda)
 
     @staticmethod
     def ponto_equilibrio(custos_fixos, margem_contribuicao_percentual) -> Decimal:
@@ -21,24 +32,31 @@ class BusinessAnalytics:
         Calcula o Break-even Point (Ponto de Equilíbrio).
         Receita Necessária = Custos Fixos / Margem de Contribuição %
         """
-        fixos = to_decimal(custos_fixos)
-        margem = to_decimal(margem_contribuicao_percentual) / 100
+        fixos = para_decimal(custos_fixos)
+        margem = para_decimal(margem_contribuicao_percentual) / 100
         
         validate_not_zero(margem, "Margem de contribuição")
         
         be_point = fixos / margem
-        return to_decimal(be_point, '0.01')
+        return quantizar(be_point)
 
     @staticmethod
     def precificacao_markup(custo_unitario, impostos_venda_perc, despesas_venda_perc, margem_lucro_perc) -> Dict:
+        """Preço de venda via Markup Divisor (dicionário; ver `preco_markup`)."""
+        return BusinessAnalytics.preco_markup(
+            custo_unitario, impostos_venda_perc, despesas_venda_perc, margem_lucro_perc
+        ).to_dict()
+
+    @staticmethod
+    def preco_markup(custo_unitario, impostos_venda_perc, despesas_venda_perc, margem_lucro_perc) -> PrecoMarkup:
         """
         Cálculo de Preço de Venda via Markup Divisor.
         Fórmula Preço = Custo / (1 - (Impostos + Despesas + Lucro))
         """
-        custo = to_decimal(custo_unitario)
-        imp = to_decimal(impostos_venda_perc) / 100
-        desp = to_decimal(despesas_venda_perc) / 100
-        lucro = to_decimal(margem_lucro_perc) / 100
+        custo = para_decimal(custo_unitario)
+        imp = para_decimal(impostos_venda_perc) / 100
+        desp = para_decimal(despesas_venda_perc) / 100
+        lucro = para_decimal(margem_lucro_perc) / 100
         
         divisor = 1 - (imp + desp + lucro)
         
@@ -48,8 +66,8 @@ class BusinessAnalytics:
         preco_venda = custo / divisor
         markup_fator = 1 / divisor
         
-        return {
-            "preco_venda": to_decimal(preco_venda, '0.01'),
-            "markup_fator": to_decimal(markup_fator, '0.0000'),
-            "lucro_nominal": to_decimal(preco_venda * lucro, '0.01')
-        }
+        return PrecoMarkup(
+            preco_venda=quantizar(preco_venda),
+            markup_fator=quantizar(markup_fator, '0.0000'),
+            lucro_nominal=quantizar(preco_venda * lucro)
+        )
@@ -0,0 +1,264 @@
+from decimal import Decimal
+from typing import Dict, List
+import numpy as np
+from finance_engine.core.array_utils import dividir_half_up
+from finance_engine.core.conversao import para_decimal
+from finance_engine.modules.business import BusinessAnalytics
+
+# Precificação de catálogos e grades de DRE em aritmética inteira vetorizada.
+# Valores e percentuais entram como inteiros em décimos de milésimo (4 casas),
+# então preço, markup, lucro e ponto de equilíbrio são frações exatas e o
+# arredondamento half-up final reproduz o `quantizar` do BusinessAnalytics.
+# Linhas fora desse caminho (mais de 4 casas, valores enormes, empates no
+# lucro nominal) são recalculadas uma a uma pela função escalar.
+_ESCALA = 10_000
+_CEM_POR_CENTO = 100 * _ESCALA
+# Acima deste módulo, valores em float deixam de ter conversão exata (ver array_utils)
+_LIMITE_FLOAT_EXATO = 1e9
+# Produtos intermediários abaixo disso cabem em int64 mesmo dobrados no half-up
+_LIMITE_PRODUTO = 2.0 ** 61
+
+_ERRO_VALOR = "Valor ausente ou inválido."
+_ERRO_DIVISOR = "As margens e impostos somados igualam ou superam 100%, impossibilitando o lucro."
+_ERRO_MARGEM = "Margem de contribuição não pode ser zero."
+_ERRO_FAIXA = "Valor fora da faixa suportada."
+
+
+def _escalar(valores, n: int):
+    """
+    Converte uma coluna (ou escalar) para int64 em décimos de milésimo.
+    Retorna (inteiros, exatos, invalidos): `exatos` marca o que cabe no caminho
+    vetorizado; `invalidos`, valores ausentes (None/NaN) ou não numéricos.
+    """
+    arr = np.broadcast_to(valores, (n,))
+
+    if arr.dtype.kind in "biu":
+        exatos = np.abs(arr) < _LIMITE_FLOAT_EXATO
+        return np.where(exatos, arr, 0).astype(np.int64) * _ESCALA, exatos, np.zeros(n, dtype=bool)
+
+    if arr.dtype.kind == "f":
+        finitos = np.isfinite(arr)
+        limpo = np.where(finitos, arr, 0.0)
+        k = np.rint(limpo * _ESCALA)
+        exatos = finitos & (np.abs(limpo) < _LIMITE_FLOAT_EXATO) & (k / _ESCALA == limpo)
+        return np.where(exatos, k, 0).astype(np.int64), exatos, ~finitos
+
+    # Decimal, texto ou mistura: conversão elemento a elemento
+    inteiros = np.zeros(n, dtype=np.int64)
+    exatos = np.zeros(n, dtype=bool)
+    invalidos = np.zeros(n, dtype=bool)
+    for idx, valor in enumerate(arr.tolist()):
+        try:
+            d = None if valor is None else para_decimal(valor)
+        except ArithmeticError:
+            d = None
+        if d is None or not d.is_finite():
+            invalidos[idx] = True
+            continue
+        escalado = d.scaleb(4)
+        if abs(d) < _LIMITE_FLOAT_EXATO and escalado == escalado.to_integral_value():
+            inteiros[idx] = int(escalado)
+            exatos[idx] = True
+    return inteiros, exatos, invalidos
+
+
+def _tamanho(*colunas: np.ndarray) -> int:
+    formas = [c.shape for c in colunas]
+    try:
+        return int(np.broadcast_shapes(*formas, (1,))[0])
+    except ValueError:
+        tamanhos = sorted({forma[0] for forma in formas if forma})
+        raise ValueError(f"Colunas com tamanhos diferentes: {tamanhos}.") from None
+
+
+def _colunas(*valores) -> List[np.ndarray]:
+    return [np.asarray(v) for v in valores]
+
+
+def _elemento(valores: np.ndarray, idx: int):
+    """Valor original da linha `idx` (coluna ou escalar), para a função escalar."""
+    valor = valores[()] if valores.ndim == 0 else valores[idx]
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _empate(numerador: np.ndarray, denominador: np.ndarray) -> np.ndarray:
+    """Linhas em que o quociente exato cai exatamente na metade do centavo."""
+    return 2 * (np.abs(numerador) % np.abs(denominador)) == np.abs(denominador)
+
+
+def _centavos(valor: Decimal, casas=2) -> int:
+    inteiro = int(valor.scaleb(casas))
+    if abs(inteiro) >= 2 ** 63:
+        raise OverflowError
+    return inteiro
+
+
+class BatchBusiness:
+    """
+    Versões em lote de `BusinessAnalytics` para catálogos e filiais. Cada
+    método aceita colunas (listas/arrays, escalares são repetidos) e devolve
+    colunas int64, a máscara `valido` e `erros` ({linha: mensagem}) no lugar de
+    um ValueError que abortaria o lote inteiro.
+    """
+
+    @staticmethod
+    def precificar_lote(custos_unitarios, impostos_venda_perc=0, despesas_venda_perc=0,
+                        margens_lucro_perc=0) -> Dict:
+        """
+        `precificacao_markup` vetorizado: preço e lucro nominal em centavos,
+        fator de markup em décimos de milésimo (4 casas).
+        """
+        custos_unitarios, impostos_venda_perc, despesas_venda_perc, margens_lucro_perc = _colunas(
+            custos_unitarios, impostos_venda_perc, despesas_venda_perc, margens_lucro_perc
+        )
+        n = _tamanho(custos_unitarios, impostos_venda_perc, despesas_venda_perc, margens_lucro_perc)
+        custo, ok_c, inv_c = _escalar(custos_unitarios, n)
+        imp, ok_i, inv_i = _escalar(impostos_venda_perc, n)
+        desp, ok_d, inv_d = _escalar(despesas_venda_perc, n)
+        lucro, ok_l, inv_l = _escalar(margens_lucro_perc, n)
+        invalidos = inv_c | inv_i | inv_d | inv_l
+
+        # divisor = 1 - (imp + desp + lucro)/100 = divisor_int / 10^6
+        divisor = _CEM_POR_CENTO - (imp + desp + lucro)
+        sem_lucro = divisor <= 0
+        seguro = np.where(sem_lucro, 1, divisor)
+
+        # preco = custo / divisor; lucro = preco * margem, ambos em centavos
+        num_preco = custo * _ESCALA
+        num_lucro = custo * lucro
+        den_lucro = 100 * seguro
+        rapido = (
+            ok_c & ok_i & ok_d & ok_l & ~invalidos
+            & (np.abs(custo.astype(float)) * np.maximum(np.abs(lucro.astype(float)), _ESCALA) < _LIMITE_PRODUTO)
+        )
+        # No empate do lucro o escalar parte do preço já arredondado em 28 dígitos,
+        # que pode cair de um lado ou de outro da metade: fica com a função escalar
+        rapido &= sem_lucro | ~_empate(num_lucro, den_lucro)
+
+        resultado = {
+            "preco_venda": dividir_half_up(num_preco, seguro),
+            "markup_fator": dividir_half_up(np.full(n, _CEM_POR_CENTO * _ESCALA, dtype=np.int64), seguro),
+            "lucro_nominal": dividir_half_up(num_lucro, den_lucro),
+        }
+        erros = {int(i): _ERRO_VALOR for i in np.flatnonzero(invalidos)}
+        erros.update({int(i): _ERRO_DIVISOR for i in np.flatnonzero(rapido & sem_lucro)})
+
+        for idx in np.flatnonzero(~rapido & ~invalidos):
+            try:
+                preco = BusinessAnalytics.preco_markup(
+                    _elemento(custos_unitarios, idx), _elemento(impostos_venda_perc, idx),
+                    _elemento(despesas_venda_perc, idx), _elemento(margens_lucro_perc, idx),
+                )
+                valores = (_centavos(preco.preco_venda), _centavos(preco.markup_fator, 4),
+                           _centavos(preco.lucro_nominal))
+            except OverflowError:
+                erros[int(idx)] = _ERRO_FAIXA
+                continue
+            except (ValueError, ArithmeticError) as e:
+                erros[int(idx)] = str(e)
+                continue
+            for nome, valor in zip(("preco_venda", "markup_fator", "lucro_nominal"), valores):
+                resultado[nome][idx] = valor
+
+        return BatchBusiness._fechar(resultado, erros, n)
+
+    @staticmethod
+    def ponto_equilibrio_lote(custos_fixos, margens_contribuicao_percentual) -> Dict:
+        """`ponto_equilibrio` vetorizado (receita necessária em centavos)."""
+        custos_fixos, margens_contribuicao_percentual = _colunas(custos_fixos, margens_contribuicao_percentual)
+        n = _tamanho(custos_fixos, margens_contribuicao_percentual)
+        fixos, ok_f, inv_f = _escalar(custos_fixos, n)
+        margem, ok_m, inv_m = _escalar(margens_contribuicao_percentual, n)
+        invalidos = inv_f | inv_m
+
+        # fixos / (margem/100) = 100 * fixos / margem reais = 10^4 * fixos / margem centavos
+        sem_margem = margem == 0
+        rapido = ok_f & ok_m & ~invalidos & (np.abs(fixos.astype(float)) * _ESCALA < _LIMITE_PRODUTO)
+        resultado = {
+            "ponto_equilibrio": dividir_half_up(fixos * _ESCALA, np.where(sem_margem, 1, margem)),
+        }
+        erros = {int(i): _ERRO_VALOR for i in np.flatnonzero(invalidos)}
+        erros.update({int(i): _ERRO_MARGEM for i in np.flatnonzero(rapido & sem_margem)})
+
+        for idx in np.flatnonzero(~rapido & ~invalidos):
+            try:
+                ponto = BusinessAnalytics.ponto_equilibrio(
+                    _elemento(custos_fixos, idx), _elemento(margens_contribuicao_percentual, idx)
+                )
+                resultado["ponto_equilibrio"][idx] = _centavos(ponto)
+            except OverflowError:
+                erros[int(idx)] = _ERRO_FAIXA
+            except (ValueError, ArithmeticError) as e:
+                erros[int(idx)] = str(e)
+
+        return BatchBusiness._fechar(resultado, erros, n)
+
+    @staticmethod
+    def ebitda_lote(receitas_liquidas, custos_variaveis, despesas_fixas) -> Dict:
+        """`calcular_ebitda` vetorizado (centavos)."""
+        receitas_liquidas, custos_variaveis, despesas_fixas = _colunas(
+            receitas_liquidas, custos_variaveis, despesas_fixas
+        )
+        n = _tamanho(receitas_liquidas, custos_variaveis, despesas_fixas)
+        receita, ok_r, inv_r = _escalar(receitas_liquidas, n)
+        custos, ok_c, inv_c = _escalar(custos_variaveis, n)
+        despesas, ok_d, inv_d = _escalar(despesas_fixas, n)
+        invalidos = inv_r | inv_c | inv_d
+        rapido = ok_r & ok_c & ok_d & ~invalidos
+
+        resultado = {"ebitda": dividir_half_up(receita - custos - despesas, _ESCALA // 100)}
+        erros = {int(i): _ERRO_VALOR for i in np.flatnonzero(invalidos)}
+
+        for idx in np.flatnonzero(~rapido & ~invalidos):
+            try:
+                ebitda = BusinessAnalytics.calcular_ebitda(
+                    _elemento(receitas_liquidas, idx), _elemento(custos_variaveis, idx),
+                    _elemento(despesas_fixas, idx),
+                )
+                resultado["ebitda"][idx] = _centavos(ebitda)
+            except OverflowError:
+                erros[int(idx)] = _ERRO_FAIXA
+            except (ValueError, ArithmeticError) as e:
+                erros[int(idx)] = str(e)
+
+        return BatchBusiness._fechar(resultado, erros, n)
+
+    @staticmethod
+    def precificar_tabela(tabela, custo="custo_unitario", impostos="impostos_venda_perc",
+                          despesas="despesas_venda_perc", margem="margem_lucro_perc") -> Dict:
+        """
+        `precificar_lote` a partir de um DataFrame (ou dicionário de colunas).
+        Colunas de percentual ausentes contam como zero.
+        """
+        def coluna(nome):
+            if nome not in tabela:
+                return 0
+            valores = tabela[nome]
+            return valores.to_numpy() if hasattr(valores, "to_numpy") else valores
+
+        return BatchBusiness.precificar_lote(coluna(custo), coluna(impostos), coluna(despesas), coluna(margem))
+
+    @staticmethod
+    def _fechar(resultado: Dict, erros: Dict[int, str], n: int) -> Dict:
+        valido = np.ones(n, dtype=bool)
+        valido[list(erros)] = False
+        for coluna in resultado.values():
+            coluna[~valido] = 0
+        resultado["valido"] = valido
+        resultado["erros"] = dict(sorted(erros.items()))
+        return resultado
+
+    @staticmethod
+    def colunas_para_json(lote: Dict, casas: Dict[str, int] = None) -> Dict:
+        """
+        Colunas em reais (float; null nas linhas com erro) e a lista de erros,
+        no formato das respostas colunares da API.
+        """
+        casas = casas or {}
+        valido = lote["valido"]
+        colunas = {
+            nome: np.where(valido, valores / 10 ** casas.get(nome, 2), np.nan)
+            for nome, valores in lote.items() if nome not in ("valido", "erros")
+        }
+        erros: List[Dict] = [{"linha": linha, "erro": erro} for linha, erro in lote["erros"].items()]
+        return {"total": int(valido.size), "com_erro": len(erros), "colunas": colunas, "erros": erros}
@@ -0,0 +1,56 @@
+import itertools
+from typing import Dict, List, Tuple
+from finance_engine.core.cache import memoizar
+from finance_engine.modules.amortization import LinhaAmortizacao
+from finance_engine.modules.calculator import FinancialCalculator
+from finance_engine.modules.payroll import CustoEmpresa, FolhaDetalhada, PayrollManager
+
+
+class CalculosEmCache:
+    """Versões em cache dos cálculos determinísticos servidos pela API."""
+
+    # Os resultados tipados são imutáveis: o cache os devolve sem cópia, e as
+    # versões em dicionário montam um dicionário novo a cada chamada.
+
+    @staticmethod
+    @memoizar("folha_detalhada")
+    def folha_detalhada(salario_bruto, dependentes=0, outros_descontos=0, beneficios=0, ano=None) -> FolhaDetalhada:
+        return PayrollManager.folha_detalhada(
+            salario_bruto, dependentes=dependentes, outros_descontos=outros_descontos,
+            beneficios=beneficios, ano=ano
+        )
+
+    @staticmethod
+    def calcular_folha_detalhada(salario_bruto, dependentes=0, outros_descontos=0, beneficios=0, ano=None) -> Dict:
+        return CalculosEmCache.folha_detalhada(
+            salario_bruto, dependentes=dependentes, outros_descontos=outros_descontos,
+            beneficios=beneficios, ano=ano
+        ).to_dict()
+
+    @staticmethod
+    @memoizar("custo_empresa")
+    def custo_empresa(salario_bruto, rat=0.02, sistema_s=0.058) -> CustoEmpresa:
+        return PayrollManager.custo_empresa(salario_bruto, rat=rat, sistema_s=sistema_s)
+
+    @staticmethod
+    def custo_total_empresa(salario_bruto, rat=0.02, sistema_s=0.058) -> Dict:
+        return CalculosEmCache.custo_empresa(salario_bruto, rat=rat, sistema_s=sistema_s).to_dict()
+
+    @staticmethod
+    @memoizar("tabela_sac")
+    def tabela_sac(valor_financiado, taxa_anual, meses) -> List[Dict]:
+        return FinancialCalculator.tabela_sac(valor_financiado, taxa_anual, meses)
+
+    @staticmethod
+    @memoizar("tabela_price")
+    def tabela_price(valor_financiado, taxa_anual, meses) -> List[Dict]:
+        return FinancialCalculator.tabela_price(valor_financiado, taxa_anual, meses)
+
+    @staticmethod
+    @memoizar("pagina_amortizacao")
+    def pagina_amortizacao(sistema, valor_financiado, taxa_anual, meses, inicio, tamanho) -> Tuple[LinhaAmortizacao, ...]:
+        """Uma página (a partir do mês `inicio`) da tabela SAC ou PRICE."""
+        geradores = {"SAC": FinancialCalculator.iter_sac, "PRICE": FinancialCalculator.iter_price}
+        linhas = geradores[sistema](valor_financiado, taxa_anual, meses, inicio=inicio, bloco=tamanho, tipado=True)
+        # Tupla de linhas imutáveis: compartilhada pelo cache sem cópia
+        return tuple(itertools.islice(linhas, tamanho))
@@ -1,6 +1,9 @@
 from decimal import Decimal
-from typing import List, Dict
-from finance_engine.core.math_utils import to_decimal, validate_positive, validate_not_zero
+from typing import List, Dict, Iterator
+from finance_engine.core.conversao import ZERO, para_decimal, quantizar
+from finance_engine.core.math_utils import validate_positive, validate_not_zero
+from finance_engine.modules import amortization, irr
+from finance_engine.modules.amortization import CronogramaAmortizacao, taxa_mensal_equivalente
 
 class FinancialCalculator:
     """Calculadora de Engenharia Financeira de Alta Precisão."""
@@ -11,10 +14,10 @@ class FinancialCalculator:
         Cálculo de Juros Compostos com Aportes Mensais.
         Fórmula: M = P(1 + i)^n + A * (((1 + i)^n - 1) / i)
         """
-        P = to_decimal(principal)
-        i = to_decimal(taxa_mensal)
+        P = para_decimal(principal)
+        i = para_decimal(taxa_mensal)
         n = int(meses)
-        A = to_decimal(aporte_mensal)
+        A = para_decimal(aporte_mensal)
 
         validate_positive(P, "Montante inicial")
         validate_positive(i, "Taxa")
@@ -36,18 +39,17 @@ class FinancialCalculator:
         juros_ganhos = total - (P + (A * n))
 
         return {
-            "montante_total": to_decimal(total, '0.01'),
-            "total_investido": to_decimal(P + (A * n), '0.01'),
-            "juros_ganhos": to_decimal(juros_ganhos, '0.01')
+            "montante_total": quantizar(total),
+            "total_investido": quantizar(P + (A * n)),
+            "juros_ganhos": quantizar(juros_ganhos)
         }
 
     @staticmethod
     def tabela_sac(valor_financiado, taxa_anual, meses) -> List[Dict]:
         """Gera tabela de amortização Sistema de Amortização Constante."""
-        V = to_decimal(valor_financiado)
+        V = para_decimal(valor_financiado)
         n = int(meses)
-        i_anual = to_decimal(taxa_anual) / 100
-        i_mensal = (1 + i_anual) ** to_decimal('0.0833333333') - 1 # (1+i)^(1/12)-1
+        i_mensal = taxa_mensal_equivalente(taxa_anual) # (1+i)^(1/12)-1
 
         amortizacao = V / n
         saldo_devedor = V
@@ -60,10 +62,10 @@ class FinancialCalculator:
             
             tabela.append({
                 "mes": mes,
-                "prestacao": to_decimal(prestacao, '0.01'),
-                "amortizacao": to_decimal(amortizacao, '0.01'),
-                "juros": to_decimal(juros, '0.01'),
-                "saldo_devedor": to_decimal(max(0, saldo_devedor), '0.01')
+                "prestacao": quantizar(prestacao),
+                "amortizacao": quantizar(amortizacao),
+                "juros": quantizar(juros),
+                "saldo_devedor": quantizar(max(ZERO, saldo_devedor))
             })
         
         return tabela
@@ -71,10 +73,9 @@ class FinancialCalculator:
     @staticmethod
     def tabela_price(valor_financiado, taxa_anual, meses) -> List[Dict]:
         """Gera tabela de amortização Sistema PRICE (Prestações Iguais)."""
-        V = to_decimal(valor_financiado)
+        V = para_decimal(valor_financiado)
         n = int(meses)
-        i_anual = to_decimal(taxa_anual) / 100
-        i_mensal = (1 + i_anual) ** to_decimal('0.0833333333') - 1
+        i_mensal = taxa_mensal_equivalente(taxa_anual)
 
         # Fórmula Prestação: PMT = V * [ (i * (1+i)^n) / ((1+i)^n - 1) ]
         fator = (1 + i_mensal) ** n
@@ -90,41 +91,97 @@ class FinancialCalculator:
 
             tabela.append({
                 "mes": mes,
-                "prestacao": to_decimal(prestacao, '0.01'),
-                "amortizacao": to_decimal(amortizacao, '0.01'),
-                "juros": to_decimal(juros, '0.01'),
-                "saldo_devedor": to_decimal(max(0, saldo_devedor), '0.01')
+                "prestacao": quantizar(prestacao),
+                "amortizacao": quantizar(amortizacao),
+                "juros": quantizar(juros),
+                "saldo_devedor": quantizar(max(ZERO, saldo_devedor))
             })
 
         return tabela
 
+    @staticmethod
+    def cronograma_sac(valor_financiado, taxa_anual, meses, verificar=False) -> CronogramaAmortizacao:
+        """
+        Tabela SAC colunar (arrays em centavos) calculada em forma fechada.
+        Com `verificar=True`, confere cada célula contra `tabela_sac` em Decimal.
+        """
+        cronograma = amortization.cronograma_sac(valor_financiado, taxa_anual, meses)
+        if verificar:
+            FinancialCalculator._verificar(
+                cronograma, FinancialCalculator.tabela_sac(valor_financiado, taxa_anual, meses)
+            )
+        return cronograma
+
+    @staticmethod
+    def cronograma_price(valor_financiado, taxa_anual, meses, verificar=False) -> CronogramaAmortizacao:
+        """
+        Tabela PRICE colunar (arrays em centavos) calculada em forma fechada.
+        Com `verificar=True`, confere cada célula contra `tabela_price` em Decimal.
+        """
+        cronograma = amortization.cronograma_price(valor_financiado, taxa_anual, meses)
+        if verificar:
+            FinancialCalculator._verificar(
+                cronograma, FinancialCalculator.tabela_price(valor_financiado, taxa_anual, meses)
+            )
+        return cronograma
+
+    @staticmethod
+    def _verificar(cronograma: CronogramaAmortizacao, tabela: List[Dict], tolerancia_centavos=1):
+        divergencia = cronograma.divergencias(tabela)
+        if divergencia > tolerancia_centavos:
+            raise ValueError(
+                f"Cronograma {cronograma.sistema} diverge da referência Decimal em {divergencia} centavos."
+            )
+
+    @staticmethod
+    def iter_sac(valor_financiado, taxa_anual, meses, inicio=1, bloco=60, tipado=False) -> Iterator[Dict]:
+        """
+        Gerador das linhas da tabela SAC a partir do mês `inicio`, sem materializar
+        a tabela inteira: cada bloco de meses é obtido em forma fechada.
+        Com `tipado=True`, produz `LinhaAmortizacao` (centavos) em vez de dicionários.
+        """
+        return FinancialCalculator._iterar(amortization.cronograma_sac, valor_financiado, taxa_anual, meses, inicio, bloco, tipado)
+
+    @staticmethod
+    def iter_price(valor_financiado, taxa_anual, meses, inicio=1, bloco=60, tipado=False) -> Iterator[Dict]:
+        """
+        Gerador das linhas da tabela PRICE a partir do mês `inicio`, sem materializar
+        a tabela inteira: cada bloco de meses é obtido em forma fechada.
+        Com `tipado=True`, produz `LinhaAmortizacao` (centavos) em vez de dicionários.
+        """
+        return FinancialCalculator._iterar(amortization.cronograma_price, valor_financiado, taxa_anual, meses, inicio, bloco, tipado)
+
+    @staticmethod
+    def _iterar(cronograma, valor_financiado, taxa_anual, meses, inicio, bloco, tipado=False) -> Iterator:
+        n = int(meses)
+        validate_not_zero(n, "Prazo")
+        for primeiro in range(int(inicio), n + 1, bloco):
+            parte = cronograma(valor_financiado, taxa_anual, n, inicio=primeiro, fim=primeiro + bloco - 1)
+            yield from (parte.registros() if tipado else parte.linhas())
+
+    @staticmethod
+    def precificar_lote(sistema, valores, taxas_anuais, meses) -> Dict:
+        """Prestação inicial, total pago e total de juros para vários cenários (centavos)."""
+        return amortization.precificar_lote(sistema, valores, taxas_anuais, meses)
+
     @staticmethod
     def vpl(taxa_desconto, fluxos: List[float]) -> Decimal:
         """Calcula o Valor Presente Líquido."""
-        i = to_decimal(taxa_desconto) / 100
+        i = para_decimal(taxa_desconto) / 100
         total = Decimal('0')
         for t, cf in enumerate(fluxos):
-            total += to_decimal(cf) / ((1 + i) ** t)
-        return to_decimal(total, '0.01')
+            total += para_decimal(cf) / ((1 + i) ** t)
+        return quantizar(total)
 
     @staticmethod
-    def tir(fluxos: List[float], estimativa=0.1) -> Decimal:
-        """Calcula a Taxa Interna de Retorno usando Newton-Raphson approximation."""
-        # Simplificação: Em um ambiente real usaríamos scipy.optimize.irr
-        # Mas manteremos o core em pure Python/Decimal para precisão
-        def npv(rate):
-            return sum(to_decimal(cf) / ((1 + to_decimal(rate)) ** t) for t, cf in enumerate(fluxos))
-
-        def d_npv(rate):
-            return sum(to_decimal(-t * cf) / ((1 + to_decimal(rate)) ** (t + 1)) for t, cf in enumerate(fluxos))
-
-        rate = to_decimal(estimativa)
-        for _ in range(100):
-            current_npv = npv(rate)
-            if abs(current_npv) < 0.0001:
-                return to_decimal(rate * 100, '0.0001')
-            diff = d_npv(rate)
-            if diff == 0: break
-            rate = rate - (current_npv / diff)
-        
-        return to_decimal(rate * 100, '0.0001')
+    def tir(fluxos: List[float], estimativa=0.1, refinar=False) -> Decimal:
+        """
+        Calcula a Taxa Interna de Retorno (% ao período).
+        Newton protegido por bissecção (ver `irr`); `refinar=True` conclui em Decimal.
+        """
+        return quantizar(irr.tir(fluxos, estimativa, refinar) * 100, '0.0001')
+
+    @staticmethod
+    def tir_lote(projetos, estimativa=0.1):
+        """TIR (% ao período, float) de muitos projetos; NaN onde não há TIR."""
+        return irr.tir_lote(projetos, estimativa) * 100
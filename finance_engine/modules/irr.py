@@ -0,0 +1,157 @@
+from decimal import Decimal
+from typing import Callable, Sequence, Tuple
+import numpy as np
+from finance_engine.core.conversao import para_decimal
+
+# Motor de VPL/TIR. Com x = 1/(1+r), o VPL é o polinômio p(x) = Σ cf_t·x^t,
+# avaliado pelo esquema de Horner, e dVPL/dr = p'(x)·(-x²). A raiz é buscada
+# por Newton protegido: primeiro se encontra um intervalo com troca de sinal
+# e todo passo de Newton que sai dele (ou não converge) vira uma bissecção.
+
+# Taxas (fração) onde se procura a troca de sinal do VPL
+_GRADE = np.array([
+    -0.99, -0.9, -0.75, -0.5, -0.25, -0.1, 0.0, 0.02, 0.05, 0.1, 0.15,
+    0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 100.0,
+])
+
+Avaliador = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+def avaliador_fluxo(fluxos: Sequence) -> Avaliador:
+    """
+    VPL e derivada de um único projeto para um vetor de taxas: as potências
+    x^t são calculadas uma vez por taxa e um único produto matricial com
+    [cf_t, t·cf_t] devolve as duas grandezas.
+    """
+    cf = np.asarray(fluxos, dtype=np.float64)
+    t = np.arange(len(cf), dtype=np.float64)
+    coeficientes = np.column_stack((cf, t * cf))
+
+    def avaliar(taxas):
+        x = 1.0 / (1.0 + taxas)
+        with np.errstate(over="ignore", invalid="ignore"):
+            vpl, momento = ((x[:, None] ** t) @ coeficientes).T
+        return vpl, -momento * x
+    return avaliar
+
+
+def avaliador_lote(matriz: np.ndarray) -> Avaliador:
+    """
+    VPL e derivada de vários projetos (uma linha por projeto, com uma taxa
+    por linha) numa única passagem de Horner sobre o eixo do tempo.
+    """
+    def avaliar(taxas):
+        x = 1.0 / (1.0 + taxas)
+        p = np.zeros(matriz.shape[0])
+        dp = np.zeros(matriz.shape[0])
+        with np.errstate(over="ignore", invalid="ignore"):
+            for coluna in matriz.T[::-1]:
+                dp = dp * x + p
+                p = p * x + coluna
+            return p, dp * -(x * x)
+    return avaliar
+
+
+def resolver(avaliar: Avaliador, n: int, estimativa=0.1, tolerancia=1e-12, max_iter=100) -> np.ndarray:
+    """
+    Newton protegido por bissecção para `n` problemas simultâneos.
+    Retorna as taxas (fração); NaN onde o VPL não troca de sinal.
+    """
+    with np.errstate(invalid="ignore"):
+        valores = np.stack([avaliar(np.full(n, g))[0] for g in _GRADE], axis=1)
+
+    # Intervalo com troca de sinal mais próximo da estimativa
+    sinais = np.sign(valores)
+    troca = sinais[:, :-1] * sinais[:, 1:] < 0
+    distancia = np.where(troca, np.abs((_GRADE[:-1] + _GRADE[1:]) / 2 - estimativa), np.inf)
+    k = np.argmin(distancia, axis=1)
+    linhas = np.arange(n)
+    tem_intervalo = np.isfinite(distancia[linhas, k])
+
+    baixo = _GRADE[k].copy()
+    alto = _GRADE[k + 1].copy()
+    f_baixo = valores[linhas, k]
+    taxa = np.where((estimativa > baixo) & (estimativa < alto), estimativa, (baixo + alto) / 2)
+
+    # Raízes exatamente sobre a grade (ex.: fluxos que somam zero -> TIR 0%)
+    distancia_zero = np.where(sinais == 0, np.abs(_GRADE - estimativa), np.inf)
+    j = np.argmin(distancia_zero, axis=1)
+    com_zero = np.isfinite(distancia_zero[linhas, j]) & (distancia_zero[linhas, j] <= distancia[linhas, k])
+    taxa[com_zero] = _GRADE[j[com_zero]]
+    ativos = tem_intervalo & ~com_zero
+
+    for _ in range(max_iter):
+        if not ativos.any():
+            break
+        f, df = avaliar(taxa)
+        mesmo_sinal = np.sign(f) == np.sign(f_baixo)
+        baixo = np.where(ativos & mesmo_sinal, taxa, baixo)
+        f_baixo = np.where(ativos & mesmo_sinal, f, f_baixo)
+        alto = np.where(ativos & ~mesmo_sinal, taxa, alto)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = taxa - f / df
+        fora = ~np.isfinite(newton) | (newton <= np.minimum(baixo, alto)) | (newton >= np.maximum(baixo, alto))
+        proxima = np.where(fora, (baixo + alto) / 2, newton)
+
+        convergiu = (np.abs(proxima - taxa) <= tolerancia * (1 + np.abs(taxa))) | (f == 0)
+        taxa = np.where(ativos, proxima, taxa)
+        ativos &= ~convergiu
+
+    return np.where(tem_intervalo | com_zero, taxa, np.nan)
+
+
+def refinar_decimal(fluxos: Sequence, taxa: float, iteracoes=3) -> Decimal:
+    """Poucos passos de Newton em Decimal a partir da raiz em float."""
+    cf = [para_decimal(c) for c in fluxos]
+    r = para_decimal(repr(float(taxa)))
+    for _ in range(iteracoes):
+        x = 1 / (1 + r)
+        p = dp = Decimal('0')
+        for c in reversed(cf):
+            dp = dp * x + p
+            p = p * x + c
+        derivada = -dp * x * x
+        if derivada == 0:
+            break
+        passo = p / derivada
+        r -= passo
+        if abs(passo) < Decimal('1e-24'):
+            break
+    return r
+
+
+def tir(fluxos: Sequence, estimativa=0.1, refinar=False) -> Decimal:
+    """TIR (fração) de um projeto; ValueError se o VPL não trocar de sinal."""
+    taxa = resolver(avaliador_fluxo(fluxos), 1, estimativa)[0]
+    if np.isnan(taxa):
+        raise ValueError("Não foi possível encontrar a TIR: o VPL não troca de sinal.")
+    if refinar:
+        return refinar_decimal(fluxos, taxa)
+    return para_decimal(repr(float(taxa)))
+
+
+def matriz_fluxos(projetos) -> np.ndarray:
+    """Empilha projetos de tamanhos diferentes, completando com zeros no fim."""
+    if len(projetos) == 0:
+        raise ValueError("Informe ao menos um projeto.")
+    if isinstance(projetos, np.ndarray) and projetos.ndim == 2:
+        return projetos.astype(np.float64)
+    tamanho = max(len(p) for p in projetos)
+    matriz = np.zeros((len(projetos), tamanho))
+    for i, fluxos in enumerate(projetos):
+        matriz[i, :len(fluxos)] = np.asarray(fluxos, dtype=np.float64)
+    return matriz
+
+
+def tir_lote(projetos, estimativa=0.1) -> np.ndarray:
+    """TIR (fração) de muitos projetos numa chamada; NaN onde não há TIR."""
+    matriz = matriz_fluxos(projetos)
+    return resolver(avaliador_lote(matriz), matriz.shape[0], estimativa)
+
+
+def vpl_lote(projetos, taxas) -> np.ndarray:
+    """VPL de muitos projetos (taxa em fração, escalar ou uma por projeto)."""
+    matriz = matriz_fluxos(projetos)
+    taxas = np.broadcast_to(np.asarray(taxas, dtype=np.float64), (matriz.shape[0],))
+    return avaliador_lote(matriz)(taxas)[0]
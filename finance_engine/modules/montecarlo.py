@@ -0,0 +1,214 @@
+import csv
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+
+# Simulação estocástica de investimento e dívida. Cada caminho sorteia, mês a
+# mês, uma taxa de juros e uma inflação (lognormal correlacionada ou bootstrap
+# de um histórico IPCA/Selic) e acumula, de forma vetorizada sobre os caminhos:
+#   - patrimônio: (saldo + aporte) * (1 + taxa), como no investimento da API;
+#   - dívida pós-fixada: taxa do mês + spread, prestação PRICE recalculada
+#     sobre o prazo restante.
+# Os caminhos são divididos em blocos de tamanho fixo, cada um com a sua
+# semente derivada de SeedSequence.spawn: o resultado depende só da semente
+# e do número de caminhos, não da quantidade de processos.
+
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+TAMANHO_BLOCO = 100_000
+SERIES = ("patrimonio", "patrimonio_real", "saldo_devedor")
+
+
+def carregar_historico(caminho: str) -> Dict[str, List[float]]:
+    """
+    Lê um CSV com colunas `selic` e `ipca` (taxas mensais em %, ponto ou
+    vírgula decimal; separador `,` ou `;`). Demais colunas são ignoradas.
+    """
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+        leitor = csv.DictReader(arquivo, dialect=dialeto)
+        colunas = {c.strip().lower(): c for c in (leitor.fieldnames or [])}
+        if "selic" not in colunas or "ipca" not in colunas:
+            raise ValueError("O histórico precisa das colunas 'selic' e 'ipca'.")
+        selic, ipca = [], []
+        for linha in leitor:
+            selic.append(float(linha[colunas["selic"]].replace(",", ".")))
+            ipca.append(float(linha[colunas["ipca"]].replace(",", ".")))
+    if not selic:
+        raise ValueError("O histórico está vazio.")
+    return {"selic": selic, "ipca": ipca}
+
+
+def _sorteador(parametros: Dict, rng: np.random.Generator, n: int):
+    """
+    Devolve uma função que sorteia os log-fatores de um mês, log(1 + taxa) e
+    log(1 + inflação): trabalhar em log evita um log1p por caminho e por mês.
+    """
+    historico = parametros.get("historico")
+    if historico is not None:
+        selic = np.log1p(np.asarray(historico["selic"], dtype=np.float64) / 100)
+        ipca = np.log1p(np.asarray(historico["ipca"], dtype=np.float64) / 100)
+
+        def sortear():
+            # Bootstrap: o mês inteiro (taxa e inflação) é reamostrado junto
+            meses = rng.integers(0, len(selic), n)
+            return selic[meses], ipca[meses]
+        return sortear
+
+    media = parametros["taxa_media"] / 100
+    volatilidade = parametros["volatilidade"] / 100
+    inflacao_media = parametros["inflacao_media"] / 100
+    inflacao_vol = parametros["inflacao_vol"] / 100
+    correlacao = parametros["correlacao"]
+
+    # log(1 + r) ~ Normal com média ajustada para que E[1 + r] = 1 + média
+    s_taxa = volatilidade / (1 + media)
+    s_inflacao = inflacao_vol / (1 + inflacao_media)
+    mu_taxa = np.log1p(media) - s_taxa ** 2 / 2
+    mu_inflacao = np.log1p(inflacao_media) - s_inflacao ** 2 / 2
+    complemento = np.sqrt(1 - correlacao ** 2)
+
+    def sortear():
+        z1 = rng.standard_normal(n)
+        z2 = rng.standard_normal(n)
+        z2 *= complemento
+        z2 += correlacao * z1
+        return mu_taxa + s_taxa * z1, mu_inflacao + s_inflacao * z2
+    return sortear
+
+
+def _simular_bloco(parametros: Dict, semente: np.random.SeedSequence, n: int) -> Dict:
+    """Executado no processo worker: simula `n` caminhos e devolve os percentis."""
+    rng = np.random.default_rng(semente)
+    sortear = _sorteador(parametros, rng, n)
+    meses = parametros["meses"]
+    marcos = set(parametros["marcos"])
+    percentis = parametros["percentis"]
+    prazo = parametros["prazo_financiamento"]
+    log_spread = np.log1p(parametros["spread_anual"] / 100) / 12
+    aporte = parametros["aporte_mensal"]
+
+    patrimonio = np.full(n, float(parametros["principal"]))
+    log_deflator = np.zeros(n)
+    saldo = np.full(n, float(parametros["valor_financiado"]))
+    saida = {serie: [] for serie in SERIES}
+
+    for mes in range(1, meses + 1):
+        log_taxa, log_inflacao = sortear()
+        patrimonio += aporte
+        patrimonio *= np.exp(log_taxa)
+        log_deflator += log_inflacao
+
+        if mes <= prazo:
+            # Prestação PRICE sobre o prazo restante: saldo * j / (1 - (1 + j)^-restante)
+            log_juros = log_taxa + log_spread
+            juros = np.expm1(log_juros)
+            restante = prazo - mes + 1
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fator = juros / -np.expm1(-restante * log_juros)
+            if not np.all(np.isfinite(fator)):
+                fator = np.where(np.isfinite(fator), fator, 1 / restante)
+            saldo *= 1 + juros - fator
+            if mes == prazo:
+                saldo[:] = 0.0
+
+        if mes in marcos:
+            saida["patrimonio"].append(np.percentile(patrimonio, percentis))
+            saida["patrimonio_real"].append(np.percentile(patrimonio * np.exp(-log_deflator), percentis))
+            saida["saldo_devedor"].append(np.percentile(saldo, percentis))
+
+    return {"n": n, **{serie: np.array(valores) for serie, valores in saida.items()}}
+
+
+def _combinar(blocos: List[Dict]) -> Dict[str, np.ndarray]:
+    # Média dos percentis ponderada pelo tamanho do bloco. Com blocos grandes da
+    # mesma distribuição a diferença para o percentil exato é desprezível.
+    pesos = np.array([b["n"] for b in blocos], dtype=np.float64)
+    pesos /= pesos.sum()
+    return {serie: sum(p * b[serie] for p, b in zip(pesos, blocos)) for serie in SERIES}
+
+
+class SimuladorMonteCarlo:
+    """Distribui os blocos de caminhos num pool de processos (criado sob demanda)."""
+
+    def __init__(self, max_workers=None, tamanho_bloco=TAMANHO_BLOCO):
+        self.max_workers = max_workers or int(os.environ.get("JUBARTE_MC_WORKERS", os.cpu_count() or 1))
+        self.tamanho_bloco = tamanho_bloco
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def simular(self, caminhos=10_000, meses=120, aporte_mensal=0, principal=0,
+                valor_financiado=0, prazo_financiamento=None, spread_anual=0,
+                taxa_media=0.8, volatilidade=0.3, inflacao_media=0.4, inflacao_vol=0.2,
+                correlacao=0.5, historico=None, intervalo=12, percentis=PERCENTIS_PADRAO,
+                semente=None) -> Dict:
+        """
+        Bandas de percentis do patrimônio (nominal e real) e do saldo devedor a
+        cada `intervalo` meses. Taxas em % ao mês; `historico` (ver
+        `carregar_historico`) troca o modelo lognormal por bootstrap.
+        """
+        caminhos, meses, intervalo = int(caminhos), int(meses), int(intervalo)
+        prazo = meses if prazo_financiamento is None else int(prazo_financiamento)
+        if caminhos <= 0 or meses <= 0 or intervalo <= 0 or prazo <= 0:
+            raise ValueError("Caminhos, meses, prazo e intervalo devem ser positivos.")
+        if min(aporte_mensal, principal, valor_financiado, volatilidade, inflacao_vol) < 0:
+            raise ValueError("Valores, aportes e volatilidades não podem ser negativos.")
+        if not -1 <= correlacao <= 1:
+            raise ValueError("A correlação deve estar entre -1 e 1.")
+
+        marcos = list(range(intervalo, meses + 1, intervalo))
+        if not marcos or marcos[-1] != meses:
+            marcos.append(meses)
+
+        # semente sorteada em 63 bits: cabe num int64 do JSON e é reproduzível
+        if semente is None:
+            semente = secrets.randbits(63)
+        semente_raiz = np.random.SeedSequence(int(semente))
+        parametros = {
+            "meses": meses, "marcos": marcos, "percentis": list(percentis),
+            "aporte_mensal": float(aporte_mensal), "principal": float(principal),
+            "valor_financiado": float(valor_financiado), "prazo_financiamento": prazo,
+            "spread_anual": float(spread_anual), "taxa_media": float(taxa_media),
+            "volatilidade": float(volatilidade), "inflacao_media": float(inflacao_media),
+            "inflacao_vol": float(inflacao_vol), "correlacao": float(correlacao),
+            "historico": historico,
+        }
+
+        tamanhos = [self.tamanho_bloco] * (caminhos // self.tamanho_bloco)
+        if caminhos % self.tamanho_bloco:
+            tamanhos.append(caminhos % self.tamanho_bloco)
+        sementes = semente_raiz.spawn(len(tamanhos))
+
+        if len(tamanhos) == 1 or self.max_workers == 1:
+            blocos = [_simular_bloco(parametros, s, n) for s, n in zip(sementes, tamanhos)]
+        else:
+            futuros = [self._pool().submit(_simular_bloco, parametros, s, n) for s, n in zip(sementes, tamanhos)]
+            blocos = [f.result() for f in futuros]
+
+        bandas = _combinar(blocos)
+        return {
+            "caminhos": caminhos,
+            "semente": int(semente),
+            "modelo": "bootstrap" if historico is not None else "lognormal",
+            "meses": marcos,
+            "percentis": list(percentis),
+            **{
+                serie: {f"p{p:g}": np.round(bandas[serie][:, k], 2).tolist() for k, p in enumerate(percentis)}
+                for serie in SERIES
+            },
+        }
+
+    def encerrar(self, aguardar=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=aguardar, cancel_futures=not aguardar)
+            self._executor = None
@@ -0,0 +1,78 @@
+from decimal import Decimal
+from typing import Optional
+from finance_engine.core.conversao import para_decimal, quantizar
+from finance_engine.core.resultados import Resultado, tipo_resultado
+from finance_engine.database.models import Empresa
+from finance_engine.database.resumos import obter_resumo
+from finance_engine.modules.business import BusinessAnalytics
+from finance_engine.modules.payroll import PayrollManager
+
+
+@tipo_resultado
+class IndicadoresEmpresa(Resultado):
+    """Resultado de `PainelEmpresa.indicadores` (valores mensais em reais)."""
+    empresa_id: int
+    razao_social: str
+    regime_tributario: Optional[str]
+    total_funcionarios: int
+    folha_salarios: Decimal
+    encargos_sociais: Decimal
+    fgts: Decimal
+    provisoes_ferias_13: Decimal
+    custo_total_folha: Decimal
+    percentual_sobre_bruto: Decimal
+    despesas_fixas: Decimal
+    margem_contribuicao: Optional[Decimal]
+    ponto_equilibrio: Optional[Decimal]
+    ebitda: Decimal
+
+
+class PainelEmpresa:
+    """Indicadores de uma `Empresa` a partir do resumo materializado da folha."""
+
+    @staticmethod
+    def indicadores(db, empresa_id: int, receita_mensal=0, custos_variaveis=0,
+                    outras_despesas_fixas=0, margem_contribuicao=None) -> Optional[IndicadoresEmpresa]:
+        """
+        Custo da folha com os encargos do regime tributário da empresa, e daí o
+        EBITDA e o ponto de equilíbrio. As despesas fixas são a folha mais
+        `outras_despesas_fixas`; sem `margem_contribuicao` (%), ela é derivada
+        da receita e dos custos variáveis. Retorna None se a empresa não existir.
+        """
+        empresa = db.get(Empresa, empresa_id)
+        if empresa is None:
+            return None
+
+        # Uma linha do resumo em vez de agregar todos os funcionários
+        resumo = obter_resumo(db, empresa_id)
+        folha = Decimal(resumo.soma_salarios_centavos).scaleb(-2)
+        custo = PayrollManager.custo_empresa(folha, **PayrollManager.encargos_regime(empresa.regime_tributario))
+
+        receita = para_decimal(receita_mensal)
+        variaveis = para_decimal(custos_variaveis)
+        despesas_fixas = custo.custo_total_mensal + para_decimal(outras_despesas_fixas)
+
+        if margem_contribuicao is not None:
+            margem = para_decimal(margem_contribuicao)
+        elif receita:
+            margem = (receita - variaveis) / receita * 100
+        else:
+            margem = None
+        ponto = BusinessAnalytics.ponto_equilibrio(despesas_fixas, margem) if margem else None
+
+        return IndicadoresEmpresa(
+            empresa_id=empresa.id,
+            razao_social=empresa.razao_social,
+            regime_tributario=empresa.regime_tributario,
+            total_funcionarios=resumo.total_funcionarios,
+            folha_salarios=quantizar(folha),
+            encargos_sociais=custo.encargos_sociais,
+            fgts=custo.fgts,
+            provisoes_ferias_13=custo.provisoes_ferias_13,
+            custo_total_folha=custo.custo_total_mensal,
+            percentual_sobre_bruto=custo.percentual_sobre_bruto,
+            despesas_fixas=quantizar(despesas_fixas),
+            margem_contribuicao=None if margem is None else quantizar(margem),
+            ponto_equilibrio=ponto,
+            ebitda=BusinessAnalytics.calcular_ebitda(receita, variaveis, despesas_fixas),
+        )
@@ -1,117 +1,197 @@
 from decimal import Decimal
-from typing import Dict
-from finance_engine.core.math_utils import to_decimal
+from typing import Dict, Optional
+from finance_engine.core.conversao import ZERO, para_decimal, quantizar
+from finance_engine.core.resultados import Resultado, tipo_resultado
+from finance_engine.core.tax_tables import ANO_VIGENTE, TabelasCompetencia, obter_tabelas, ao_alterar_tabelas
+
+# Alíquotas fixas de encargos, convertidas uma única vez
+_FGTS = Decimal('0.08')
+_PROVISAO_FERIAS_13 = Decimal('0.1111')  # Provisão simplificada: (1/12 + 1/3*1/12 + 1/12)
+_CPP = Decimal('0.20')
+_RAT_PADRAO = Decimal('0.02')
+_SISTEMA_S_PADRAO = Decimal('0.058')
+
+# Encargos patronais por `Empresa.regime_tributario`. No Simples Nacional a
+# CPP, o RAT e o Sistema S são recolhidos dentro do DAS (anexos I a III e V),
+# então sobre a folha restam só FGTS e provisões. Regime não informado segue
+# a empresa normal (Lucro Presumido/Real).
+_ENCARGOS_NORMAIS = {"cpp": _CPP, "rat": _RAT_PADRAO, "sistema_s": _SISTEMA_S_PADRAO}
+ENCARGOS_POR_REGIME = {
+    "simples": {"cpp": ZERO, "rat": ZERO, "sistema_s": ZERO},
+    "lucro presumido": _ENCARGOS_NORMAIS,
+    "lucro real": _ENCARGOS_NORMAIS,
+}
+
+
+@tipo_resultado
+class FolhaDetalhada(Resultado):
+    """Resultado de `PayrollManager.folha_detalhada` (valores em reais)."""
+    salario_bruto: Decimal
+    desconto_inss: Decimal
+    desconto_irrf: Decimal
+    outros_descontos: Decimal
+    fgts_recolhido: Decimal
+    salario_liquido: Decimal
+
+
+@tipo_resultado
+class CustoEmpresa(Resultado):
+    """Resultado de `PayrollManager.custo_empresa` (valores em reais)."""
+    salario_base: Decimal
+    encargos_sociais: Decimal
+    fgts: Decimal
+    provisoes_ferias_13: Decimal
+    custo_total_mensal: Decimal
+    percentual_sobre_bruto: Decimal
+
 
 class PayrollManager:
     """Gestor de Capital Humano - Padrão CLT Brasileiro (Projeção 2026)."""
 
-    # Projeções para 2026
-    # Fonte: Reforma da Renda (Lei 15.270/2025) e reajustes INPC
-    TABELA_INSS = [
-        (to_decimal('1621.00'), to_decimal('0.075'), Decimal('0')),
-        (to_decimal('2902.84'), to_decimal('0.09'), Decimal('0')),
-        (to_decimal('4354.27'), to_decimal('0.12'), Decimal('0')),
-        (to_decimal('8475.55'), to_decimal('0.14'), Decimal('0')),
-    ]
-    TETO_INSS = to_decimal('8475.55')
-
-    # IRRF 2026: Isenção até R$ 5.000,00
-    # Nota: O governo utiliza redutores para bandas intermediárias (5k a 7.3k)
-    # Implementação baseada na isenção total de 5k
-    TABELA_IRRF = [
-        (to_decimal('5000.00'), to_decimal('0'), Decimal('0')),
-        (to_decimal('7350.00'), to_decimal('0.15'), to_decimal('750.00')), # Estimativa de redutor para transição
-        (Decimal('inf'), to_decimal('0.275'), to_decimal('896.00')),
-    ]
-    DEDUCAO_DEPENDENTE = to_decimal('189.59')
+    # Tabelas compiladas carregadas uma única vez (ver core/tax_tables.py)
+    ANO_COMPETENCIA = ANO_VIGENTE
+    TABELAS = obter_tabelas(ANO_COMPETENCIA)
+
+    # Atributos legados derivados das tabelas compiladas
+    TABELA_INSS = [(fim, taxa, Decimal('0')) for _, fim, taxa in TABELAS.inss.faixas]
+    TETO_INSS = TABELAS.inss.teto
+    TABELA_IRRF = list(TABELAS.irrf.faixas)
+    DEDUCAO_DEPENDENTE = TABELAS.irrf.deducao_dependente
+
+    @classmethod
+    def _recarregar_tabelas(cls):
+        cls.TABELAS = obter_tabelas(cls.ANO_COMPETENCIA)
+
+    @classmethod
+    def _tabelas(cls, ano=None) -> TabelasCompetencia:
+        return cls.TABELAS if ano is None else obter_tabelas(ano)
 
     @classmethod
-    def calcular_inss(cls, salario_bruto: Decimal) -> Decimal:
+    def calcular_inss(cls, salario_bruto: Decimal, ano=None) -> Decimal:
         """Cálculo progressivo do INSS."""
-        valor = min(salario_bruto, cls.TETO_INSS)
-        imposto = Decimal('0')
-        anterior = Decimal('0')
-
-        # Implementação da progressividade por faixas
-        faixas = [
-            (to_decimal('0'), to_decimal('1621.00'), to_decimal('0.075')),
-            (to_decimal('1621.01'), to_decimal('2902.84'), to_decimal('0.09')),
-            (to_decimal('2902.85'), to_decimal('4354.27'), to_decimal('0.12')),
-            (to_decimal('4354.28'), to_decimal('8475.55'), to_decimal('0.14'))
-        ]
-
-        for inicio, fim, taxa in faixas:
-            if valor > inicio:
-                base = min(valor, fim) - inicio
-                imposto += to_decimal(base) * to_decimal(taxa)
-            else:
-                break
-        
-        return to_decimal(imposto, '0.01')
+        return cls._tabelas(ano).inss.calcular(salario_bruto)
 
     @classmethod
-    def calcular_irrf(cls, base_irrf: Decimal) -> Decimal:
+    def calcular_irrf(cls, base_irrf: Decimal, ano=None) -> Decimal:
         """Cálculo do IRRF com base na tabela progressiva."""
-        for limite, taxa, deducao in cls.TABELA_IRRF:
-            if base_irrf <= limite:
-                return to_decimal((base_irrf * taxa) - deducao, '0.01')
-        return Decimal('0')
+        return cls._tabelas(ano).irrf.calcular(base_irrf)
 
     @staticmethod
-    def calcular_folha_detalhada(salario_bruto, dependentes=0, outros_descontos=0, beneficios=0) -> Dict:
+    def calcular_folha_detalhada(salario_bruto, dependentes=0, outros_descontos=0, beneficios=0, ano=None) -> Dict:
+        """Processamento completo de salário bruto para líquido (dicionário; ver `folha_detalhada`)."""
+        # Monta o dicionário direto dos valores, sem instanciar o resultado tipado
+        bruto, inss, irrf, descontos, fgts, liquido = PayrollManager._valores_folha(
+            salario_bruto, dependentes, outros_descontos, beneficios, ano
+        )
+        return {
+            "salario_bruto": bruto,
+            "desconto_inss": inss,
+            "desconto_irrf": irrf,
+            "outros_descontos": descontos,
+            "fgts_recolhido": fgts,
+            "salario_liquido": liquido
+        }
+
+    @staticmethod
+    def folha_detalhada(salario_bruto, dependentes=0, outros_descontos=0, beneficios=0, ano=None) -> FolhaDetalhada:
         """Processamento completo de salário bruto para líquido."""
-        bruto = to_decimal(salario_bruto)
+        return FolhaDetalhada(*PayrollManager._valores_folha(
+            salario_bruto, dependentes, outros_descontos, beneficios, ano
+        ))
+
+    @staticmethod
+    def _valores_folha(salario_bruto, dependentes, outros_descontos, beneficios, ano) -> tuple:
+        """Valores da folha na ordem dos campos de `FolhaDetalhada`."""
+        tabelas = PayrollManager._tabelas(ano)
+        bruto = para_decimal(salario_bruto)
         dep = int(dependentes)
-        descontos_adicionais = to_decimal(outros_descontos)
+        descontos_adicionais = para_decimal(outros_descontos)
         
         # 1. INSS
-        inss = PayrollManager.calcular_inss(bruto)
+        inss = tabelas.inss.calcular(bruto)
         
         # 2. Base IRRF
-        base_irrf = bruto - inss - (dep * PayrollManager.DEDUCAO_DEPENDENTE)
-        base_irrf = max(Decimal('0'), base_irrf)
+        base_irrf = bruto - inss - (dep * tabelas.irrf.deducao_dependente)
+        base_irrf = max(ZERO, base_irrf)
         
         # 3. IRRF
-        irrf = PayrollManager.calcular_irrf(base_irrf)
-        irrf = max(Decimal('0'), irrf)
+        irrf = tabelas.irrf.calcular(base_irrf)
+        irrf = max(ZERO, irrf)
 
         # 4. FGTS (Encargo Empresa, não desconta do funcionário)
-        fgts = bruto * to_decimal('0.08')
+        fgts = bruto * _FGTS
 
         # 5. Salário Líquido
-        liquido = bruto - inss - irrf - descontos_adicionais + to_decimal(beneficios)
+        liquido = bruto - inss - irrf - descontos_adicionais + para_decimal(beneficios)
 
+        return (
+            quantizar(bruto),          # salario_bruto
+            inss,                      # desconto_inss
+            irrf,                      # desconto_irrf
+            descontos_adicionais,      # outros_descontos
+            quantizar(fgts),           # fgts_recolhido
+            quantizar(liquido),        # salario_liquido
+        )
+
+    @staticmethod
+    def encargos_regime(regime_tributario: Optional[str]) -> Dict[str, Decimal]:
+        """Alíquotas de CPP, RAT e Sistema S (argumentos de `custo_empresa`) para um regime."""
+        regime = " ".join((regime_tributario or "").lower().split())
+        if regime.startswith("simples"):
+            regime = "simples"
+        return ENCARGOS_POR_REGIME.get(regime, _ENCARGOS_NORMAIS)
+
+    @staticmethod
+    def custo_total_empresa(salario_bruto, rat=0.02, sistema_s=0.058) -> Dict:
+        """Cálculo do custo real de um funcionário para a empresa (dicionário; ver `custo_empresa`)."""
+        base, encargos, fgts, provisoes, total, percentual = PayrollManager._valores_custo(
+            salario_bruto, rat, sistema_s, _CPP
+        )
         return {
-            "salario_bruto": to_decimal(bruto, '0.01'),
-            "desconto_inss": inss,
-            "desconto_irrf": irrf,
-            "outros_descontos": descontos_adicionais,
-            "fgts_recolhido": to_decimal(fgts, '0.01'),
-            "salario_liquido": to_decimal(liquido, '0.01')
+            "salario_base": base,
+            "encargos_sociais": encargos,
+            "fgts": fgts,
+            "provisoes_ferias_13": provisoes,
+            "custo_total_mensal": total,
+            "percentual_sobre_bruto": percentual
         }
 
     @staticmethod
-    def custo_total_empresa(salario_bruto, rat=0.02, sistema_s=0.058) -> Dict:
-        """Cálculo do custo real de um funcionário para a empresa."""
-        bruto = to_decimal(salario_bruto)
+    def custo_empresa(salario_bruto, rat=0.02, sistema_s=0.058, cpp=_CPP) -> CustoEmpresa:
+        """
+        Cálculo do custo real de um funcionário para a empresa. Os encargos são
+        proporcionais ao salário, então o custo da folha inteira sai da soma dos
+        salários (ver `encargos_regime` para as alíquotas de cada regime).
+        """
+        return CustoEmpresa(*PayrollManager._valores_custo(salario_bruto, rat, sistema_s, cpp))
+
+    @staticmethod
+    def _valores_custo(salario_bruto, rat, sistema_s, cpp) -> tuple:
+        """Valores do custo na ordem dos campos de `CustoEmpresa`."""
+        bruto = para_decimal(salario_bruto)
         
         # Encargos Fixos
-        fgts = bruto * to_decimal('0.08')
-        ferias_13_provisao = bruto * to_decimal('0.1111') # Provisão simplificada: (1/12 + 1/3*1/12 + 1/12)
+        fgts = bruto * _FGTS
+        ferias_13_provisao = bruto * _PROVISAO_FERIAS_13 # Provisão simplificada: (1/12 + 1/3*1/12 + 1/12)
         
         # Encargos Patronais (Empresa Normal)
-        cpp = bruto * to_decimal('0.20')
-        rat_valor = bruto * to_decimal(rat)
-        sistema_s_valor = bruto * to_decimal(sistema_s)
+        aliquota_patronal = para_decimal(cpp) + para_decimal(rat) + para_decimal(sistema_s)
+        cpp = bruto * para_decimal(cpp)
+        rat_valor = bruto * para_decimal(rat)
+        sistema_s_valor = bruto * para_decimal(sistema_s)
         
         total_encargos = fgts + ferias_13_provisao + cpp + rat_valor + sistema_s_valor
         custo_total = bruto + total_encargos
 
-        return {
-            "salario_base": bruto,
-            "encargos_sociais": to_decimal(cpp + rat_valor + sistema_s_valor, '0.01'),
-            "fgts": to_decimal(fgts, '0.01'),
-            "provisoes_ferias_13": to_decimal(ferias_13_provisao, '0.01'),
-            "custo_total_mensal": to_decimal(custo_total, '0.01'),
-            "percentual_sobre_bruto": to_decimal((custo_total / bruto - 1) * 100, '0.01')
-        }
+        return (
+            bruto,                                                              # salario_base
+            quantizar(cpp + rat_valor + sistema_s_valor),                       # encargos_sociais
+            quantizar(fgts),                                                    # fgts
+            quantizar(ferias_13_provisao),                                      # provisoes_ferias_13
+            quantizar(custo_total),                                             # custo_total_mensal
+            # custo / bruto - 1 é a soma das alíquotas: vale também para salário zero (como no lote)
+            quantizar((_FGTS + _PROVISAO_FERIAS_13 + aliquota_patronal) * 100),  # percentual_sobre_bruto
+        )
+
+
+ao_alterar_tabelas(PayrollManager._recarregar_tabelas)
@@ -0,0 +1,253 @@
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+from finance_engine.core.array_utils import (
+    para_inteiros_escalados, dividir_half_up, coluna_para_decimais
+)
+from finance_engine.core.math_utils import to_decimal
+from finance_engine.core.tax_tables import (
+    TabelasCompetencia, obter_tabelas, ao_alterar_tabelas, anos_disponiveis
+)
+from finance_engine.database.models import Empresa, Funcionario
+
+# Todas as bases são inteiros em centavos e as alíquotas em milésimos
+# (0.075 -> 75), de forma que as somas intermediárias são exatas e o
+# arredondamento final reproduz o `to_decimal(..., '0.01')` do PayrollManager.
+# As escalas, `inteiro_exato` e `ParametrosLote` (via `BatchPayroll.parametros`)
+# são a base de outros motores em lote (varredura, projeção plurianual).
+MILESIMOS = 1000
+FGTS_PERCENTUAL = 8
+
+# Encargos patronais de `custo_total_empresa`, em milionésimos do salário
+_MILIONESIMOS = 1_000_000
+_FGTS_MILIONESIMOS = 80_000
+_PROVISAO_MILIONESIMOS = 111_100
+_RAT_PADRAO = 0.02
+_SISTEMA_S_PADRAO = 0.058
+_CPP_PADRAO = 0.20
+
+
+def inteiro_exato(valor: Decimal, escala: int) -> int:
+    """`valor` na escala 1/`escala` como inteiro; ValueError se houver resto."""
+    escalado = valor * escala
+    if escalado != escalado.to_integral_value():
+        raise ValueError(f"Valor {valor} não é representável na escala 1/{escala}.")
+    return int(escalado)
+
+
+def _aliquotas_milionesimos(aliquotas) -> np.ndarray:
+    if np.ndim(aliquotas) == 0:
+        return np.int64(inteiro_exato(to_decimal(aliquotas), _MILIONESIMOS))
+    return np.array([inteiro_exato(to_decimal(a), _MILIONESIMOS) for a in aliquotas], dtype=np.int64)
+
+
+class ParametrosLote:
+    """Tabelas de um ano de competência convertidas para vetores inteiros."""
+
+    __slots__ = ("inss_inicio", "inss_fim", "inss_aliquota", "inss_acumulado", "inss_teto",
+                 "irrf_limite", "irrf_aliquota", "irrf_deducao", "deducao_dependente")
+
+    def __init__(self, tabelas: TabelasCompetencia):
+        inss = tabelas.inss.faixas
+        self.inss_inicio = np.array([inteiro_exato(i, 100) for i, _, _ in inss], dtype=np.int64)
+        self.inss_fim = np.array([inteiro_exato(f, 100) for _, f, _ in inss], dtype=np.int64)
+        self.inss_aliquota = np.array([inteiro_exato(a, MILESIMOS) for _, _, a in inss], dtype=np.int64)
+        # Imposto (centavos x milésimos) das faixas inteiras abaixo de cada uma
+        cheias = np.clip(self.inss_fim - self.inss_inicio, 0, None) * self.inss_aliquota
+        self.inss_acumulado = np.concatenate(([0], np.cumsum(cheias)[:-1])).astype(np.int64)
+        self.inss_teto = inteiro_exato(tabelas.inss.teto, 100)
+
+        irrf = tabelas.irrf.faixas
+        # A última faixa (limite infinito) fica implícita no searchsorted
+        self.irrf_limite = np.array([inteiro_exato(l, 100) for l, _, _ in irrf if l.is_finite()], dtype=np.int64)
+        self.irrf_aliquota = np.array([inteiro_exato(a, MILESIMOS) for _, a, _ in irrf], dtype=np.int64)
+        self.irrf_deducao = np.array([inteiro_exato(d, 100) for _, _, d in irrf], dtype=np.int64)
+        self.deducao_dependente = inteiro_exato(tabelas.irrf.deducao_dependente, 100)
+
+
+@lru_cache(maxsize=None)
+def _parametros(ano=None) -> ParametrosLote:
+    return ParametrosLote(obter_tabelas(ano))
+
+
+ao_alterar_tabelas(_parametros.cache_clear)
+
+
+class BatchPayroll:
+    """Processamento de folha em lote (empresa inteira) em aritmética vetorizada."""
+
+    @staticmethod
+    def preparar_tabelas() -> Tuple[int, ...]:
+        """
+        Converte as tabelas de todos os anos cadastrados para inteiros de uma
+        vez (ex.: na subida do worker), tirando esse custo da primeira requisição.
+        """
+        anos = anos_disponiveis()
+        _parametros()
+        for ano in anos:
+            _parametros(ano)
+        return anos
+
+    @staticmethod
+    def parametros(ano=None) -> ParametrosLote:
+        """Tabelas do ano de competência (padrão: vigente) já convertidas para inteiros (em cache)."""
+        return _parametros(ano)
+
+    @staticmethod
+    def calcular_inss(bruto: np.ndarray, ano=None) -> np.ndarray:
+        """INSS progressivo para um vetor de salários em centavos."""
+        p = _parametros(ano)
+        valor = np.minimum(bruto, p.inss_teto)[:, None]
+        base = np.clip(np.minimum(valor, p.inss_fim) - p.inss_inicio, 0, None)
+        imposto = (base * p.inss_aliquota).sum(axis=1)
+        return dividir_half_up(imposto, MILESIMOS)
+
+    @staticmethod
+    def calcular_irrf(base_irrf: np.ndarray, ano=None) -> np.ndarray:
+        """IRRF para um vetor de bases em centavos (já limitado a zero)."""
+        p = _parametros(ano)
+        faixa = np.searchsorted(p.irrf_limite, base_irrf, side="left")
+        imposto = base_irrf * p.irrf_aliquota[faixa] - p.irrf_deducao[faixa] * MILESIMOS
+        return np.maximum(dividir_half_up(imposto, MILESIMOS), 0)
+
+    @staticmethod
+    def calcular_folha_lote(salarios_brutos, dependentes=0, outros_descontos=0,
+                            beneficios=0, ano=None) -> Dict[str, np.ndarray]:
+        """
+        Processa bruto -> líquido para todos os funcionários de uma vez.
+        Retorna colunas int64 em centavos com as mesmas chaves de
+        `PayrollManager.calcular_folha_detalhada`.
+        """
+        return BatchPayroll.calcular_folha_centavos(
+            np.atleast_1d(para_inteiros_escalados(salarios_brutos)),
+            dependentes,
+            para_inteiros_escalados(outros_descontos),
+            para_inteiros_escalados(beneficios),
+            ano,
+        )
+
+    @staticmethod
+    def calcular_folha_centavos(bruto: np.ndarray, dependentes=0, outros_descontos=0,
+                                beneficios=0, ano=None) -> Dict[str, np.ndarray]:
+        """Como `calcular_folha_lote`, mas com os valores já em centavos (int64)."""
+        n = bruto.shape[0]
+        dep = np.broadcast_to(np.asarray(dependentes, dtype=np.int64), (n,))
+        descontos = np.broadcast_to(np.asarray(outros_descontos, dtype=np.int64), (n,))
+        extras = np.broadcast_to(np.asarray(beneficios, dtype=np.int64), (n,))
+
+        # 1. INSS
+        inss = BatchPayroll.calcular_inss(bruto, ano)
+
+        # 2. Base IRRF
+        base_irrf = np.maximum(bruto - inss - dep * _parametros(ano).deducao_dependente, 0)
+
+        # 3. IRRF
+        irrf = BatchPayroll.calcular_irrf(base_irrf, ano)
+
+        # 4. FGTS (Encargo Empresa)
+        fgts = dividir_half_up(bruto * FGTS_PERCENTUAL, 100)
+
+        # 5. Salário Líquido
+        liquido = bruto - inss - irrf - descontos + extras
+
+        return {
+            "salario_bruto": bruto,
+            "desconto_inss": inss,
+            "desconto_irrf": irrf,
+            "outros_descontos": np.array(descontos),
+            "fgts_recolhido": fgts,
+            "salario_liquido": liquido,
+        }
+
+    @staticmethod
+    def custo_empresa_centavos(bruto: np.ndarray, rat=_RAT_PADRAO, sistema_s=_SISTEMA_S_PADRAO,
+                               cpp=_CPP_PADRAO) -> Dict[str, np.ndarray]:
+        """
+        `PayrollManager.custo_empresa` vetorizado. `rat`, `sistema_s` e `cpp`
+        podem ser escalares ou um valor por linha; as alíquotas viram inteiros
+        em milionésimos para que o arredondamento seja exato.
+        """
+        rat = _aliquotas_milionesimos(rat)
+        sistema_s = _aliquotas_milionesimos(sistema_s)
+        patronal = _aliquotas_milionesimos(cpp) + rat + sistema_s
+        fator = _MILIONESIMOS + _FGTS_MILIONESIMOS + _PROVISAO_MILIONESIMOS + patronal
+        return {
+            "salario_base": bruto,
+            "encargos_sociais": dividir_half_up(bruto * patronal, _MILIONESIMOS),
+            "fgts": dividir_half_up(bruto * _FGTS_MILIONESIMOS, _MILIONESIMOS),
+            "provisoes_ferias_13": dividir_half_up(bruto * _PROVISAO_MILIONESIMOS, _MILIONESIMOS),
+            "custo_total_mensal": dividir_half_up(bruto * fator, _MILIONESIMOS),
+            # custo / bruto - 1 não depende do salário: só das alíquotas (em centésimos de %)
+            "percentual_sobre_bruto": np.broadcast_to(
+                dividir_half_up(fator - _MILIONESIMOS, 100), bruto.shape
+            ),
+        }
+
+    @staticmethod
+    def totalizar(folha: Dict[str, np.ndarray]) -> Dict[str, Decimal]:
+        """Soma as colunas de uma folha em lote (valores em Decimal)."""
+        return {k: Decimal(int(v.sum())).scaleb(-2) for k, v in folha.items()}
+
+    @staticmethod
+    def iterar_empresa(db, empresa_id: int, tamanho_lote=5000, ano=None) -> Iterator[Tuple[list, Dict[str, np.ndarray]]]:
+        """
+        Folha da empresa em lotes de funcionários (paginação por id), para
+        relatórios e exportações com memória limitada. Gera (linhas, folha).
+        """
+        ultimo_id = None
+        while True:
+            consulta = (
+                db.query(Funcionario.id, Funcionario.nome, Funcionario.cargo, Funcionario.salario_base)
+                .filter(Funcionario.empresa_id == empresa_id)
+            )
+            if ultimo_id is not None:
+                consulta = consulta.filter(Funcionario.id > ultimo_id)
+            linhas = consulta.order_by(Funcionario.id).limit(tamanho_lote).all()
+            if not linhas:
+                return
+            ultimo_id = linhas[-1].id
+            yield linhas, BatchPayroll.calcular_folha_lote([l.salario_base or 0 for l in linhas], ano=ano)
+
+    @staticmethod
+    def processar_empresa(db, empresa_id: int, ano=None, colunar=False) -> Optional[Dict]:
+        """
+        Roda a folha mensal de todos os funcionários de uma `Empresa`.
+        Com `colunar=True`, devolve as colunas (arrays em reais) em vez de um
+        dicionário por funcionário. Retorna None se a empresa não existir.
+        """
+        empresa = db.get(Empresa, empresa_id)
+        if empresa is None:
+            return None
+
+        linhas = (
+            db.query(Funcionario.id, Funcionario.nome, Funcionario.salario_base)
+            .filter(Funcionario.empresa_id == empresa_id)
+            .order_by(Funcionario.id)
+            .all()
+        )
+        folha = BatchPayroll.calcular_folha_lote(
+            [l.salario_base or 0 for l in linhas], ano=ano
+        )
+
+        resultado = {
+            "empresa_id": empresa.id,
+            "razao_social": empresa.razao_social,
+            "total_funcionarios": len(linhas),
+            "totais": BatchPayroll.totalizar(folha),
+        }
+        if colunar:
+            resultado["colunas"] = {
+                "funcionario_id": [linha.id for linha in linhas],
+                "nome": [linha.nome for linha in linhas],
+                **{k: v / 100 for k, v in folha.items()},
+            }
+            return resultado
+
+        colunas = {k: coluna_para_decimais(v) for k, v in folha.items()}
+        resultado["funcionarios"] = [
+            {"funcionario_id": linha.id, "nome": linha.nome,
+             **{k: colunas[k][idx] for k in colunas}}
+            for idx, linha in enumerate(linhas)
+        ]
+        return resultado
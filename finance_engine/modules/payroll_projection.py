@@ -0,0 +1,291 @@
+from decimal import Decimal
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from finance_engine.core.array_utils import para_inteiros_escalados, dividir_half_up
+from finance_engine.core.math_utils import to_decimal
+from finance_engine.core.tax_tables import (
+    ANO_VIGENTE, TabelaINSS, TabelaIRRF, TabelasCompetencia, anos_disponiveis
+)
+from finance_engine.database.models import Empresa, Funcionario
+from finance_engine.modules.payroll import PayrollManager
+from finance_engine.modules.payroll_batch import (
+    BatchPayroll, ParametrosLote, inteiro_exato, MILESIMOS, FGTS_PERCENTUAL
+)
+
+# Projeção plurianual da folha: os salários são reajustados pelo INPC na
+# data-base, elevados ao salário mínimo de cada ano em janeiro, e calculados
+# com as tabelas INSS/IRRF do ano de competência. Entre dois eventos nada
+# muda, então cada trecho de meses é calculado uma única vez; e quando as
+# tabelas são as mesmas e os salários só sobem, a faixa de cada funcionário
+# avança a partir da do trecho anterior em vez de ser buscada de novo.
+# Tudo em centavos inteiros, com os resultados de `calcular_folha_centavos`
+# e `custo_empresa_centavos`.
+
+COLUNAS = ("salario_bruto", "desconto_inss", "desconto_irrf", "fgts_recolhido", "salario_liquido",
+           "encargos_sociais", "provisoes_ferias_13", "custo_total_mensal")
+MAX_ANOS = 50
+MAX_CELULAS = 5_000_000  # funcionários x meses das colunas por funcionário
+
+_MILIONESIMOS = 1_000_000
+_LIMITE_INT64 = np.iinfo(np.int64).max
+
+
+class _Posicao:
+    """Faixas de cada funcionário no último trecho calculado."""
+
+    __slots__ = ("parametros", "valor_inss", "faixa_inss", "base_irrf", "faixa_irrf")
+
+    def __init__(self, parametros, valor_inss, faixa_inss, base_irrf, faixa_irrf):
+        self.parametros = parametros
+        self.valor_inss = valor_inss
+        self.faixa_inss = faixa_inss
+        self.base_irrf = base_irrf
+        self.faixa_irrf = faixa_irrf
+
+
+def _avancar_inss(inicios: np.ndarray, faixa: np.ndarray, valor: np.ndarray) -> np.ndarray:
+    # Sobe enquanto o valor alcançar o início da faixa seguinte (valores que só crescem)
+    ultima = len(inicios) - 1
+    while True:
+        sobe = (faixa < ultima) & (valor >= inicios[np.minimum(faixa + 1, ultima)])
+        if not sobe.any():
+            return faixa
+        faixa = faixa + sobe
+
+
+def _avancar_irrf(limites: np.ndarray, faixa: np.ndarray, base: np.ndarray) -> np.ndarray:
+    # A faixa len(limites) é a última (limite infinito)
+    ultima = len(limites)
+    if ultima == 0:
+        return faixa
+    while True:
+        sobe = (faixa < ultima) & (base > limites[np.minimum(faixa, ultima - 1)])
+        if not sobe.any():
+            return faixa
+        faixa = faixa + sobe
+
+
+def _calcular_trecho(p: ParametrosLote, bruto: np.ndarray, dependentes: np.ndarray,
+                     encargos: Dict, anterior: Optional[_Posicao]) -> Tuple[Dict[str, np.ndarray], _Posicao]:
+    incremental = anterior is not None and anterior.parametros is p
+
+    # 1. INSS: imposto acumulado das faixas inteiras + a parte na faixa atual
+    valor = np.minimum(bruto, p.inss_teto)
+    if incremental and np.all(valor >= anterior.valor_inss):
+        faixa_inss = _avancar_inss(p.inss_inicio, anterior.faixa_inss, valor)
+    else:
+        faixa_inss = np.maximum(np.searchsorted(p.inss_inicio, valor, side="right") - 1, 0)
+    base = np.clip(np.minimum(valor, p.inss_fim[faixa_inss]) - p.inss_inicio[faixa_inss], 0, None)
+    inss = dividir_half_up(p.inss_acumulado[faixa_inss] + base * p.inss_aliquota[faixa_inss], MILESIMOS)
+
+    # 2. IRRF
+    base_irrf = np.maximum(bruto - inss - dependentes * p.deducao_dependente, 0)
+    if incremental and np.all(base_irrf >= anterior.base_irrf):
+        faixa_irrf = _avancar_irrf(p.irrf_limite, anterior.faixa_irrf, base_irrf)
+    else:
+        faixa_irrf = np.searchsorted(p.irrf_limite, base_irrf, side="left")
+    imposto = base_irrf * p.irrf_aliquota[faixa_irrf] - p.irrf_deducao[faixa_irrf] * MILESIMOS
+    irrf = np.maximum(dividir_half_up(imposto, MILESIMOS), 0)
+
+    custo = BatchPayroll.custo_empresa_centavos(bruto, **encargos)
+    folha = {
+        "salario_bruto": bruto,
+        "desconto_inss": inss,
+        "desconto_irrf": irrf,
+        "fgts_recolhido": dividir_half_up(bruto * FGTS_PERCENTUAL, 100),
+        "salario_liquido": bruto - inss - irrf,
+        "encargos_sociais": custo["encargos_sociais"],
+        "provisoes_ferias_13": custo["provisoes_ferias_13"],
+        "custo_total_mensal": custo["custo_total_mensal"],
+    }
+    return folha, _Posicao(p, valor, faixa_inss, base_irrf, faixa_irrf)
+
+
+class _SerieTabelas:
+    """Tabelas de cada ano: as informadas, senão as cadastradas; sem nenhuma, as do último ano anterior."""
+
+    def __init__(self, tabelas: Optional[Mapping[int, TabelasCompetencia]]):
+        self._informadas = {int(ano): t for ano, t in (tabelas or {}).items()}
+        self._anos = sorted(set(anos_disponiveis()) | set(self._informadas))
+        self._convertidas: Dict[int, ParametrosLote] = {}
+
+    def ano_vigente(self, ano: int) -> int:
+        anteriores = [a for a in self._anos if a <= ano]
+        if not anteriores:
+            raise ValueError(f"Não há tabelas INSS/IRRF cadastradas para {ano} nem para anos anteriores.")
+        return anteriores[-1]
+
+    def parametros(self, ano_tabela: int) -> ParametrosLote:
+        if ano_tabela not in self._informadas:
+            return BatchPayroll.parametros(ano_tabela)
+        if ano_tabela not in self._convertidas:
+            self._convertidas[ano_tabela] = ParametrosLote(self._informadas[ano_tabela])
+        return self._convertidas[ano_tabela]
+
+
+def _reajustar(bruto: np.ndarray, percentual) -> np.ndarray:
+    # Percentual com até 4 casas -> milionésimos: o reajuste é exato e arredonda half-up
+    fator = _MILIONESIMOS + inteiro_exato(to_decimal(percentual), 10_000)
+    if fator <= 0:
+        raise ValueError(f"Reajuste inválido: {percentual}%.")
+    if bruto.size and int(bruto.max()) > _LIMITE_INT64 // fator:
+        raise ValueError("Salários grandes demais para a projeção.")
+    return dividir_half_up(bruto * fator, _MILIONESIMOS)
+
+
+def _total_meses(anos) -> int:
+    if not 1 <= int(anos) <= MAX_ANOS:
+        raise ValueError(f"A projeção deve ter de 1 a {MAX_ANOS} anos.")
+    return int(anos) * 12
+
+
+def _meses(bruto: np.ndarray, dependentes=0, anos=5, ano_inicial=None, mes_inicial=1, reajustes=None,
+           salarios_minimos=None, mes_reajuste=1, tabelas=None, rat=0.02, sistema_s=0.058,
+           cpp=0.20) -> Iterator[Tuple[int, int, int, Dict[str, np.ndarray]]]:
+    # Como `PayrollProjection.iterar`, com os salários já em centavos
+    if np.any(bruto < 0):
+        raise ValueError("Salário não pode ser negativo.")
+    dependentes = np.broadcast_to(np.asarray(dependentes, dtype=np.int64), bruto.shape)
+    if np.any(dependentes < 0):
+        raise ValueError("Dependentes não pode ser negativo.")
+    meses = _total_meses(anos)
+    if not (1 <= mes_inicial <= 12 and 1 <= mes_reajuste <= 12):
+        raise ValueError("Mês inicial e mês de reajuste devem estar entre 1 e 12.")
+
+    reajustes = {int(a): p for a, p in (reajustes or {}).items()}
+    pisos = {int(a): int(para_inteiros_escalados(v)) for a, v in (salarios_minimos or {}).items()}
+    encargos = {"rat": rat, "sistema_s": sistema_s, "cpp": cpp}
+    serie = _SerieTabelas(tabelas)
+
+    ano, mes = (ANO_VIGENTE if ano_inicial is None else int(ano_inicial)), int(mes_inicial)
+    folha = posicao = parametros = None
+    for indice in range(meses):
+        mudou = indice == 0
+        if indice:
+            if mes == mes_reajuste and ano in reajustes:
+                bruto, mudou = _reajustar(bruto, reajustes[ano]), True
+            if mes == 1 and ano in pisos:
+                bruto, mudou = np.maximum(bruto, pisos[ano]), True
+
+        ano_tabela = serie.ano_vigente(ano)
+        atuais = serie.parametros(ano_tabela)
+        if mudou or atuais is not parametros:
+            parametros = atuais
+            folha, posicao = _calcular_trecho(parametros, bruto, dependentes, encargos, posicao)
+        yield ano, mes, ano_tabela, folha
+
+        mes += 1
+        if mes > 12:
+            ano, mes = ano + 1, 1
+
+
+class PayrollProjection:
+    """Projeção mensal da folha e do custo da empresa ao longo de vários anos."""
+
+    @staticmethod
+    def montar_tabelas(ano: int, inss: Sequence[Tuple], irrf: Sequence[Tuple], deducao_dependente) -> TabelasCompetencia:
+        """Tabelas de um ano a partir das faixas (mesmo formato de `TabelaINSS`/`TabelaIRRF`)."""
+        try:
+            tabelas = TabelasCompetencia(ano, TabelaINSS(ano, inss), TabelaIRRF(ano, irrf, deducao_dependente))
+        except (ArithmeticError, IndexError, TypeError, ValueError):
+            raise ValueError(f"Tabelas INSS/IRRF de {ano} inválidas.") from None
+        # As faixas são percorridas em ordem: limites estritamente crescentes
+        for limites in ([i for i, _, _ in tabelas.inss.faixas], [l for l, _, _ in tabelas.irrf.faixas]):
+            if any(b <= a for a, b in zip(limites, limites[1:])):
+                raise ValueError(f"Tabelas INSS/IRRF de {ano} fora de ordem.")
+        return tabelas
+
+    @staticmethod
+    def iterar(salarios, dependentes=0, anos=5, ano_inicial=None, mes_inicial=1, reajustes=None,
+               salarios_minimos=None, mes_reajuste=1, tabelas=None, rat=0.02, sistema_s=0.058,
+               cpp=0.20) -> Iterator[Tuple[int, int, int, Dict[str, np.ndarray]]]:
+        """
+        Gera (ano, mês, ano da tabela, folha) para cada um dos `anos` x 12 meses,
+        com a folha em colunas int64 (centavos, ver `COLUNAS`). Os salários
+        informados valem no mês inicial; `reajustes` ({ano: INPC em %}) é
+        aplicado no `mes_reajuste` e `salarios_minimos` ({ano: valor}) eleva os
+        salários menores em janeiro, ambos a partir do mês seguinte ao inicial.
+        `tabelas` ({ano: TabelasCompetencia}) complementa o cadastro; um ano sem
+        tabelas usa as do último ano anterior. Meses do mesmo trecho
+        compartilham os mesmos arrays: não os altere.
+        """
+        return _meses(np.atleast_1d(para_inteiros_escalados(salarios)), dependentes, anos, ano_inicial,
+                      mes_inicial, reajustes, salarios_minimos, mes_reajuste, tabelas, rat, sistema_s, cpp)
+
+    @staticmethod
+    def projetar(salarios, dependentes=0, anos=5, por_funcionario: Sequence[str] = (), **opcoes) -> Dict:
+        """
+        Projeção em colunas (centavos). `colunas` traz ano, mês, ano da tabela
+        e o total de cada coluna da folha por mês; `por_funcionario` lista as
+        colunas que também voltam por funcionário, como matrizes meses x
+        funcionários. `totais` soma todo o período. Demais opções: ver `iterar`.
+        """
+        desconhecidas = sorted(set(por_funcionario) - set(COLUNAS))
+        if desconhecidas:
+            raise ValueError(f"Colunas desconhecidas: {desconhecidas}")
+        bruto = np.atleast_1d(para_inteiros_escalados(salarios))
+        meses = _total_meses(anos)
+        if por_funcionario and meses * bruto.size > MAX_CELULAS:
+            raise ValueError(f"Projeção por funcionário com mais de {MAX_CELULAS} valores por coluna.")
+
+        calendario = np.empty((meses, 3), dtype=np.int64)
+        somas = np.empty((meses, len(COLUNAS)), dtype=np.int64)
+        matrizes = {c: np.empty((meses, bruto.size), dtype=np.int64) for c in por_funcionario}
+        folha_anterior = soma = None
+        for indice, (ano, mes, ano_tabela, folha) in enumerate(_meses(bruto, dependentes, anos, **opcoes)):
+            if folha is not folha_anterior:
+                soma = [int(folha[c].sum()) for c in COLUNAS]
+                folha_anterior = folha
+            calendario[indice] = (ano, mes, ano_tabela)
+            somas[indice] = soma
+            for coluna, matriz in matrizes.items():
+                matriz[indice] = folha[coluna]
+
+        return {
+            "meses": meses,
+            "funcionarios": int(bruto.size),
+            "colunas": {
+                "ano": calendario[:, 0], "mes": calendario[:, 1], "ano_tabela": calendario[:, 2],
+                **{c: somas[:, i] for i, c in enumerate(COLUNAS)},
+            },
+            "por_funcionario": matrizes,
+            "totais": {c: Decimal(int(somas[:, i].sum())).scaleb(-2) for i, c in enumerate(COLUNAS)},
+        }
+
+    @staticmethod
+    def projetar_empresa(db, empresa_id: int, anos=5, por_funcionario: Sequence[str] = (), **opcoes) -> Optional[Dict]:
+        """
+        Projeção dos funcionários de uma `Empresa` com os encargos do seu regime
+        tributário. Retorna None se a empresa não existir.
+        """
+        empresa = db.get(Empresa, empresa_id)
+        if empresa is None:
+            return None
+
+        linhas = (
+            db.query(Funcionario.id, Funcionario.salario_base)
+            .filter(Funcionario.empresa_id == empresa_id)
+            .order_by(Funcionario.id)
+            .all()
+        )
+        encargos = PayrollManager.encargos_regime(empresa.regime_tributario)
+        resultado = PayrollProjection.projetar(
+            [l.salario_base or 0 for l in linhas], anos=anos, por_funcionario=por_funcionario,
+            **encargos, **opcoes,
+        )
+        resultado.update(
+            empresa_id=empresa.id,
+            razao_social=empresa.razao_social,
+            funcionario_id=np.array([l.id for l in linhas], dtype=np.int64),
+        )
+        return resultado
+
+    @staticmethod
+    def em_reais(projecao: Dict) -> Dict:
+        """Cópia da projeção com as colunas em centavos convertidas para reais (float)."""
+        calendario = ("ano", "mes", "ano_tabela")
+        return {
+            **projecao,
+            "colunas": {k: v if k in calendario else v / 100 for k, v in projecao["colunas"].items()},
+            "por_funcionario": {k: v / 100 for k, v in projecao["por_funcionario"].items()},
+        }
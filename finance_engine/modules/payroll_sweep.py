@@ -0,0 +1,138 @@
+from decimal import Decimal
+from itertools import product
+from typing import Dict, List, Sequence
+import numpy as np
+from finance_engine.core.array_utils import para_inteiros_escalados
+from finance_engine.core.tax_tables import obter_tabelas
+from finance_engine.modules.payroll_batch import BatchPayroll
+
+# Simulações "e se" da folha: uma grade salário x dependentes x RAT x Sistema S
+# x ano de competência avaliada em lote (centavos inteiros, mesmos resultados
+# de calcular_folha_detalhada/custo_total_empresa), mais os salários brutos
+# exatos em que o INSS ou o IRRF mudam de faixa.
+
+MAX_PONTOS = 200_000
+_SALARIO_MAXIMO = 10 ** 11  # R$ 1 bilhão em centavos: limite da busca binária
+
+
+def faixa_salarial(inicial, final, passo) -> np.ndarray:
+    """Salários de `inicial` a `final` (inclusive) a cada `passo`, em centavos."""
+    inicio, fim, incremento = (int(para_inteiros_escalados(v)) for v in (inicial, final, passo))
+    if incremento <= 0 or fim < inicio or inicio < 0:
+        raise ValueError("Faixa salarial inválida: use 0 <= inicial <= final e passo positivo.")
+    return np.arange(inicio, fim + 1, incremento, dtype=np.int64)
+
+
+def _faixa_inss(bruto: np.ndarray, ano) -> np.ndarray:
+    # Faixas numeradas a partir de 1 (0 = salário zerado), como em `pontos_de_quebra`
+    p = BatchPayroll.parametros(ano)
+    return np.searchsorted(p.inss_inicio, np.minimum(bruto, p.inss_teto), side="left")
+
+
+def varrer(salarios: np.ndarray, dependentes: Sequence[int] = (0,), rats: Sequence = (0.02,),
+           sistemas_s: Sequence = (0.058,), anos: Sequence = (None,)) -> Dict[str, np.ndarray]:
+    """
+    Avalia todas as combinações da grade. `salarios` em centavos (ver
+    `faixa_salarial`). Retorna colunas int64 (valores em centavos, percentual em
+    centésimos de %), com o salário variando mais rápido, depois dependentes,
+    Sistema S, RAT e ano.
+    """
+    salarios = np.asarray(salarios, dtype=np.int64)
+    anos = [obter_tabelas(a).ano for a in anos]
+    total = len(salarios) * len(dependentes) * len(rats) * len(sistemas_s) * len(anos)
+    if total > MAX_PONTOS:
+        raise ValueError(f"Grade com {total} pontos excede o limite de {MAX_PONTOS}.")
+
+    # A folha depende só de (salário, dependentes, ano): calculada uma vez por ano
+    bruto = np.tile(salarios, len(dependentes))
+    dep = np.repeat(np.asarray(dependentes, dtype=np.int64), len(salarios))
+    if np.any(dep < 0):
+        raise ValueError("Dependentes não pode ser negativo.")
+    folhas = {}
+    for ano in anos:
+        p = BatchPayroll.parametros(ano)
+        folha = BatchPayroll.calcular_folha_centavos(bruto, dep, ano=ano)
+        base_irrf = np.maximum(bruto - folha["desconto_inss"] - dep * p.deducao_dependente, 0)
+        folha["faixa_inss"] = _faixa_inss(bruto, ano)
+        folha["faixa_irrf"] = np.searchsorted(p.irrf_limite, base_irrf, side="left") + 1
+        folhas[ano] = folha
+
+    blocos: Dict[str, List[np.ndarray]] = {}
+    for ano, rat, sistema_s in product(anos, rats, sistemas_s):
+        custo = BatchPayroll.custo_empresa_centavos(bruto, rat, sistema_s)
+        colunas = {
+            "ano": np.full(bruto.shape, ano, dtype=np.int64),
+            "rat": np.full(bruto.shape, float(rat)),
+            "sistema_s": np.full(bruto.shape, float(sistema_s)),
+            "dependentes": dep,
+            **folhas[ano],
+            **{k: v for k, v in custo.items() if k != "salario_base"},
+        }
+        for nome, valores in colunas.items():
+            blocos.setdefault(nome, []).append(valores)
+
+    # Ordem: ano, RAT, Sistema S, dependentes, salário (produto acima)
+    return {nome: np.concatenate(partes) for nome, partes in blocos.items()}
+
+
+def _menor_salario(condicao, n: int) -> np.ndarray:
+    """Busca binária (em centavos) do menor salário em que `condicao` passa a valer."""
+    baixo = np.full(n, -1, dtype=np.int64)          # condição falsa
+    alto = np.full(n, _SALARIO_MAXIMO, dtype=np.int64)  # condição verdadeira
+    while np.any(alto - baixo > 1):
+        meio = (baixo + alto) // 2
+        vale = condicao(meio)
+        alto = np.where(vale, meio, alto)
+        baixo = np.where(vale, baixo, meio)
+    return alto
+
+
+def pontos_de_quebra(dependentes: Sequence[int] = (0,), anos: Sequence = (None,)) -> List[Dict]:
+    """
+    Salários brutos a partir dos quais cada faixa de INSS (e o teto) ou de
+    IRRF passa a valer, exatos ao centavo, por ano e número de dependentes.
+    """
+    pontos = []
+    for ano in anos:
+        tabelas = obter_tabelas(ano)
+        p = BatchPayroll.parametros(tabelas.ano)
+
+        # INSS: a faixa k começa 1 centavo após o seu início; o teto congela o desconto
+        for k, (_, _, aliquota) in enumerate(tabelas.inss.faixas):
+            inicio = int(p.inss_inicio[k]) + 1 if k else 0
+            pontos.append({"ano": tabelas.ano, "dependentes": None, "imposto": "INSS", "faixa": k + 1,
+                           "aliquota": aliquota, "salario_bruto": Decimal(inicio).scaleb(-2)})
+        pontos.append({"ano": tabelas.ano, "dependentes": None, "imposto": "INSS_TETO",
+                       "faixa": len(tabelas.inss.faixas), "aliquota": Decimal('0'),
+                       "salario_bruto": Decimal(int(p.inss_teto) + 1).scaleb(-2)})
+
+        # IRRF: a base (bruto - INSS - dependentes) é monotônica no bruto
+        limites = p.irrf_limite
+        for dep in dependentes:
+            deducao = int(dep) * p.deducao_dependente
+
+            def acima_do_limite(bruto):
+                inss = BatchPayroll.calcular_inss(bruto, tabelas.ano)
+                return bruto - inss - deducao > limites
+
+            salarios = _menor_salario(acima_do_limite, len(limites))
+            for k, salario in enumerate(salarios):
+                pontos.append({"ano": tabelas.ano, "dependentes": int(dep), "imposto": "IRRF",
+                               "faixa": k + 2, "aliquota": tabelas.irrf.faixas[k + 1][1],
+                               "salario_bruto": Decimal(int(salario)).scaleb(-2)})
+    return pontos
+
+
+_COLUNAS_INTEIRAS = ("ano", "dependentes", "faixa_inss", "faixa_irrf")
+_COLUNAS_DECIMAIS = ("rat", "sistema_s")
+
+
+def colunas_para_json(grade: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Colunas da grade em listas JSON: centavos viram reais (e centésimos de % viram %)."""
+    saida = {}
+    for nome, valores in grade.items():
+        if nome in _COLUNAS_INTEIRAS or nome in _COLUNAS_DECIMAIS:
+            saida[nome] = valores.tolist()
+        else:
+            saida[nome] = (valores / 100).tolist()
+    return saida
@@ -0,0 +1,98 @@
+from decimal import Decimal
+from typing import Dict, List, Sequence
+import numpy as np
+from finance_engine.core.array_utils import arredondar_centavos
+from finance_engine.core.conversao import para_decimal, quantizar
+from finance_engine.core.math_utils import validate_positive, validate_not_zero
+
+# Projeção de patrimônio com aportes mensais em forma fechada:
+#   M(n) = P(1 + i)^n + A * ((1 + i)^n - 1) / i            (aporte no fim do mês)
+#   M(n) = P(1 + i)^n + A * ((1 + i)^n - 1) / i * (1 + i)  (aporte no início)
+# Cada snapshot é calculado diretamente a partir do seu mês, sem acumular o
+# laço mês a mês. Taxas em % ao mês, como em FinancialCalculator.juros_compostos.
+
+
+def _montante(P: Decimal, A: Decimal, taxa_dec: Decimal, n: int, antecipado: bool) -> Decimal:
+    # Mesma ordem de operações de juros_compostos, para resultados idênticos
+    montante_principal = P * (1 + taxa_dec) ** n
+    if taxa_dec > 0:
+        montante_aportes = A * (((1 + taxa_dec) ** n - 1) / taxa_dec)
+        if antecipado:
+            montante_aportes *= (1 + taxa_dec)
+    else:
+        montante_aportes = A * n
+    return montante_principal + montante_aportes
+
+
+def projetar(aporte_mensal, taxa_mensal, meses, principal=0, intervalo=12, antecipado=False) -> List[Dict]:
+    """
+    Snapshots do patrimônio a cada `intervalo` meses (12 = anual, 1 = mensal);
+    o último mês do horizonte sempre entra. `antecipado=True` considera o
+    aporte feito no início de cada mês.
+    """
+    P = para_decimal(principal)
+    A = para_decimal(aporte_mensal)
+    i = para_decimal(taxa_mensal)
+    n = int(meses)
+    intervalo = int(intervalo)
+
+    validate_positive(P, "Montante inicial")
+    validate_positive(i, "Taxa")
+    validate_positive(n, "Tempo")
+    validate_positive(intervalo, "Intervalo")
+    validate_not_zero(intervalo, "Intervalo")
+
+    taxa_dec = i / 100
+    marcos = list(range(intervalo, n + 1, intervalo))
+    if not marcos or marcos[-1] != n:
+        marcos.append(n)
+
+    evolucao = []
+    for mes in marcos:
+        total = _montante(P, A, taxa_dec, mes, antecipado)
+        investido = P + (A * mes)
+        evolucao.append({
+            "mes": mes,
+            "patrimonio_total": quantizar(total),
+            "total_investido": quantizar(investido),
+            "juros_gerados": quantizar(total - investido),
+        })
+    return evolucao
+
+
+def projetar_anual(aporte_mensal, taxa_mensal, anos, principal=0, antecipado=False) -> List[Dict]:
+    """Snapshots anuais (chave `ano`) para um horizonte em anos."""
+    evolucao = projetar(aporte_mensal, taxa_mensal, int(anos) * 12, principal, 12, antecipado)
+    return [{"ano": linha.pop("mes") // 12, **linha} for linha in evolucao]
+
+
+def grade_sensibilidade(renda_mensal, percentuais_aporte: Sequence, taxas_mensais: Sequence,
+                        horizontes_meses: Sequence, principal=0, antecipado=False) -> Dict:
+    """
+    Patrimônio final para todas as combinações (% da renda aportado, taxa % a.m.,
+    horizonte em meses), em uma única avaliação vetorizada.
+    Retorna arrays em centavos (int64) com forma (percentuais, taxas, horizontes).
+    """
+    renda = float(para_decimal(renda_mensal))
+    P = float(para_decimal(principal))
+    aporte = renda * np.asarray(percentuais_aporte, dtype=np.float64)[:, None, None] / 100
+    i = np.asarray(taxas_mensais, dtype=np.float64)[None, :, None] / 100
+    n = np.asarray(horizontes_meses, dtype=np.int64)[None, None, :]
+
+    if np.any(i < 0) or np.any(n < 0) or np.any(aporte < 0) or P < 0:
+        raise ValueError("Percentuais, taxas e horizontes não podem ser negativos.")
+
+    fator = (1 + i) ** n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Limite i -> 0 do fator de acumulação da série: n
+        serie = np.where(i > 0, np.expm1(n * np.log1p(i)) / i, n)
+    if antecipado:
+        serie = serie * (1 + i)
+
+    patrimonio = P * fator + aporte * serie
+    investido = np.broadcast_to(P + aporte * n, patrimonio.shape)
+    return {
+        "patrimonio_total": arredondar_centavos(patrimonio),
+        "total_investido": arredondar_centavos(investido),
+        "juros_gerados": arredondar_centavos(patrimonio - investido),
+    }
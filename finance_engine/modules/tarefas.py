@@ -0,0 +1,107 @@
+import json
+from typing import List, Optional
+import numpy as np
+from finance_engine.core.resultados import lista_json
+from finance_engine.core.respostas import codificar
+from finance_engine.modules import amortization
+from finance_engine.modules.business_batch import BatchBusiness
+from finance_engine.modules.cache_calculos import CalculosEmCache
+from finance_engine.modules.calculator import FinancialCalculator
+from finance_engine.modules.payroll_sweep import faixa_salarial, varrer, pontos_de_quebra, colunas_para_json
+from finance_engine.modules.projection import grade_sensibilidade
+
+# Tarefas de CPU dos endpoints, em funções de módulo: rodam no próprio processo
+# da API quando são curtas, ou no pool de processos (ver core/execucao.py)
+# quando são pesadas. Devolvem o corpo JSON já codificado, então a
+# serialização também sai do processo principal. Nada aqui abre o banco.
+
+
+def pagina_amortizacao(sistema: str, valor, taxa_anual, meses: int, inicio: int, tamanho: int,
+                       formato="json") -> bytes:
+    """Página da tabela SAC/PRICE, em linhas (`json`) ou em colunas (`colunas`)."""
+    cabecalho = {
+        "sistema": sistema,
+        "meses": meses,
+        "pagina": (inicio - 1) // tamanho + 1,
+        "tamanho": tamanho,
+        "total_paginas": -(-meses // tamanho),
+    }
+    if formato == "colunas":
+        cronogramas = {"SAC": amortization.cronograma_sac, "PRICE": amortization.cronograma_price}
+        parte = cronogramas[sistema](valor, taxa_anual, meses, inicio=inicio, fim=inicio + tamanho - 1)
+        colunas = {nome: valores / 100 for nome, valores in parte.colunas().items() if nome != "mes"}
+        return codificar({**cabecalho, "colunas": {"mes": parte.mes, **colunas}})
+
+    linhas = CalculosEmCache.pagina_amortizacao(sistema, valor, taxa_anual, meses, inicio, tamanho)
+    corpo = json.dumps(cabecalho)
+    return f'{corpo[:-1]},"linhas":{lista_json(linhas)}}}'.encode("utf-8")
+
+
+def varredura_folha(salario_inicial, salario_final, passo, dependentes, rats, sistemas_s, anos) -> bytes:
+    """Grade "e se" de folha/custo em colunas, com os pontos de quebra das faixas."""
+    salarios = faixa_salarial(salario_inicial, salario_final, passo)
+    grade = varrer(salarios, dependentes, rats, sistemas_s, anos)
+    pontos = pontos_de_quebra(dependentes, anos)
+    return codificar({
+        "total_pontos": len(grade["salario_bruto"]),
+        "colunas": colunas_para_json(grade),
+        "pontos_de_quebra": [
+            {**p, "aliquota": float(p["aliquota"]), "salario_bruto": float(p["salario_bruto"])} for p in pontos
+        ],
+    })
+
+
+def sensibilidade(salario_liquido, percentuais_aporte, taxas_mensais, horizontes_anos) -> bytes:
+    """Mapa de calor do patrimônio final para cada (% aportado, taxa, horizonte)."""
+    grade = grade_sensibilidade(
+        salario_liquido,
+        percentuais_aporte,
+        taxas_mensais,
+        [anos * 12 for anos in horizontes_anos],
+        antecipado=True,
+    )
+    return codificar({
+        "salario_liquido": salario_liquido,
+        "percentuais_aporte": percentuais_aporte,
+        "taxas_mensais": taxas_mensais,
+        "horizontes_anos": horizontes_anos,
+        **{chave: valores / 100 for chave, valores in grade.items()},
+    })
+
+
+def tir(fluxos: Optional[List[float]], projetos: Optional[List[List[float]]], estimativa=0.1, refinar=False) -> bytes:
+    """TIR (% ao período) de um fluxo, ou de vários projetos em lote (null onde não há TIR)."""
+    if projetos is not None:
+        return codificar({"tir": FinancialCalculator.tir_lote(projetos, estimativa)})
+    return codificar({"tir": FinancialCalculator.tir(fluxos, estimativa, refinar)})
+
+
+def _coluna(valores):
+    # null (None) vira NaN, que o lote reporta como erro da linha
+    return np.asarray(valores, dtype=float)
+
+
+def precificacao_lote(custos_unitarios, impostos_venda_perc, despesas_venda_perc, margens_lucro_perc) -> bytes:
+    """Preço de venda, markup e lucro nominal de um catálogo, em colunas, com erros por linha."""
+    lote = BatchBusiness.precificar_lote(
+        _coluna(custos_unitarios), _coluna(impostos_venda_perc),
+        _coluna(despesas_venda_perc), _coluna(margens_lucro_perc),
+    )
+    return codificar(BatchBusiness.colunas_para_json(lote, casas={"markup_fator": 4}))
+
+
+def dre_lote(receitas_liquidas, custos_variaveis, despesas_fixas, margens_contribuicao_percentual) -> bytes:
+    """EBITDA e ponto de equilíbrio (sobre as despesas fixas) de cada filial, em colunas."""
+    ebitda = BatchBusiness.colunas_para_json(BatchBusiness.ebitda_lote(
+        _coluna(receitas_liquidas), _coluna(custos_variaveis), _coluna(despesas_fixas)
+    ))
+    equilibrio = BatchBusiness.colunas_para_json(BatchBusiness.ponto_equilibrio_lote(
+        _coluna(despesas_fixas), _coluna(margens_contribuicao_percentual)
+    ))
+    erros = sorted(ebitda["erros"] + equilibrio["erros"], key=lambda erro: erro["linha"])
+    return codificar({
+        "total": ebitda["total"],
+        "com_erro": len({erro["linha"] for erro in erros}),
+        "colunas": {**ebitda["colunas"], **equilibrio["colunas"]},
+        "erros": erros,
+    })
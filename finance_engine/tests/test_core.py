@@ -24,3 +24,1000 @@ def test_divisao_por_zero_protecao():
     from finance_engine.modules.business import BusinessAnalytics
     with pytest.raises(ValueError, match="Margem de contribuição não pode ser zero"):
         BusinessAnalytics.ponto_equilibrio(1000, 0)
+
+def test_folha_lote_igual_calculo_individual():
+    """A folha em lote (centavos) deve bater com o cálculo Decimal individual."""
+    import numpy as np
+    from finance_engine.modules.payroll_batch import BatchPayroll
+    salarios = [0, 1621.00, 1621.01, 2902.85, 4354.28, 5000, 6543.21, 7350.01, 8475.56, 25000]
+    dependentes = [0, 1, 0, 2, 0, 0, 3, 1, 0, 2]
+    lote = BatchPayroll.calcular_folha_lote(salarios, dependentes)
+    for idx, (salario, dep) in enumerate(zip(salarios, dependentes)):
+        esperado = PayrollManager.calcular_folha_detalhada(salario, dependentes=dep)
+        for chave in ("desconto_inss", "desconto_irrf", "fgts_recolhido", "salario_liquido"):
+            assert Decimal(int(lote[chave][idx])).scaleb(-2) == esperado[chave]
+
+    # Custo empresa: o lote e o escalar concordam em todas as linhas, inclusive salário zero
+    centavos = np.array([int(Decimal(str(s)) * 100) for s in salarios], dtype=np.int64)
+    for regime in ({}, PayrollManager.encargos_regime("Simples Nacional")):
+        custo_lote = BatchPayroll.custo_empresa_centavos(centavos, **regime)
+        for idx, salario in enumerate(salarios):
+            esperado = PayrollManager.custo_empresa(salario, **regime).to_dict()
+            for chave, coluna in custo_lote.items():
+                assert Decimal(int(coluna[idx])).scaleb(-2) == esperado[chave], (salario, chave)
+
+def test_folha_empresa_em_lote():
+    """Processa a folha de uma empresa inteira a partir do banco."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database.models import Base, Empresa, Funcionario
+    from finance_engine.modules.payroll_batch import BatchPayroll
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    empresa = Empresa(razao_social="Jubarte Ltda", cnpj="00.000.000/0001-00")
+    empresa.funcionarios = [
+        Funcionario(nome="Ana", salario_base=Decimal("5000.00")),
+        Funcionario(nome="Bruno", salario_base=Decimal("1621.00")),
+    ]
+    db.add(empresa)
+    db.commit()
+
+    resultado = BatchPayroll.processar_empresa(db, empresa.id)
+    assert resultado["total_funcionarios"] == 2
+    assert resultado["funcionarios"][1]["desconto_inss"] == Decimal("121.58")
+    assert resultado["totais"]["salario_bruto"] == Decimal("6621.00")
+    assert BatchPayroll.processar_empresa(db, 999) is None
+    db.close()
+
+def test_tabelas_versionadas_por_ano():
+    """As tabelas compiladas são imutáveis e selecionadas pelo ano de competência."""
+    from finance_engine.core.tax_tables import obter_tabelas
+    tabelas_2025 = obter_tabelas(2025)
+    # Salário Mínimo 2025: R$ 1.518,00 * 7.5% = 113.85
+    assert PayrollManager.calcular_inss(Decimal('1518.00'), ano=2025) == Decimal('113.85')
+    assert tabelas_2025.inss.calcular(Decimal('10000')) == PayrollManager.calcular_inss(Decimal('8157.41'), ano=2025)
+    with pytest.raises(AttributeError):
+        tabelas_2025.inss.teto = Decimal('0')
+    with pytest.raises(ValueError):
+        obter_tabelas(1999)
+
+def test_cronograma_colunar_igual_tabela_decimal():
+    """O cronograma em forma fechada reproduz as tabelas SAC/PRICE linha a linha."""
+    for valor, taxa, meses in [(100000, 12, 12), (350000.01, 10.5, 360), (80000.05, 0, 10)]:
+        sac = FinancialCalculator.cronograma_sac(valor, taxa, meses, verificar=True)
+        assert sac.linhas() == FinancialCalculator.tabela_sac(valor, taxa, meses)
+    price = FinancialCalculator.cronograma_price(350000.01, 10.5, 420, verificar=True)
+    assert price.linhas() == FinancialCalculator.tabela_price(350000.01, 10.5, 420)
+
+    lote = FinancialCalculator.precificar_lote("PRICE", [350000.01], [10.5], [420])
+    assert lote["prestacao_inicial"][0] == price.prestacao[0]
+
+def test_iteradores_saltam_para_o_mes():
+    """Os geradores começam direto no mês pedido e reproduzem a tabela completa."""
+    import itertools
+    tabela = FinancialCalculator.tabela_price(250000, 9.5, 360)
+    pagina = list(itertools.islice(FinancialCalculator.iter_price(250000, 9.5, 360, inicio=121), 12))
+    assert pagina == tabela[120:132]
+    assert list(FinancialCalculator.iter_sac(250000, 9.5, 360, bloco=50)) == FinancialCalculator.tabela_sac(250000, 9.5, 360)
+
+def test_escritor_simulacoes_grava_em_lote():
+    """A fila write-behind devolve ids na hora e grava tudo no encerramento."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from finance_engine.database.models import Base, SimulacaoFinanceira
+    from finance_engine.database.writer import EscritorSimulacoes
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    escritor = EscritorSimulacoes(fabrica, tamanho_lote=50, intervalo=0.05)
+
+    ids = [escritor.enfileirar("PAYROLL_2026", {"bruto": i}, {}, "TESTE") for i in range(120)]
+    escritor.parar()
+
+    assert ids == sorted(set(ids)) and max(ids) < 2 ** 53
+    db = fabrica()
+    assert db.query(SimulacaoFinanceira).count() == 120
+    assert db.get(SimulacaoFinanceira, ids[7]).parametros_entrada == {"bruto": 7}
+    db.close()
+
+def test_engine_sqlite_em_modo_wal(tmp_path):
+    """A fábrica de engines aplica WAL e synchronous=NORMAL em bancos SQLite em arquivo."""
+    from sqlalchemy import text
+    from finance_engine.database.session import criar_engine
+    engine = criar_engine(f"sqlite:///{tmp_path / 'jubarte.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    engine.dispose()
+
+def test_engine_assincrono_com_wal(tmp_path):
+    """A variante assíncrona troca o driver pelo assíncrono e aplica os mesmos PRAGMAs."""
+    import asyncio
+    from sqlalchemy import text
+    from finance_engine.database.session import criar_engine_async
+
+    pytest.importorskip("aiosqlite")
+    engine = criar_engine_async(f"sqlite:///{tmp_path / 'jubarte.db'}")
+
+    async def consultar():
+        async with engine.connect() as conn:
+            modo = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            sincronia = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+        await engine.dispose()
+        return modo, sincronia
+
+    assert engine.url.drivername == "sqlite+aiosqlite"
+    assert asyncio.run(consultar()) == ("wal", 1)
+
+def test_historico_paginado_por_keyset():
+    """Percorre o histórico por cursor, com filtros e projeção de resumo."""
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine, inspect
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database.migrations import migrar
+    from finance_engine.database.models import SimulacaoFinanceira
+    from finance_engine.database.queries import listar_simulacoes
+
+    engine = create_engine("sqlite://")
+    migrar(engine)
+    indices = {ix["name"] for ix in inspect(engine).get_indexes("simulacoes")}
+    assert "ix_simulacoes_data_criacao_id" in indices
+
+    db = sessionmaker(bind=engine)()
+    base = datetime(2026, 1, 1)
+    db.add_all(
+        SimulacaoFinanceira(id=i, tipo="PAYROLL_2026" if i % 2 else "AMORTIZACAO",
+                            data_criacao=base + timedelta(minutes=i // 3), usuario_ref="U1",
+                            parametros_entrada={}, resultados={})
+        for i in range(1, 26)
+    )
+    db.commit()
+
+    vistos, cursor = [], None
+    while True:
+        pagina = listar_simulacoes(db, limite=4, cursor=cursor, tipo="PAYROLL_2026")
+        vistos += [item["id"] for item in pagina["itens"]]
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+    assert vistos == [i for i in range(25, 0, -1) if i % 2]
+    assert "resultados" not in pagina["itens"][0]
+    with pytest.raises(ValueError):
+        listar_simulacoes(db, cursor="invalido")
+    db.close()
+
+def test_migracao_preenche_simulacoes_sem_data():
+    """Tabelas antigas com data_criacao nula são preenchidas e o histórico pagina até o fim."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database.migrations import DATA_DESCONHECIDA, migrar
+    from finance_engine.database.queries import listar_simulacoes
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE simulacoes (id INTEGER PRIMARY KEY, tipo VARCHAR(50), data_criacao DATETIME,"
+            " parametros_entrada JSON, resultados JSON, usuario_ref VARCHAR(100))"
+        )
+        conn.exec_driver_sql("INSERT INTO simulacoes (id, tipo) VALUES (1, 'A'), (2, 'A'), (3, 'A')")
+        conn.exec_driver_sql("INSERT INTO simulacoes (id, tipo, data_criacao) VALUES (4, 'A', '2026-01-01 00:00:00.000000')")
+    migrar(engine)
+
+    db = sessionmaker(bind=engine)()
+    vistos, cursor = [], None
+    while True:
+        pagina = listar_simulacoes(db, limite=1, cursor=cursor)
+        vistos += [(item["id"], item["data_criacao"]) for item in pagina["itens"]]
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+    assert [i for i, _ in vistos] == [4, 3, 2, 1]
+    assert all(data == DATA_DESCONHECIDA for _, data in vistos[1:])
+    db.close()
+
+def test_cache_de_calculos_com_versao_de_tabelas():
+    """Entradas equivalentes compartilham a chave; trocar tabelas invalida o cache."""
+    from finance_engine.core.cache import CacheResultados, memoizar
+    from finance_engine.core.tax_tables import obter_tabelas, registrar_tabelas
+
+    cache = CacheResultados(capacidade=2, ttl=60)
+    chamadas = []
+
+    @memoizar("folha_teste", cache=cache)
+    def folha(salario_bruto, dependentes=0):
+        chamadas.append(salario_bruto)
+        return PayrollManager.calcular_folha_detalhada(salario_bruto, dependentes)
+
+    primeira = folha(5000)
+    primeira["salario_liquido"] = None  # a cópia devolvida não altera o cache
+    assert folha(5000.0, dependentes=0)["salario_liquido"] == Decimal('4498.49')
+    assert folha("5000.00", 0) and len(chamadas) == 1
+
+    registrar_tabelas(obter_tabelas(2026))
+    folha(5000)
+    assert len(chamadas) == 2
+    folha(6000), folha(7000)
+    estatisticas = cache.estatisticas()
+    assert estatisticas["acertos"] == 2 and estatisticas["descartes"] == 2
+
+def test_relatorio_streaming_em_memoria_e_arquivos_exclusivos():
+    """O relatório é escrito em streaming e cada chamada sem destino usa um arquivo próprio."""
+    import io
+    import os
+    from openpyxl import load_workbook
+    from generate_report import generate_full_report
+
+    buffer = io.BytesIO()
+    generate_full_report(salary=5000, months=24, output=buffer)
+    wb = load_workbook(buffer, read_only=True)
+    assert wb.sheetnames == ['Custo Funcionario', 'Amortizacao SAC', 'Amortizacao PRICE']
+    linhas = list(wb['Amortizacao SAC'].iter_rows(values_only=True))
+    assert len(linhas) == 25 and linhas[0][0] == 'mes'
+
+    primeiro, segundo = generate_full_report(months=6), generate_full_report(months=6)
+    try:
+        assert primeiro != segundo and os.path.exists(primeiro)
+    finally:
+        os.remove(primeiro)
+        os.remove(segundo)
+
+def test_jobs_de_relatorio_reaproveitam_entradas_identicas(tmp_path):
+    """Relatórios rodam no pool de processos e entradas iguais geram um único job."""
+    from report_jobs import GerenciadorRelatorios, CONCLUIDO
+    gerenciador = GerenciadorRelatorios(max_workers=1, diretorio=str(tmp_path))
+    try:
+        job = gerenciador.submeter({"salary": 5000, "months": 6})
+        assert gerenciador.submeter({"months": 6, "salary": 5000}) is job
+        job.future.result(timeout=60)
+        assert job.status == CONCLUIDO
+        assert gerenciador.obter(job.id).caminho.startswith(str(tmp_path))
+    finally:
+        gerenciador.encerrar()
+
+def test_jobs_de_relatorio_seguem_versao_dos_dados_e_downloads(tmp_path):
+    """Dados da empresa alterados geram outro job; arquivo em download não expira."""
+    import os
+    import time
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database.models import Base, Empresa, Funcionario
+    from finance_engine.database.resumos import versao_dados
+    from report_jobs import GerenciadorRelatorios, JobRelatorio
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    empresa = Empresa(razao_social="ACME")
+    empresa.funcionarios = [Funcionario(nome="Ana", cargo="Analista", salario_base=Decimal("3000"))]
+    db.add(empresa)
+    db.commit()
+    antes = versao_dados(db, empresa.id)
+    time.sleep(0.002)
+    # Troca de cargo não muda a soma dos salários, mas muda o relatório
+    empresa.funcionarios[0].cargo = "Gerente"
+    db.commit()
+    depois = versao_dados(db, empresa.id)
+    assert depois != antes and versao_dados(db, 999) is None
+    db.close()
+
+    gerenciador = GerenciadorRelatorios(max_workers=1, diretorio=str(tmp_path), retencao=60)
+    try:
+        parametros = {"salary": 5000, "months": 1}
+        job = gerenciador.submeter(parametros, versao_dados=antes)
+        assert gerenciador.submeter(parametros, versao_dados=antes) is job
+        novo = gerenciador.submeter(parametros, versao_dados=depois)
+        assert novo is not job and novo.caminho != job.caminho
+        job.future.result(timeout=60)
+        novo.future.result(timeout=60)
+    finally:
+        gerenciador.encerrar()
+
+    # Job concluído e expirado, mas com download em andamento: o arquivo fica
+    gerenciador = GerenciadorRelatorios(max_workers=1, diretorio=str(tmp_path), retencao=0)
+    job = JobRelatorio("k", parametros, str(tmp_path / "k.xlsx"))
+    open(job.caminho, "wb").close()
+    job.concluido_em = time.time() - 1
+    gerenciador._jobs[job.id], gerenciador._por_chave["k"] = job, job.id
+    gerenciador.iniciar_download(job)
+    gerenciador._expirar()
+    assert gerenciador.obter(job.id) is job and os.path.exists(job.caminho)
+    gerenciador.concluir_download(job)
+    gerenciador._expirar()
+    assert gerenciador.obter(job.id) is None and not os.path.exists(job.caminho)
+
+def test_tir_protegida_e_em_lote():
+    """A TIR converge em fluxos atípicos, acusa ausência de raiz e resolve lotes."""
+    import numpy as np
+    assert FinancialCalculator.tir([-1000, 300, 400, 500]) == Decimal('8.8963')
+    assert FinancialCalculator.tir([-1000, 300, 400, 500], refinar=True) == Decimal('8.8963')
+    # Duas raízes (10% e 20%): vale a mais próxima da estimativa
+    assert FinancialCalculator.tir([-100, 230, -132]) == Decimal('10.0000')
+    assert FinancialCalculator.tir([-100, 230, -132], estimativa=0.25) == Decimal('20.0000')
+    with pytest.raises(ValueError):
+        FinancialCalculator.tir([100, 100])
+
+    lote = FinancialCalculator.tir_lote([[-1000, 300, 400, 500], [-100, 100], [100, 100]])
+    assert round(lote[0], 4) == 8.8963 and lote[1] == 0 and np.isnan(lote[2])
+    with pytest.raises(ValueError, match="ao menos um projeto"):
+        FinancialCalculator.tir_lote([])
+
+def test_projecao_fechada_consistente_com_juros_compostos():
+    """Snapshots da projeção batem com juros_compostos e com a grade vetorizada."""
+    from finance_engine.modules.projection import projetar, projetar_anual, grade_sensibilidade
+
+    evolucao = projetar(500, 1.2, 36, principal=10000, intervalo=12)
+    assert [linha["mes"] for linha in evolucao] == [12, 24, 36]
+    final = FinancialCalculator.juros_compostos(10000, 1.2, 36, 500)
+    assert evolucao[-1]["patrimonio_total"] == final["montante_total"]
+    assert evolucao[-1]["juros_gerados"] == final["juros_ganhos"]
+
+    # Aporte no início do mês: equivale ao laço (saldo + aporte) * (1 + i)
+    saldo = Decimal('0')
+    for _ in range(24):
+        saldo = (saldo + 1000) * Decimal('1.008')
+    anual = projetar_anual(1000, 0.8, 2, antecipado=True)
+    assert anual[-1]["ano"] == 2 and anual[-1]["patrimonio_total"] == saldo.quantize(Decimal('0.01'))
+
+    grade = grade_sensibilidade(5000, [10, 20], [0, 0.8], [24], antecipado=True)
+    assert grade["patrimonio_total"].shape == (2, 2, 1)
+    assert grade["patrimonio_total"][1, 1, 0] == int(anual[-1]["patrimonio_total"] * 100)
+    assert grade["patrimonio_total"][1, 0, 0] == 1000 * 24 * 100
+    # Empate no meio centavo: ROUND_HALF_UP como no Decimal, não o arredondamento bancário
+    assert grade_sensibilidade(0, [0], [0], [0], principal=0.125)["patrimonio_total"][0, 0, 0] == 13
+
+def test_monte_carlo_reprodutivel_e_consistente(tmp_path):
+    """Mesma semente, mesmas bandas; sem volatilidade, o resultado é a projeção fechada."""
+    from finance_engine.modules.montecarlo import SimuladorMonteCarlo, carregar_historico
+    from finance_engine.modules.projection import projetar_anual
+
+    simulador = SimuladorMonteCarlo(max_workers=1, tamanho_bloco=500)
+    parametros = dict(caminhos=1200, meses=24, aporte_mensal=1000, valor_financiado=50000,
+                      prazo_financiamento=24, semente=123)
+    resultado = simulador.simular(**parametros)
+    assert resultado == simulador.simular(**parametros)
+    assert resultado["meses"] == [12, 24]
+    assert resultado["patrimonio"]["p5"][-1] < resultado["patrimonio"]["p50"][-1] < resultado["patrimonio"]["p95"][-1]
+    assert resultado["saldo_devedor"]["p50"] == [pytest.approx(25000, rel=0.05), 0.0]
+
+    deterministico = simulador.simular(caminhos=10, meses=24, aporte_mensal=1000, volatilidade=0, semente=1)
+    esperado = projetar_anual(1000, 0.8, 2, antecipado=True)[-1]["patrimonio_total"]
+    assert deterministico["patrimonio"]["p50"][-1] == pytest.approx(float(esperado), abs=0.01)
+
+    csv = tmp_path / "historico.csv"
+    csv.write_text("data;selic;ipca\n2024-01;0,97;0,42\n2024-02;0,80;0,83\n")
+    bootstrap = simulador.simular(caminhos=100, meses=12, aporte_mensal=100,
+                                  historico=carregar_historico(str(csv)), semente=5)
+    assert bootstrap["modelo"] == "bootstrap" and bootstrap["patrimonio"]["p50"][0] > 1200
+
+_MONTECARLO_API = """
+import json
+import api
+from fastapi.testclient import TestClient
+corpo = {"caminhos": 1000, "meses": 12}
+with TestClient(api.app) as cliente:
+    sem_semente = cliente.post("/simulate/montecarlo", json=corpo)
+    semente = sem_semente.json()["semente"]
+    repetida = cliente.post("/simulate/montecarlo", json={**corpo, "semente": semente})
+print(json.dumps({"status": sem_semente.status_code, "semente": semente,
+                  "reproduz": repetida.json() == sem_semente.json()}))
+"""
+
+def test_monte_carlo_pela_api_sem_semente(tmp_path):
+    """Sem semente, a API sorteia uma que cabe em 64 bits (orjson) e reproduz o resultado."""
+    import json
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    pytest.importorskip("orjson")
+    ambiente = dict(os.environ, JUBARTE_DATABASE_URL=f"sqlite:///{tmp_path / 'mc.db'}")
+    saida = subprocess.run(
+        [sys.executable, "-c", _MONTECARLO_API], cwd=Path(__file__).resolve().parents[2],
+        env=ambiente, capture_output=True, text=True, check=True,
+    )
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+    assert resultado["status"] == 200
+    assert 0 <= resultado["semente"] < 2 ** 63 and resultado["reproduz"]
+
+def test_varredura_de_folha_e_pontos_de_quebra():
+    """A grade em lote reproduz os cálculos unitários e acha as mudanças de faixa ao centavo."""
+    from finance_engine.modules.payroll_sweep import faixa_salarial, varrer, pontos_de_quebra
+
+    grade = varrer(faixa_salarial(1000, 12000, 250), dependentes=(0, 2), rats=(0.01, 0.03), anos=(2025, 2026))
+    assert len(grade["salario_bruto"]) == 45 * 2 * 2 * 2
+    for k in (0, 97, 200, 359):
+        salario = Decimal(int(grade["salario_bruto"][k])).scaleb(-2)
+        ano, dependentes = int(grade["ano"][k]), int(grade["dependentes"][k])
+        folha = PayrollManager.calcular_folha_detalhada(salario, dependentes=dependentes, ano=ano)
+        custo = PayrollManager.custo_total_empresa(salario, rat=grade["rat"][k])
+        assert Decimal(int(grade["salario_liquido"][k])).scaleb(-2) == folha["salario_liquido"]
+        assert Decimal(int(grade["custo_total_mensal"][k])).scaleb(-2) == custo["custo_total_mensal"]
+
+    pontos = [p for p in pontos_de_quebra(anos=(2026,)) if p["imposto"] == "IRRF"]
+    isencao = pontos[0]["salario_bruto"]
+    base = lambda bruto: bruto - PayrollManager.calcular_inss(bruto, ano=2026)
+    assert base(isencao) > Decimal('5000.00') >= base(isencao - Decimal('0.01'))
+
+def test_metricas_opcionais_instrumentam_e_restauram():
+    """Com as métricas ligadas as chamadas são cronometradas; desligadas, os métodos originais voltam."""
+    from finance_engine.core import metrics
+    original = vars(PayrollManager)["custo_total_empresa"]
+    metrics.registro.limpar()
+    try:
+        metrics.habilitar(classes=(PayrollManager,))
+        PayrollManager.custo_total_empresa(5000)
+        PayrollManager.custo_total_empresa(6000)
+        with metrics.medir("jubarte_bloco_segundos", etapa="teste"):
+            pass
+        histograma = metrics.registro.histograma("jubarte_funcao_segundos", funcao="PayrollManager.custo_total_empresa")
+        assert histograma.total == 2
+        texto = metrics.registro.exportar_prometheus()
+        assert 'jubarte_funcao_segundos_count{funcao="PayrollManager.custo_total_empresa"} 2' in texto
+        assert 'jubarte_bloco_segundos_bucket{etapa="teste",le="+Inf"} 1' in texto
+    finally:
+        metrics.desabilitar()
+        metrics.registro.limpar()
+    assert vars(PayrollManager)["custo_total_empresa"] is original
+
+def test_comparador_de_benchmarks_acusa_regressoes():
+    """O comparador só acusa casos que pioraram além do limite configurado e do piso de ruído."""
+    from benchmarks.run_benchmarks import LIMITE_MICRO, comparar, medir
+
+    baseline = {"rapido": {"mediana_s": 0.010}, "lento": {"mediana_s": 0.010}}
+    atual = {"rapido": {"mediana_s": 0.012}, "lento": {"mediana_s": 0.020}, "novo": {"mediana_s": 1.0}}
+    regressoes = comparar(atual, baseline, limite=0.25)
+    assert [r["caso"] for r in regressoes] == ["lento"] and regressoes[0]["razao"] == 2.0
+    assert comparar(atual, baseline, limite=1.5) == []
+
+    # Microssegundos: abaixo do piso não conta; casos registrados com limite próprio toleram mais
+    assert comparar({"rapido": {"mediana_s": 2e-6}}, {"rapido": {"mediana_s": 1e-6}}) == []
+    micro = {"folha_detalhada_unitaria": {"referencia_s": 1.4e-5}}
+    assert comparar(micro, {"folha_detalhada_unitaria": {"referencia_s": 1e-5}}, limite=0.25) == []
+    regressoes = comparar(micro, {"folha_detalhada_unitaria": {"referencia_s": 8e-6}}, limite=0.25)
+    assert regressoes[0]["limite"] == LIMITE_MICRO
+
+    resultado = medir(lambda: sum(range(100)), repeticoes=3, rodadas=2, duracao_minima=0.001)
+    assert resultado["amostras"] == 6 and resultado["rodadas"] == 2
+    assert 0 < resultado["minimo_s"] <= resultado["referencia_s"] <= resultado["maximo_s"]
+
+def test_conversao_decimal_mesma_semantica_do_texto():
+    """para_decimal/quantizar devem reproduzir Decimal(str(x)) + quantize ROUND_HALF_UP."""
+    from decimal import ROUND_HALF_UP, InvalidOperation
+    from finance_engine.core.conversao import para_decimal, quantizar
+    from finance_engine.core.math_utils import to_decimal
+
+    for valor in (0, 7, -3, 2.675, 0.1 + 0.2, 1e-7, 1e22, "1234.565", Decimal("1.005"), Decimal("-0.005")):
+        assert str(para_decimal(valor)) == str(Decimal(str(valor)))
+        for padrao in ("0.01", "0.0001", "1"):
+            esperado = Decimal(str(valor)).quantize(Decimal(padrao), rounding=ROUND_HALF_UP)
+            assert str(quantizar(para_decimal(valor), padrao)) == str(esperado)
+            assert str(to_decimal(valor, padrao)) == str(esperado)
+    assert para_decimal(None) == Decimal("0")
+    with pytest.raises(InvalidOperation):
+        para_decimal(True)
+
+def test_resultados_tipados_e_adaptadores():
+    """Os tipos de resultado são imutáveis e seus adaptadores reproduzem os dicionários antigos."""
+    import dataclasses
+    import json
+    from finance_engine.modules.amortization import cronograma_price
+    from finance_engine.modules.business import BusinessAnalytics
+    from finance_engine.modules.cache_calculos import CalculosEmCache
+
+    folha = PayrollManager.folha_detalhada(7300.55, dependentes=1)
+    assert folha.to_dict() == PayrollManager.calcular_folha_detalhada(7300.55, dependentes=1)
+    assert folha.to_dict(texto=True)["salario_bruto"] == "7300.55"
+    corpo = json.loads(folha.to_json(id=7), parse_float=Decimal)
+    assert corpo == {**folha.to_dict(), "id": 7}
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        folha.salario_liquido = Decimal("0")
+
+    # A construção passa pelo __init__ da dataclass (e por um eventual __post_init__)
+    from finance_engine.core.resultados import Resultado, tipo_resultado
+
+    @tipo_resultado
+    class Positivo(Resultado):
+        valor: Decimal
+
+        def __post_init__(self):
+            if self.valor < 0:
+                raise ValueError("negativo")
+    assert Positivo(Decimal("1")).to_json() == '{"valor":1}'
+    with pytest.raises(ValueError):
+        Positivo(Decimal("-1"))
+
+    assert PayrollManager.custo_empresa(5000).to_dict() == PayrollManager.custo_total_empresa(5000)
+    markup = BusinessAnalytics.preco_markup(100, 10, 5, 15)
+    assert markup.to_dict() == BusinessAnalytics.precificacao_markup(100, 10, 5, 15)
+
+    cronograma = cronograma_price(300000.5, 10.5, 120)
+    registros = cronograma.registros()
+    assert [r.to_dict() for r in registros] == cronograma.linhas()
+    assert [json.loads(r.to_json(), parse_float=Decimal) for r in registros] == cronograma.linhas()
+    assert not hasattr(registros[0], "__dict__")
+
+    # Resultados imutáveis saem do cache sem cópia
+    assert CalculosEmCache.folha_detalhada(5000) is CalculosEmCache.folha_detalhada("5000.00")
+
+def test_resposta_json_rapida_e_compressao():
+    """Os dois backends de JSON equivalem ao jsonable_encoder; a compressão respeita o Accept-Encoding."""
+    import asyncio
+    import gzip
+    import json
+    import zlib
+    from datetime import datetime
+    import numpy as np
+    from fastapi.encoders import jsonable_encoder
+    from finance_engine.core import respostas
+
+    conteudo = {
+        "folha": PayrollManager.calcular_folha_detalhada(7300.55, dependentes=1),
+        "inteiro": Decimal("10"), "quando": datetime(2026, 1, 2, 3, 4, 5),
+        "colunas": {"mes": np.arange(3), "saldo": np.array([1.5, 2.25, 0.0])},
+        "ç": [1, "ã"],
+    }
+    esperado = jsonable_encoder({**conteudo, "colunas": {"mes": [0, 1, 2], "saldo": [1.5, 2.25, 0.0]}})
+    assert json.loads(respostas.codificar(conteudo, "json")) == esperado
+    if respostas.orjson is not None:
+        assert json.loads(respostas.codificar(conteudo, "orjson")) == esperado
+    assert respostas.RespostaJSON.pronta('{"a":1}').body == b'{"a":1}'
+
+    assert respostas.escolher_codificacao("gzip;q=0.5, deflate") == "gzip"
+    assert respostas.escolher_codificacao("identity") is None
+    assert respostas.escolher_codificacao("gzip;q=0, *;q=0") is None
+
+    async def aplicacao(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", b"5000")]})
+        await send({"type": "http.response.body", "body": b"1" * 5000})
+
+    def chamar(accept):
+        mensagens = []
+
+        async def enviar(mensagem):
+            mensagens.append(mensagem)
+        scope = {"type": "http", "headers": [(b"accept-encoding", accept)]}
+        asyncio.run(respostas.MiddlewareCompressao(aplicacao, minimo=1024)(scope, None, enviar))
+        return dict(mensagens[0]["headers"]), mensagens[1]["body"]
+
+    cabecalhos, corpo = chamar(b"gzip")
+    assert cabecalhos[b"content-encoding"] == b"gzip" and int(cabecalhos[b"content-length"]) == len(corpo)
+    assert gzip.decompress(corpo) == b"1" * 5000
+    cabecalhos, corpo = chamar(b"identity")
+    assert b"content-encoding" not in cabecalhos and len(corpo) == 5000
+
+    # Streaming: cada bloco chega descarregado e já descomprime sozinho
+    linhas = [b'{"mes":%d}\n' % mes for mes in range(3)]
+
+    async def aplicacao_stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for linha in linhas:
+            await send({"type": "http.response.body", "body": linha, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    blocos = []
+
+    async def receber(mensagem):
+        if mensagem["type"] == "http.response.body":
+            blocos.append(mensagem["body"])
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(respostas.MiddlewareCompressao(aplicacao_stream)(scope, None, receber))
+    descompressor = zlib.decompressobj(31)
+    for bloco, linha in zip(blocos, linhas):
+        assert bloco and descompressor.decompress(bloco) == linha
+    descompressor.decompress(blocos[-1])
+    assert descompressor.eof
+
+def test_execucao_com_pools_e_limites_de_concorrencia():
+    """Cálculos vão para os pools sem bloquear o loop; acima do limite a vaga é recusada."""
+    import asyncio
+    import json
+    import threading
+    from finance_engine.core.execucao import ExecutorCalculos, LimiteExcedido, LimitesConcorrencia
+    from finance_engine.modules import tarefas
+
+    limites = LimitesConcorrencia({"tir": 1})
+    with limites.ocupar("tir"):
+        with pytest.raises(LimiteExcedido):
+            with limites.ocupar("tir"):
+                pass
+    with limites.ocupar("tir"):
+        pass
+    assert limites.estatisticas()["tir"] == {"maximo": 1, "em_uso": 0, "rejeitadas": 1}
+
+    executor = ExecutorCalculos(processos=1, threads=2)
+
+    async def cenario():
+        thread = await executor.em_thread(lambda: threading.current_thread().name)
+        corpo = await executor.em_processo(tarefas.tir, [-1000, 300, 400, 500], None)
+        return thread, corpo
+
+    try:
+        thread, corpo = asyncio.run(cenario())
+    finally:
+        executor.encerrar()
+    assert thread.startswith("jubarte-io")
+    assert json.loads(corpo) == {"tir": 8.8963}
+
+def test_streams_liberam_a_vaga_mesmo_sem_percorrer_o_corpo():
+    """Envio que falha antes do corpo (cliente caiu, middleware quebrou) não prende a vaga."""
+    import asyncio
+    import api
+
+    async def receber():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar_quebrado(mensagem):
+        raise OSError("cliente desconectou")
+
+    async def enviar(mensagem):
+        pass
+
+    escopo = {"type": "http", "asgi": {"spec_version": "2.4"}, "headers": []}
+    for _ in range(api.limites.maximos["exportacao"] + 1):
+        resposta = api._stream_com_vaga("exportacao", iter([b"a", b"b"]))
+        # O Starlette pode embrulhar o erro (ClientDisconnect, ExceptionGroup)
+        with pytest.raises(Exception):
+            asyncio.run(resposta(escopo, receber, enviar_quebrado))
+    assert api.limites.estatisticas()["exportacao"]["em_uso"] == 0
+
+    resposta = api._stream_com_vaga("amortizacao", iter([b"linha\n"]))
+    assert api.limites.estatisticas()["amortizacao"]["em_uso"] == 1
+    asyncio.run(resposta(escopo, receber, enviar))
+    assert api.limites.estatisticas()["amortizacao"]["em_uso"] == 0
+
+def test_precificacao_em_lote_igual_a_escalar_com_erros_por_linha():
+    """O lote reproduz o arredondamento das funções escalares e não aborta em linhas inválidas."""
+    from finance_engine.modules.business import BusinessAnalytics
+    from finance_engine.modules.business_batch import BatchBusiness
+
+    # Inclui empate no lucro nominal (0,05 / 0,7 * 21%), custo com 6 casas e linhas inválidas
+    custos = [100, 0.05, 59.99, 12.345678, 1e12, float("nan"), 10]
+    impostos = [18, 4, 12.5, 9.25, 18, 18, 60]
+    lote = BatchBusiness.precificar_lote(custos, impostos, 5, [20, 21, 15, 33.3333, 10, 10, 40])
+
+    for linha, custo in enumerate(custos[:5]):
+        esperado = BusinessAnalytics.precificacao_markup(custo, impostos[linha], 5, [20, 21, 15, 33.3333, 10][linha])
+        assert lote["valido"][linha]
+        assert Decimal(int(lote["preco_venda"][linha])).scaleb(-2) == esperado["preco_venda"]
+        assert Decimal(int(lote["markup_fator"][linha])).scaleb(-4) == esperado["markup_fator"]
+        assert Decimal(int(lote["lucro_nominal"][linha])).scaleb(-2) == esperado["lucro_nominal"]
+    assert lote["erros"] == {
+        5: "Valor ausente ou inválido.",
+        6: "As margens e impostos somados igualam ou superam 100%, impossibilitando o lucro.",
+    }
+
+    equilibrio = BatchBusiness.ponto_equilibrio_lote([25000, 1000.01, 500], [40, 33.3333, 0])
+    assert equilibrio["ponto_equilibrio"][:2].tolist() == [
+        int(BusinessAnalytics.ponto_equilibrio(25000, 40).scaleb(2)),
+        int(BusinessAnalytics.ponto_equilibrio(1000.01, 33.3333).scaleb(2)),
+    ]
+    assert equilibrio["erros"] == {2: "Margem de contribuição não pode ser zero."}
+
+    json_lote = BatchBusiness.colunas_para_json(lote, casas={"markup_fator": 4})
+    assert json_lote["com_erro"] == 2 and json_lote["colunas"]["preco_venda"][5] != json_lote["colunas"]["preco_venda"][5]
+
+def test_resumo_folha_incremental_e_indicadores_da_empresa():
+    """O resumo acompanha as alterações de funcionários e alimenta o painel com os encargos do regime."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database.models import Base, Empresa, Funcionario, ResumoFolhaEmpresa
+    from finance_engine.database.resumos import _criar_resumo, consulta_agregada, obter_resumo, recalcular_resumo
+    from finance_engine.modules.business import BusinessAnalytics
+    from finance_engine.modules.painel_empresa import PainelEmpresa
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(bind=engine)
+    db = sessao()
+    simples = Empresa(razao_social="Simples ME", regime_tributario="Simples Nacional")
+    real = Empresa(razao_social="Real SA", regime_tributario="Lucro Real")
+    simples.funcionarios = [Funcionario(nome="Ana", salario_base=Decimal("3000.00")),
+                            Funcionario(nome="Bia", salario_base=Decimal("2000.50"))]
+    real.funcionarios = [Funcionario(nome="Caio", salario_base=Decimal("5000.00"))]
+    db.add_all([simples, real])
+    db.commit()
+
+    # Aumento, transferência entre empresas e demissão, cada um em uma sessão
+    db = sessao()
+    db.get(Funcionario, 1).salario_base = Decimal("3500.00")
+    db.commit()
+    db.get(Funcionario, 2).empresa = db.get(Empresa, 2)
+    db.commit()
+    db.delete(db.get(Funcionario, 3))
+    db.commit()
+
+    def resumos():
+        db.expire_all()
+        return {r.empresa_id: (r.total_funcionarios, r.soma_salarios_centavos) for r in db.query(ResumoFolhaEmpresa)}
+
+    assert resumos() == {1: (1, 350000), 2: (1, 200050)}
+    assert {r.empresa_id: (r[1], int(r[2])) for r in db.execute(consulta_agregada())} == resumos()
+
+    painel = PainelEmpresa.indicadores(db, 1, receita_mensal=20000, custos_variaveis=5000,
+                                       outras_despesas_fixas=1000)
+    # Simples: sem CPP/RAT/Sistema S na folha, só FGTS e provisões
+    assert painel.encargos_sociais == Decimal("0.00")
+    assert painel.custo_total_folha == PayrollManager.custo_empresa(3500, cpp=0, rat=0, sistema_s=0).custo_total_mensal
+    assert painel.margem_contribuicao == Decimal("75.00")
+    assert painel.ponto_equilibrio == BusinessAnalytics.ponto_equilibrio(painel.despesas_fixas, 75)
+    assert painel.ebitda == Decimal("20000") - 5000 - painel.despesas_fixas
+    assert PainelEmpresa.indicadores(db, 2).encargos_sociais == PayrollManager.custo_empresa("2000.50").encargos_sociais
+    assert PainelEmpresa.indicadores(db, 999) is None
+
+    db.query(ResumoFolhaEmpresa).delete()
+    db.commit()
+    assert recalcular_resumo(db) == 2 and resumos() == {1: (1, 350000), 2: (1, 200050)}
+
+    # Materializar na leitura não faz commit do que a sessão tinha pendente
+    db.query(ResumoFolhaEmpresa).filter_by(empresa_id=1).delete()
+    db.commit()
+    db.add(Empresa(razao_social="Pendente LTDA"))
+    assert obter_resumo(db, 1).soma_salarios_centavos == 350000
+    db.rollback()
+    assert db.query(Empresa).count() == 2 and 1 not in resumos()
+    # Linha criada por outra sessão nesse meio tempo: sem conflito de chave
+    assert _criar_resumo(db.connection(), 1) and not _criar_resumo(db.connection(), 1)
+    db.close()
+
+def test_carga_em_massa_idempotente_e_exportacao():
+    """Importação em blocos com upsert por CNPJ, erros por linha, resumo atualizado e exportação de volta."""
+    import io
+    import json
+    from datetime import datetime
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database import carga
+    from finance_engine.database.models import Base, Empresa, ResumoFolhaEmpresa, SimulacaoFinanceira
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(bind=engine)
+    arquivo = (
+        "cnpj;razao_social;regime_tributario;nome;cargo;salario_base\n"
+        "11.222.333/0001-81;Alfa SA;Lucro Real;Ana;Analista;3.500,00\n"
+        "11222333000181;;;Bia;;2000.5\n"
+        "11.222.333/0001-82;Beta;;Caio;;1000\n"
+        "44.555.666/0001-81;;;Duda;;1000\n"
+        "11.222.333/0001-81;;;Eva;;10.555\n"
+    ).encode()
+
+    db = sessao()
+    for _ in range(2):
+        relatorio = carga.importar_funcionarios(db, io.BytesIO(arquivo), tamanho_lote=2)
+    assert relatorio["funcionarios"] == 2 and relatorio["removidos"] == 2 and relatorio["empresas"] == 1
+    assert [erro["linha"] for erro in relatorio["erros"]] == [4, 5, 6]
+    assert db.query(Empresa).one().cnpj == "11.222.333/0001-81"
+    resumo = db.get(ResumoFolhaEmpresa, 1)
+    assert (resumo.total_funcionarios, resumo.soma_salarios_centavos) == (2, 550050)
+
+    # Um único formato por separador: vírgula só como decimal brasileiro
+    assert carga._salario("1.234,56") == carga._salario("1234,56") == carga._salario("1234.56") == Decimal("1234.56")
+    for ambiguo in ("3,500.00", "3,500", "1.234.567", "12,34.5", "1,234,567"):
+        with pytest.raises(ValueError):
+            carga._salario(ambiguo)
+    relatorio = carga.importar_funcionarios(db, io.BytesIO(
+        b"cnpj;nome;salario_base\n11.222.333/0001-81;Fabi;\"3,500.00\"\n11.222.333/0001-81;Gil;3,500\n"
+    ), substituir=False)
+    assert relatorio["funcionarios"] == 0 and [erro["linha"] for erro in relatorio["erros"]] == [2, 3]
+
+    exportado = b"".join(carga.exportar_funcionarios(sessao, tamanho_lote=1)).decode().splitlines()
+    assert exportado[0] == ",".join(carga.COLUNAS_FUNCIONARIOS)
+    assert exportado[1:] == ["11.222.333/0001-81,Alfa SA,Lucro Real,Ana,Analista,3500.00",
+                             "11.222.333/0001-81,Alfa SA,Lucro Real,Bia,,2000.50"]
+
+    db.execute(insert(SimulacaoFinanceira), [
+        {"id": i, "tipo": "PAYROLL", "data_criacao": datetime(2026, 1, 1, 0, 0, i),
+         "parametros_entrada": {"i": i}, "resultados": {}, "usuario_ref": "u"}
+        for i in range(5)
+    ])
+    db.commit()
+    linhas = b"".join(carga.exportar_simulacoes(sessao, tamanho_lote=2)).splitlines()
+    assert [json.loads(linha)["id"] for linha in linhas] == [4, 3, 2, 1, 0]
+    db.close()
+
+def test_carga_com_falha_no_meio_nao_deixa_quadro_parcial():
+    """Carga que falha no meio: a substituição não muda nada; a incremental mantém os blocos gravados com o resumo certo."""
+    import io
+    from sqlalchemy import create_engine, func
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database import carga
+    from finance_engine.database.models import Base, Funcionario, ResumoFolhaEmpresa
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    carga.importar_funcionarios(db, io.BytesIO(
+        b"cnpj;razao_social;nome;salario_base\n11.222.333/0001-81;Alfa SA;Ana;3500\n11.222.333/0001-81;;Bia;2000\n"
+    ))
+    # Byte UTF-8 inválido bem depois do primeiro bloco (e da amostra do Sniffer)
+    linhas = [b"11.222.333/0001-81;;F%d;1000" % i for i in range(1200)]
+    linhas[1000] = b"11.222.333/0001-81;;F\xff;1000"
+    arquivo = b"cnpj;razao_social;nome;salario_base\n" + b"\n".join(linhas) + b"\n"
+
+    def quadro():
+        return db.query(func.count(Funcionario.id), func.sum(Funcionario.salario_base)).one()
+
+    def resumo():
+        db.expire_all()
+        linha = db.get(ResumoFolhaEmpresa, 1)
+        return linha.total_funcionarios, linha.soma_salarios_centavos
+
+    with pytest.raises(UnicodeDecodeError):
+        carga.importar_funcionarios(db, io.BytesIO(arquivo), tamanho_lote=100)
+    assert quadro() == (2, Decimal("5500.00")) and resumo() == (2, 550000)
+
+    with pytest.raises(UnicodeDecodeError):
+        carga.importar_funcionarios(db, io.BytesIO(arquivo), tamanho_lote=100, substituir=False)
+    total, soma = quadro()
+    assert total > 102 and resumo() == (total, int(soma * 100))
+    db.close()
+
+_SUBIDA_API = """
+import json, sys, time
+inicio = time.perf_counter()
+import api
+duracao = time.perf_counter() - inicio
+pesados = [m for m in ("openpyxl", "pandas", "pyarrow") if m in sys.modules]
+from sqlalchemy import inspect
+antes = inspect(api.engine).get_table_names()
+from fastapi.testclient import TestClient
+with TestClient(api.app) as cliente:
+    depois = inspect(api.engine).get_table_names()
+    relatorio = cliente.post("/reports/generate", json={"salario_bruto": 5000}).status_code
+print(json.dumps({"duracao": duracao, "pesados": pesados, "antes": antes, "depois": depois,
+                  "relatorio": relatorio, "openpyxl": "openpyxl" in sys.modules}))
+"""
+
+def test_import_da_api_leve_e_esquema_criado_na_subida(tmp_path):
+    """Importar a API fica no orçamento de tempo, sem openpyxl nem criar o esquema; a subida cria."""
+    import json
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    # Folgado para máquinas de CI lentas; ajustável com JUBARTE_ORCAMENTO_IMPORT (segundos)
+    orcamento = float(os.environ.get("JUBARTE_ORCAMENTO_IMPORT", 2.0))
+    ambiente = dict(os.environ, JUBARTE_DATABASE_URL=f"sqlite:///{tmp_path / 'subida.db'}")
+    saida = subprocess.run(
+        [sys.executable, "-c", _SUBIDA_API], cwd=Path(__file__).resolve().parents[2],
+        env=ambiente, capture_output=True, text=True, check=True,
+    )
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+
+    assert resultado["duracao"] < orcamento, f"import api levou {resultado['duracao']:.2f}s"
+    assert resultado["pesados"] == []
+    assert resultado["antes"] == []
+    assert {"empresas", "funcionarios", "resumos_folha_empresa", "simulacoes"} <= set(resultado["depois"])
+    # O relatório continua funcionando, carregando o openpyxl só quando pedido
+    assert resultado["relatorio"] == 200 and resultado["openpyxl"]
+
+def test_projecao_plurianual_da_folha_igual_ao_calculo_mensal(monkeypatch):
+    """Reajustes, piso e tabelas por ano: cada mês bate com o cálculo Decimal individual."""
+    from finance_engine.core import tax_tables
+    from finance_engine.modules.payroll_projection import COLUNAS, PayrollProjection
+
+    salarios = [Decimal("1500.00"), Decimal("4354.27"), Decimal("4999.99"), Decimal("7349.50"), Decimal("9000.00")]
+    dependentes = [0, 1, 0, 2, 0]
+    tabelas_2028 = PayrollProjection.montar_tabelas(
+        2028,
+        [('0', '1720.00', '0.075'), ('1720.01', '3100.00', '0.09'),
+         ('3100.01', '4600.00', '0.12'), ('4600.01', '9000.00', '0.14')],
+        [('5200.00', '0', '0'), ('7600.00', '0.15', '780.00'), ('inf', '0.275', '1730.00')],
+        deducao_dependente='200.00',
+    )
+    projecao = PayrollProjection.projetar(
+        salarios, dependentes, anos=3, ano_inicial=2026, mes_inicial=6, mes_reajuste=5,
+        reajustes={2027: 4.5, 2028: 3.75}, salarios_minimos={2027: 1720},
+        tabelas={2028: tabelas_2028}, por_funcionario=COLUNAS,
+    )
+    colunas = projecao["colunas"]
+    assert projecao["meses"] == 36 and colunas["ano"][0] == 2026 and colunas["mes"][0] == 6
+    # 2029 não tem tabelas: usa as de 2028
+    assert list(colunas["ano_tabela"][[0, 7, 19, 35]]) == [2026, 2026, 2028, 2028]
+
+    # Referência: o mesmo calendário de eventos, mês a mês, pelo PayrollManager
+    monkeypatch.setitem(tax_tables._TABELAS, 2028, tabelas_2028)
+    atuais = list(salarios)
+    for indice in range(36):
+        ano, mes = int(colunas["ano"][indice]), int(colunas["mes"][indice])
+        if indice and mes == 5 and ano in (2027, 2028):
+            fator = 1 + Decimal("4.5" if ano == 2027 else "3.75") / 100
+            atuais = [(s * fator).quantize(Decimal("0.01"), "ROUND_HALF_UP") for s in atuais]
+        if indice and mes == 1 and ano == 2027:
+            atuais = [max(s, Decimal("1720")) for s in atuais]
+        ano_tabela = 2026 if ano < 2028 else 2028
+        for pos, (salario, dep) in enumerate(zip(atuais, dependentes)):
+            esperado = {**PayrollManager.calcular_folha_detalhada(salario, dep, ano=ano_tabela),
+                        **PayrollManager.custo_empresa(salario).to_dict()}
+            for coluna in COLUNAS:
+                assert Decimal(int(projecao["por_funcionario"][coluna][indice, pos])).scaleb(-2) == esperado[coluna]
+
+    total = sum(Decimal(int(v)) for v in projecao["por_funcionario"]["custo_total_mensal"].ravel()).scaleb(-2)
+    assert projecao["totais"]["custo_total_mensal"] == total
+    with pytest.raises(ValueError, match="Colunas desconhecidas"):
+        PayrollProjection.projetar(salarios, por_funcionario=["bonus"])
+
+def test_ids_de_simulacao_com_worker_reservado():
+    """Geradores sem id explícito reservam workers distintos; ids fora da faixa são recusados."""
+    from finance_engine.database.writer import GeradorIds
+
+    a, b = GeradorIds(), GeradorIds()
+    assert a.worker_id != b.worker_id
+    ids = [a.proximo() for _ in range(600)] + [b.proximo() for _ in range(600)]
+    assert len(set(ids)) == len(ids)
+    assert GeradorIds(63).worker_id == 63 and ids[-1] < 2 ** 53
+    with pytest.raises(ValueError, match="Id de worker"):
+        GeradorIds(64)
+
+    # Inserts do ORM sem id também usam o gerador, não o max + 1 do banco
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from finance_engine.database.models import Base, SimulacaoFinanceira
+    from finance_engine.database.writer import gerador_padrao
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([SimulacaoFinanceira(id=ids[-1] + 1, tipo="X"), SimulacaoFinanceira(tipo="Y")])
+    db.commit()
+    gerado = db.query(SimulacaoFinanceira).filter_by(tipo="Y").one().id
+    assert gerado != ids[-1] + 2 and gerado >> 7 & 63 == gerador_padrao().worker_id
+    db.close()
+
+def test_escritor_simulacoes_retenta_e_guarda_falhas(tmp_path, monkeypatch):
+    """Lotes que falham são retentados; o que não entra vai para o arquivo de falhas e pode ser regravado."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from finance_engine.database.models import Base, SimulacaoFinanceira
+    from finance_engine.database.writer import EscritorSimulacoes
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    indisponivel = {"falhas": 2}
+
+    def sessao():
+        # Banco "travado" nas duas primeiras tentativas
+        if indisponivel["falhas"]:
+            indisponivel["falhas"] -= 1
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return fabrica()
+
+    falhas = tmp_path / "falhas.jsonl"
+    escritor = EscritorSimulacoes(sessao, tamanho_lote=50, intervalo=0.05, esperas=(0, 0), arquivo_falhas=str(falhas))
+    ids = [escritor.enfileirar("PAYROLL_2026", {"bruto": i}, {}, "TESTE") for i in range(10)]
+    escritor.aguardar()
+    db = fabrica()
+    assert db.query(SimulacaoFinanceira).count() == 10 and not falhas.exists()
+
+    # Id repetido: só a linha em conflito fica de fora, guardada no arquivo
+    duplicado = dict(id=ids[0], tipo="X", parametros_entrada={}, resultados={}, usuario_ref=None)
+    escritor._fila.put({**duplicado, "data_criacao": db.get(SimulacaoFinanceira, ids[0]).data_criacao})
+    novo = escritor.enfileirar("PAYROLL_2026", {"bruto": 99}, {}, "TESTE")
+    escritor.aguardar()
+    db.expire_all()
+    assert db.get(SimulacaoFinanceira, novo) is not None and escritor.falhas == 1
+
+    # Resolvido o conflito, a simulação guardada volta para o banco
+    db.delete(db.get(SimulacaoFinanceira, ids[0]))
+    db.commit()
+    assert escritor.regravar_falhas() == 1 and not falhas.exists()
+    db.expire_all()
+    assert db.get(SimulacaoFinanceira, ids[0]).tipo == "X"
+    escritor.parar()
+    db.close()
+
+    # Sem arquivo configurado, as falhas ficam ao lado do banco SQLite (nunca no diretório atual)
+    monkeypatch.delenv("JUBARTE_SIMULACOES_FALHAS", raising=False)
+    em_arquivo = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'dados' / 'jubarte.db'}"))
+    assert EscritorSimulacoes(em_arquivo).arquivo_falhas == str(tmp_path / "dados" / "simulacoes_falhas.jsonl")
@@ -1,48 +1,85 @@
-import pandas as pd
-from decimal import Decimal
+import tempfile
+from openpyxl import Workbook
 from finance_engine.modules.calculator import FinancialCalculator
 from finance_engine.modules.payroll import PayrollManager
+from finance_engine.modules.payroll_batch import BatchPayroll
 
-def generate_full_report(salary=8000, loan_value=120000, months=12):
-    print(f"--- GERANDO RELATÓRIO FINANCEIRO DETALHADO (2026) ---")
-    
-    # 1. CUSTO EMPRESA DETALHADO
+COLUNAS_AMORTIZACAO = ['mes', 'prestacao', 'amortizacao', 'juros', 'saldo_devedor']
+COLUNAS_FOLHA = ['funcionario_id', 'nome', 'cargo', 'salario_bruto', 'desconto_inss',
+                 'desconto_irrf', 'fgts_recolhido', 'salario_liquido']
+
+
+def _novo_arquivo() -> str:
+    # Um arquivo por requisição: chamadas concorrentes nunca se sobrescrevem
+    arquivo = tempfile.NamedTemporaryFile(prefix="Relatorio_Jubarte_", suffix=".xlsx", delete=False)
+    arquivo.close()
+    return arquivo.name
+
+
+def _escrever_custos(wb, salary):
     custo = PayrollManager.custo_total_empresa(salary)
     folha = PayrollManager.calcular_folha_detalhada(salary)
-    
-    # Criando DataFrame para detalhamento de custos
-    df_custos = pd.DataFrame([
-        {"Item": "Salário Bruto", "Valor (R$)": float(salary), "Tipo": "Provento"},
-        {"Item": "INSS (Funcionário)", "Valor (R$)": -float(folha['desconto_inss']), "Tipo": "Desconto"},
-        {"Item": "IRRF (Funcionário)", "Valor (R$)": -float(folha['desconto_irrf']), "Tipo": "Desconto"},
-        {"Item": "Salário Líquido (Recebido)", "Valor (R$)": float(folha['salario_liquido']), "Tipo": "Resultado"},
-        {"Item": "---", "Valor (R$)": 0, "Tipo": "---"},
-        {"Item": "FGTS (8%)", "Valor (R$)": float(folha['fgts_recolhido']), "Tipo": "Encargo Empresa"},
-        {"Item": "Provisão Férias/13º", "Valor (R$)": float(custo['provisoes_ferias_13']), "Tipo": "Encargo Empresa"},
-        {"Item": "Encargos Sociais (CPP/RAT/S)", "Valor (R$)": float(custo['encargos_sociais']), "Tipo": "Encargo Empresa"},
-        {"Item": "CUSTO TOTAL MENSAL", "Valor (R$)": float(custo['custo_total_mensal']), "Tipo": "TOTAL EMPRESA"}
-    ])
-
-    # 2. AMORTIZAÇÃO COMPARATIVA
-    sac = FinancialCalculator.tabela_sac(loan_value, 12, months)
-    price = FinancialCalculator.tabela_price(loan_value, 12, months)
-    
-    df_sac = pd.DataFrame(sac)
-    df_price = pd.DataFrame(price)
-    
-    for df in [df_sac, df_price]:
-        for col in ['prestacao', 'amortizacao', 'juros', 'saldo_devedor']:
-            df[col] = df[col].apply(float)
-
-    # 3. EXPORTAR PARA EXCEL MULTI-PÁGINA
-    report_name = "Relatorio_Financeiro_Jubarte.xlsx"
-    with pd.ExcelWriter(report_name) as writer:
-        df_custos.to_excel(writer, sheet_name='Custo Funcionario', index=False)
-        df_sac.to_excel(writer, sheet_name='Amortizacao SAC', index=False)
-        df_price.to_excel(writer, sheet_name='Amortizacao PRICE', index=False)
-    
+
+    ws = wb.create_sheet('Custo Funcionario')
+    ws.append(["Item", "Valor (R$)", "Tipo"])
+    for linha in [
+        ("Salário Bruto", float(salary), "Provento"),
+        ("INSS (Funcionário)", -float(folha['desconto_inss']), "Desconto"),
+        ("IRRF (Funcionário)", -float(folha['desconto_irrf']), "Desconto"),
+        ("Salário Líquido (Recebido)", float(folha['salario_liquido']), "Resultado"),
+        ("---", 0, "---"),
+        ("FGTS (8%)", float(folha['fgts_recolhido']), "Encargo Empresa"),
+        ("Provisão Férias/13º", float(custo['provisoes_ferias_13']), "Encargo Empresa"),
+        ("Encargos Sociais (CPP/RAT/S)", float(custo['encargos_sociais']), "Encargo Empresa"),
+        ("CUSTO TOTAL MENSAL", float(custo['custo_total_mensal']), "TOTAL EMPRESA"),
+    ]:
+        ws.append(linha)
+
+
+def _escrever_amortizacao(wb, titulo, linhas):
+    ws = wb.create_sheet(titulo)
+    ws.append(COLUNAS_AMORTIZACAO)
+    for linha in linhas:
+        ws.append([linha['mes']] + [float(linha[col]) for col in COLUNAS_AMORTIZACAO[1:]])
+
+
+def _escrever_folha_empresa(wb, db, empresa_id):
+    # Funcionários lidos e calculados em lotes: memória limitada mesmo com 100k+ linhas
+    ws = wb.create_sheet('Folha Empresa')
+    ws.append(COLUNAS_FOLHA)
+    for linhas, folha in BatchPayroll.iterar_empresa(db, empresa_id):
+        colunas = [folha[col].tolist() for col in COLUNAS_FOLHA[3:]]
+        for idx, funcionario in enumerate(linhas):
+            ws.append([funcionario.id, funcionario.nome, funcionario.cargo]
+                      + [coluna[idx] / 100 for coluna in colunas])
+
+
+def generate_full_report(salary=8000, loan_value=120000, months=12, output=None, db=None, empresa_id=None):
+    """
+    Gera o relatório Excel em modo streaming (openpyxl write-only).
+    `output` pode ser um caminho ou um arquivo binário (ex.: BytesIO); se omitido,
+    é criado um arquivo temporário exclusivo, cujo caminho é retornado.
+    """
+    print(f"--- GERANDO RELATÓRIO FINANCEIRO DETALHADO (2026) ---")
+    wb = Workbook(write_only=True)
+
+    # 1. CUSTO EMPRESA DETALHADO
+    _escrever_custos(wb, salary)
+
+    # 2. AMORTIZAÇÃO COMPARATIVA (linhas geradas sob demanda)
+    _escrever_amortizacao(wb, 'Amortizacao SAC', FinancialCalculator.iter_sac(loan_value, 12, months))
+    _escrever_amortizacao(wb, 'Amortizacao PRICE', FinancialCalculator.iter_price(loan_value, 12, months))
+
+    # 3. FOLHA DA EMPRESA INTEIRA (opcional)
+    if empresa_id is not None:
+        _escrever_folha_empresa(wb, db, empresa_id)
+
+    # 4. EXPORTAR PARA EXCEL MULTI-PÁGINA
+    report_name = output if output is not None else _novo_arquivo()
+    wb.save(report_name)
+
     print(f"✅ Relatório '{report_name}' gerado com sucesso!")
     return report_name
 
 if __name__ == "__main__":
-    generate_full_report()
+    generate_full_report(output="Relatorio_Financeiro_Jubarte.xlsx")
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+# Geração de relatórios fora do request: cada pedido vira um job executado num
+# pool de processos. Pedidos idênticos (mesmo hash de entrada) reaproveitam o
+# mesmo job e o mesmo arquivo.
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+
+def _gerar_relatorio(parametros: Dict, destino: str) -> str:
+    """Executado no processo worker."""
+    from generate_report import generate_full_report
+
+    empresa_id = parametros.get("empresa_id")
+    if empresa_id is None:
+        return generate_full_report(output=destino, **_argumentos(parametros))
+
+    from finance_engine.database.session import SessionLocal
+    db = SessionLocal()
+    try:
+        return generate_full_report(output=destino, db=db, empresa_id=empresa_id, **_argumentos(parametros))
+    finally:
+        db.close()
+
+
+def _argumentos(parametros: Dict) -> Dict:
+    return {k: parametros[k] for k in ("salary", "loan_value", "months") if k in parametros}
+
+
+def chave_relatorio(parametros: Dict) -> str:
+    """Hash estável das entradas do relatório."""
+    normalizado = json.dumps(parametros, sort_keys=True, default=str)
+    return hashlib.sha256(normalizado.encode()).hexdigest()
+
+
+class JobRelatorio:
+    __slots__ = ("id", "chave", "parametros", "caminho", "future", "erro", "criado_em", "concluido_em",
+                 "downloads", "ultimo_download")
+
+    def __init__(self, chave, parametros, caminho):
+        self.id = uuid.uuid4().hex
+        self.chave = chave
+        self.parametros = parametros
+        self.caminho = caminho
+        self.future = None
+        self.erro = None
+        self.criado_em = time.time()
+        self.concluido_em = None
+        self.downloads = 0
+        self.ultimo_download = None
+
+    @property
+    def status(self) -> str:
+        if self.future is None or not self.future.done():
+            return EXECUTANDO if self.future is not None and self.future.running() else PENDENTE
+        if self.future.cancelled() or self.future.exception() is not None:
+            return ERRO
+        return CONCLUIDO
+
+    def to_dict(self) -> Dict:
+        status = self.status
+        erro = self.erro
+        if status == ERRO and erro is None:
+            erro = "cancelado" if self.future.cancelled() else str(self.future.exception())
+        return {
+            "job_id": self.id,
+            "status": status,
+            "parametros": self.parametros,
+            "erro": erro,
+            "criado_em": self.criado_em,
+            "concluido_em": self.concluido_em,
+        }
+
+
+class GerenciadorRelatorios:
+    """Fila de jobs de relatório com pool de processos e cache por hash de entrada."""
+
+    def __init__(self, max_workers=None, diretorio=None, retencao=3600.0, prazo_download=3600.0):
+        self.max_workers = max_workers or int(os.environ.get("JUBARTE_REPORT_WORKERS", 2))
+        self._diretorio = diretorio or os.environ.get("JUBARTE_REPORTS_DIR")
+        self.retencao = retencao
+        self.prazo_download = prazo_download
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, JobRelatorio] = {}
+        self._por_chave: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def diretorio(self) -> str:
+        # Criado só no primeiro job, para não deixar diretórios vazios a cada import
+        if self._diretorio is None:
+            self._diretorio = tempfile.mkdtemp(prefix="jubarte_relatorios_")
+        return self._diretorio
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: o processo da API tem threads (gravação em lote), então evitamos fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submeter(self, parametros: Dict, versao_dados: Optional[str] = None) -> JobRelatorio:
+        """
+        Enfileira um relatório, ou devolve o job existente para as mesmas entradas.
+        Relatórios que leem o banco informam `versao_dados` (ex.: a última
+        alteração dos funcionários): dados novos geram um novo job.
+        """
+        chave = chave_relatorio(parametros if versao_dados is None else {**parametros, "versao_dados": versao_dados})
+        with self._lock:
+            self._expirar()
+            existente = self._jobs.get(self._por_chave.get(chave))
+            if existente is not None and existente.status != ERRO:
+                return existente
+
+            job = JobRelatorio(chave, parametros, os.path.join(self.diretorio, f"{chave}.xlsx"))
+            try:
+                job.future = self._pool().submit(_gerar_relatorio, parametros, job.caminho)
+            except BrokenProcessPool:
+                # Um worker morreu (ex.: falta de memória): recria o pool uma vez
+                self._executor = None
+                job.future = self._pool().submit(_gerar_relatorio, parametros, job.caminho)
+            job.future.add_done_callback(lambda future, job=job: self._finalizar(job, future))
+            self._jobs[job.id] = job
+            self._por_chave[chave] = job.id
+            return job
+
+    def _finalizar(self, job: JobRelatorio, future):
+        job.concluido_em = time.time()
+        if future.cancelled():
+            job.erro = "cancelado"
+        elif future.exception() is not None:
+            job.erro = str(future.exception())
+
+    def obter(self, job_id: str) -> Optional[JobRelatorio]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def iniciar_download(self, job: JobRelatorio):
+        """Marca um download em andamento: o arquivo não expira até `concluir_download`."""
+        with self._lock:
+            job.downloads += 1
+            job.ultimo_download = time.time()
+
+    def concluir_download(self, job: JobRelatorio):
+        with self._lock:
+            job.downloads -= 1
+
+    def _em_download(self, job: JobRelatorio, agora: float) -> bool:
+        # Um download que nunca concluiu (conexão perdida) segura o arquivo no máximo por `prazo_download`
+        return job.downloads > 0 and job.ultimo_download > agora - self.prazo_download
+
+    def _expirar(self):
+        agora = time.time()
+        limite = agora - self.retencao
+        for job in [j for j in self._jobs.values() if j.concluido_em and j.concluido_em < limite]:
+            if self._em_download(job, agora):
+                continue
+            del self._jobs[job.id]
+            if self._por_chave.get(job.chave) == job.id:
+                del self._por_chave[job.chave]
+                if os.path.exists(job.caminho):
+                    os.remove(job.caminho)
+
+    def encerrar(self, aguardar=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=aguardar, cancel_futures=not aguardar)
+            self._executor = None